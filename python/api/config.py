@@ -6,6 +6,18 @@ class Settings(BaseSettings):
     api_prefix: str = "/api"
     allowed_origins: list[str] = ["*"]
 
+    # Packing cancellation
+    pack_deadline_ms: float | None = None
+    disconnect_poll_ms: float = 5.0
+
+    # WebSocket packing sessions (/pack/session), least recently used dropped first
+    session_max_count: int = 256
+    session_idle_timeout_s: float = 900.0
+    session_max_mb: float = 256.0
+
+    # Server-side SKU catalogue (/catalogue/skus), kept in memory
+    sku_catalogue_max_count: int = 100_000
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
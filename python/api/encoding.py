@@ -0,0 +1,127 @@
+import json
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional: encode_json falls back to the standard library
+    orjson = None
+
+# Media type of the binary layout format, selected with the Accept header of POST /pack
+LAYOUT_MEDIA_TYPE = "application/vnd.vtl.layout"
+
+# File signature and format version of the binary layout; bump the version on any layout change
+LAYOUT_MAGIC = b"VTLL"
+LAYOUT_VERSION = 1
+
+# magic, version, flags, meta bytes, placed count, unplaced count
+LAYOUT_HEADER = struct.Struct("<4sHHIII")
+
+# Header flags: the response field was null rather than an empty list
+FLAG_PLACED_NONE = 1
+FLAG_UNPLACED_NONE = 2
+
+
+def _padded(data: bytes, fill: bytes = b"\0") -> bytes:
+    # Every section starts 4-byte aligned, so a decoder can view the float32 columns in place
+    return data + fill * (-len(data) % 4)
+
+
+def _q(media_range: str) -> float:
+    for param in media_range.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def wants_layout_binary(accept: Optional[str]) -> bool:
+    """
+    Whether an Accept header asks for the binary layout. JSON stays the default: the binary
+    layout is sent when it is named, with a quality no lower than any range JSON matches.
+    """
+    if not accept:
+        return False
+    binary, json_q = 0.0, 0.0
+    for media_range in accept.split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type == LAYOUT_MEDIA_TYPE:
+            binary = max(binary, _q(media_range))
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, _q(media_range))
+    return binary > 0 and binary >= json_q
+
+
+def _record(obj: Any) -> Any:
+    # API models, numpy scalars from scoring, and the packer's dataclass records where orjson does
+    # not serialize them itself
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "__dataclass_fields__"):
+        return {name: getattr(obj, name) for name in obj.__dataclass_fields__}
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(payload: Dict[str, Any]) -> bytes:
+    """
+    Encodes the PackingResponse fields in `payload` as JSON without building a PackingResponse.
+    Placements and boxes may be API models or the packer's PlacedBox_t / Box_t records, whose
+    fields are the same. Uses orjson when it is installed, which serializes the dataclasses
+    natively.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_record, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_record, separators=(",", ":")).encode("utf-8")
+
+
+def encode_layout(payload: Dict[str, Any]) -> bytes:
+    """
+    Encodes the PackingResponse fields in `payload` (as for encode_json) as a binary layout,
+    little-endian:
+
+    - header: LAYOUT_HEADER
+    - meta: UTF-8 JSON of every field but `placed` and `unplaced`, padded with spaces
+    - strings: uint32 offsets (count + 1) into the UTF-8 ids that follow, placed ids first
+    - placed: float32 x, y, z columns, then a uint8 rotation column
+    - unplaced: float32 width, height, depth, weight, priority columns (NaN for a null
+      priority), then a uint8 rotatable column
+
+    Each section is padded to 4 bytes. Positions and sizes are float32, exact to about a
+    micrometre in a 13.6 m trailer.
+    """
+    placed, unplaced = payload["placed"] or [], payload["unplaced"] or []
+    flags = (FLAG_PLACED_NONE if payload["placed"] is None else 0) | (FLAG_UNPLACED_NONE if payload["unplaced"] is None else 0)
+    meta = _padded(encode_json({k: v for k, v in payload.items() if k not in ("placed", "unplaced")}), b" ")
+
+    ids: List[bytes] = [pb.id.encode("utf-8") for pb in placed] + [b.id.encode("utf-8") for b in unplaced]
+    offsets = np.zeros(len(ids) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(i) for i in ids])
+    strings = offsets.tobytes() + _padded(b"".join(ids))
+
+    n, m = len(placed), len(unplaced)
+    positions = np.array([(pb.x, pb.y, pb.z) for pb in placed], dtype="<f4").reshape(n, 3)
+    rotations = np.fromiter((pb.rotation for pb in placed), dtype="u1", count=n)
+    sizes = np.array(
+        [(b.width, b.height, b.depth, b.weight, np.nan if b.priority is None else b.priority) for b in unplaced],
+        dtype="<f4",
+    ).reshape(m, 5)
+    rotatable = np.fromiter((b.rotatable for b in unplaced), dtype="u1", count=m)
+
+    return b"".join((
+        LAYOUT_HEADER.pack(LAYOUT_MAGIC, LAYOUT_VERSION, flags, len(meta), n, m),
+        meta,
+        strings,
+        positions.T.tobytes(),
+        _padded(rotations.tobytes()),
+        sizes.T.tobytes(),
+        _padded(rotatable.tobytes()),
+    ))
+
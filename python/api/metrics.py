@@ -0,0 +1,34 @@
+import threading
+from collections import Counter
+from typing import Dict
+
+
+class PackMetrics:
+    """
+    Process-wide counters for the packing endpoints, exposed via GET /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._max: Dict[str, float] = {}
+
+    def incr(self, name: str, by: float = 1) -> None:
+        with self._lock:
+            self._counts[name] += by
+
+    def observe_max(self, name: str, value: float) -> None:
+        with self._lock:
+            self._max[name] = max(self._max.get(name, 0.0), value)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {**self._counts, **self._max}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._max.clear()
+
+
+metrics = PackMetrics()
@@ -1,20 +1,322 @@
-from fastapi import APIRouter, HTTPException
-from python.api.schemas import PackingRequest, PackingResponse
-from python.services.packing_services import run_packing
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from python.api.config import settings
+from python.api.encoding import LAYOUT_MEDIA_TYPE, encode_json, encode_layout, wants_layout_binary
+from python.api.metrics import metrics
+from python.api.schemas import (
+    CatalogueSku, CatalogueSummary, FleetPackingRequest, FleetPackingResponse, OnlinePackingHeader, PackingRequest,
+    PackingResponse, PackingStreamError, RepackRequest, RepackResponse, SessionClosed, SessionError, SkuLoad, TruckSelectionRequest,
+    TruckSelectionResponse,
+)
+from python.services.catalogue import SkuCatalogue
+from python.services.packing_services import (
+    OnlinePackingSession, pack_request, run_fleet_packing, run_repack, run_truck_selection, stream_packing,
+)
+from python.services.sessions import SessionStore, handle_session_message
+from python.vtl_core.packing.control import CancelToken, PackCancelled
+from python.vtl_core.packing.processing import STREAM_MODES, STREAM_QUALITY_TIERS
 
 router = APIRouter()
 
+# Packing sessions of /pack/session, shared by every socket of this process
+sessions = SessionStore(
+    max_count=settings.session_max_count,
+    idle_timeout_s=settings.session_idle_timeout_s,
+    max_bytes=settings.session_max_mb * 1024 * 1024,
+)
+
+# SKUs registered with /catalogue/skus, referenced by code from the `skus` of packing requests
+catalogue = SkuCatalogue(max_count=settings.sku_catalogue_max_count)
+
+# /pack answers one URL in two representations; caches must key on Accept
+VARY_ACCEPT = {"Vary": "Accept"}
+
+# Non-standard "client closed request" status; nobody is listening for the body anyway
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _pack_deadline() -> Optional[float]:
+    if settings.pack_deadline_ms is None:
+        return None
+    return time.perf_counter() + settings.pack_deadline_ms / 1000
+
+async def _watch_cancellable(
+    disconnected: Callable[[], Awaitable[bool]], cancel: CancelToken, task: "asyncio.Future[Any]", deadline: Optional[float]
+) -> None:
+    """
+    Waits for `task` while polling `disconnected` (e.g. Request.is_disconnected) and the
+    server-side `deadline`. Either trips `cancel`, which the packing loop observes between
+    regions and heuristic trials.
+    """
+    poll_s = settings.disconnect_poll_ms / 1000
+    while not task.done():
+        await asyncio.wait({task}, timeout=poll_s)
+        if task.done() or cancel.cancelled:
+            continue
+        if await disconnected():
+            cancel.cancel("client disconnected")
+        elif deadline is not None and time.perf_counter() >= deadline:
+            cancel.cancel("deadline exceeded")
+
+def _record_cancelled(cancel: CancelToken) -> None:
+    metrics.incr("pack_cancelled_total")
+    metrics.incr(f"pack_cancelled_{(cancel.reason or 'cancelled').replace(' ', '_')}_total")
+    if cancel.cancelled_at is not None:
+        metrics.observe_max("pack_cancel_latency_ms_max", (time.perf_counter() - cancel.cancelled_at) * 1000)
+
+async def _run_cancellable(raw_request: Request, cancel: CancelToken, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Runs a blocking packing call in the threadpool under _watch_cancellable. Re-raises
+    PackCancelled after recording metrics.
+    """
+    task = asyncio.ensure_future(run_in_threadpool(func, *args))
+    await _watch_cancellable(raw_request.is_disconnected, cancel, task, _pack_deadline())
+
+    try:
+        result = task.result()
+    except PackCancelled:
+        _record_cancelled(cancel)
+        raise
+
+    metrics.incr("pack_completed_total")
+    return result
+
+async def _stream_cancellable(raw_request: Request, cancel: CancelToken, records: Iterator[str]) -> AsyncIterator[str]:
+    """
+    _run_cancellable for a blocking record generator: each record is produced in the threadpool
+    under _watch_cancellable. A stream cut short by the deadline ends with a PackingStreamError
+    record; one whose client left just ends.
+    """
+    deadline = _pack_deadline()
+    finished = False
+    try:
+        while not finished:
+            task = asyncio.ensure_future(run_in_threadpool(next, records, None))
+            await _watch_cancellable(raw_request.is_disconnected, cancel, task, deadline)
+            record = task.result()
+            finished = record is None
+            if not finished:
+                yield record
+    except PackCancelled as e:
+        _record_cancelled(cancel)
+        if e.reason != "client disconnected":
+            yield PackingStreamError(detail=str(e)).model_dump_json() + "\n"
+        return
+    finally:
+        # Torn down before the summary (the response could not be sent): stop the packer too
+        if not finished:
+            cancel.cancel("client disconnected")
+
+    metrics.incr("pack_completed_total")
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the body generator. The stock one listens for
+    the disconnect on `receive` while streaming, which would swallow the request body of an
+    endpoint answering a request stream as it arrives; here a disconnect surfaces as
+    ClientDisconnect from `Request.stream()` and ends the generator instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Non-empty lines of an NDJSON body, each yielded as soon as its newline (or the end) arrives;
+    # left undecoded, so a line that is not UTF-8 gets its own error record
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
 @router.get("/")
 def root():
     return {"Hello": "World"}
 
+def _resolve_skus(request: SkuLoad) -> SkuLoad:
+    # Fills `skus` entries from the catalogue; an unknown SKU is the caller's error
+    try:
+        return catalogue.resolve(request)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @router.get("/health")
 def health_check():
     return {"status": "ok"}
 
-@router.post("/pack", response_model=PackingResponse)
-def pack_truck(request: PackingRequest):
+@router.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
+@router.post("/pack", response_model=PackingResponse, responses={200: {"content": {LAYOUT_MEDIA_TYPE: {}}}})
+async def pack_truck(request: PackingRequest, raw_request: Request):
+    metrics.incr("pack_requests_total")
+    request = _resolve_skus(request)
+    cancel = CancelToken()
     try:
-        return run_packing(request)
+        result = await _run_cancellable(raw_request, cancel, pack_request, request, cancel)
+        # Encoded straight from the packer's records; response_model only documents the JSON
+        if wants_layout_binary(raw_request.headers.get("accept")):
+            metrics.incr("pack_binary_responses_total")
+            return Response(encode_layout(result), media_type=LAYOUT_MEDIA_TYPE, headers=VARY_ACCEPT)
+        return Response(encode_json(result), media_type="application/json", headers=VARY_ACCEPT)
+    except PackCancelled as e:
+        if e.reason == "client disconnected":
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/pack/fleet", response_model=FleetPackingResponse)
+async def pack_fleet(request: FleetPackingRequest, raw_request: Request):
+    metrics.incr("pack_fleet_requests_total")
+    request = _resolve_skus(request)
+    cancel = CancelToken()
+    try:
+        return await _run_cancellable(raw_request, cancel, run_fleet_packing, request, cancel)
+    except PackCancelled as e:
+        if e.reason == "client disconnected":
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/pack/select", response_model=TruckSelectionResponse)
+async def pack_select(request: TruckSelectionRequest, raw_request: Request):
+    metrics.incr("pack_select_requests_total")
+    request = _resolve_skus(request)
+    cancel = CancelToken()
+    try:
+        return await _run_cancellable(raw_request, cancel, run_truck_selection, request, cancel)
+    except PackCancelled as e:
+        if e.reason == "client disconnected":
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/pack/repack", response_model=RepackResponse)
+async def pack_repack(request: RepackRequest, raw_request: Request):
+    metrics.incr("pack_repack_requests_total")
+    cancel = CancelToken()
+    try:
+        return await _run_cancellable(raw_request, cancel, run_repack, request, cancel)
+    except PackCancelled as e:
+        if e.reason == "client disconnected":
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        # Pinned placements the truck cannot hold as given
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/pack/stream")
+async def pack_truck_stream(request: PackingRequest, raw_request: Request):
+    metrics.incr("pack_stream_requests_total")
+    if request.pallet is not None:
+        raise HTTPException(status_code=422, detail="pallet packing is not streamed; use /pack")
+    if request.mode not in STREAM_MODES:
+        raise HTTPException(status_code=422, detail=f"mode {request.mode!r} is not streamed; use /pack")
+    if request.quality not in STREAM_QUALITY_TIERS:
+        raise HTTPException(status_code=422, detail=f"quality {request.quality!r} is not streamed; use /pack")
+    cancel = CancelToken()
+    records = _stream_cancellable(raw_request, cancel, stream_packing(_resolve_skus(request), cancel))
+    # The body was read when the request was parsed; disconnects are polled by _stream_cancellable
+    return DuplexStreamingResponse(records, media_type="application/x-ndjson")
+
+@router.post("/pack/online")
+async def pack_truck_online(raw_request: Request):
+    metrics.incr("pack_online_requests_total")
+    lines = _ndjson_lines(raw_request.stream())
+    try:
+        header = OnlinePackingHeader.model_validate_json(await anext(lines))
+    except StopAsyncIteration:
+        raise HTTPException(status_code=422, detail="missing header line")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    session = OnlinePackingSession(header)
+
+    async def records() -> AsyncIterator[str]:
+        async for line in lines:
+            yield await run_in_threadpool(session.step, line)
+        yield await run_in_threadpool(session.finish)
+
+    return DuplexStreamingResponse(records(), media_type="application/x-ndjson")
+
+async def _read_session_messages(websocket: WebSocket, inbox: "asyncio.Queue[Optional[str]]") -> None:
+    # Reads ahead of the replies, so a disconnect is seen while a message is being answered
+    try:
+        while True:
+            inbox.put_nowait(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        inbox.put_nowait(None)
+
+@router.websocket("/pack/session")
+async def pack_session(websocket: WebSocket):
+    metrics.incr("pack_session_connections_total")
+    await websocket.accept()
+    inbox: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+    reader = asyncio.ensure_future(_read_session_messages(websocket, inbox))
+
+    async def disconnected() -> bool:
+        return reader.done()
+
+    session_id = None
+    try:
+        # On disconnect the session stays in the store until it expires, so the client can resume it
+        while (text := await inbox.get()) is not None:
+            metrics.incr("pack_session_messages_total")
+            # Packing messages (open, repack, edit) stop on disconnect or pack_deadline_ms like /pack
+            cancel = CancelToken()
+            task = asyncio.ensure_future(
+                run_in_threadpool(handle_session_message, sessions, session_id, text, catalogue, cancel)
+            )
+            await _watch_cancellable(disconnected, cancel, task, _pack_deadline())
+            session_id, reply = task.result()
+            if cancel.cancelled and isinstance(reply, SessionError):
+                _record_cancelled(cancel)
+            if reader.done():
+                return
+            await websocket.send_text(reply.model_dump_json())
+            if isinstance(reply, SessionClosed):
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        return
+    finally:
+        reader.cancel()
+
+@router.put("/catalogue/skus", response_model=CatalogueSummary)
+def put_catalogue_skus(skus: List[CatalogueSku]):
+    metrics.incr("catalogue_updates_total")
+    try:
+        count = catalogue.register(skus)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return CatalogueSummary(registered=len(skus), count=count)
+
+@router.get("/catalogue/skus", response_model=List[CatalogueSku])
+def get_catalogue_skus():
+    return catalogue.all()
+
+@router.delete("/catalogue/skus/{sku}", status_code=204)
+def delete_catalogue_sku(sku: str):
+    if not catalogue.remove(sku):
+        raise HTTPException(status_code=404, detail=f"unknown SKU {sku!r}")
+    return Response(status_code=204)
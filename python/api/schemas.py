@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
 class Box(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -21,9 +21,148 @@ class Truck(BaseModel):
     depth: float
     max_weight: Optional[float] = None
 
-class PackingRequest(BaseModel):
+# Boxes one request may expand from `skus` entries
+MAX_SKU_BOXES = 100_000
+
+class CatalogueSku(BaseModel):
+    # A SKU registered with PUT /catalogue/skus and referenced by code from `skus` entries
+    sku: str = Field(min_length=1)
+    width: float = Field(gt=0)
+    height: float = Field(gt=0)
+    depth: float = Field(gt=0)
+    weight: float = Field(ge=0)
+    rotatable: bool = True
+    priority: Optional[float] = 0.0
+
+class CatalogueSummary(BaseModel):
+    registered: int
+    count: int
+
+class SkuEntry(BaseModel):
+    # `quantity` identical boxes with ids `{id_prefix}{n}`, n = 1..quantity zero-padded to the
+    # digits of quantity. Fields left out come from the catalogue SKU `sku`
+    sku: str = Field(min_length=1)
+    quantity: int = Field(ge=1, le=MAX_SKU_BOXES)
+    id_prefix: Optional[str] = None # defaults to `sku`
+    width: Optional[float] = Field(default=None, gt=0)
+    height: Optional[float] = Field(default=None, gt=0)
+    depth: Optional[float] = Field(default=None, gt=0)
+    weight: Optional[float] = Field(default=None, ge=0)
+    rotatable: Optional[bool] = None
+    priority: Optional[float] = None
+
+    @property
+    def prefix(self) -> str:
+        return self.sku if self.id_prefix is None else self.id_prefix
+
+    @property
+    def sized(self) -> bool:
+        return None not in (self.width, self.height, self.depth, self.weight)
+
+    def box_ids(self) -> List[str]:
+        digits = len(str(self.quantity))
+        return [f"{self.prefix}{n:0{digits}d}" for n in range(1, self.quantity + 1)]
+
+    def generates(self, box_id: str) -> bool:
+        # Whether `box_id` is one of box_ids(), without building them
+        number = box_id[len(self.prefix):]
+        if not box_id.startswith(self.prefix) or len(number) != len(str(self.quantity)):
+            return False
+        return number.isascii() and number.isdigit() and 1 <= int(number) <= self.quantity
+
+class SkuLoad(BaseModel):
+    # A load given box by box, as SKU entries with quantities, or both
+    boxes: List[Box] = []
+    skus: List[SkuEntry] = []
+
+    @model_validator(mode="after")
+    def _load_given(self) -> "SkuLoad":
+        if not {"boxes", "skus"} & self.model_fields_set:
+            raise ValueError("a load needs boxes, skus or both")
+        if sum(entry.quantity for entry in self.skus) > MAX_SKU_BOXES:
+            raise ValueError(f"skus expand to more than {MAX_SKU_BOXES} boxes")
+        # Sorted, a prefix is followed by the prefixes it starts; distinct ones never generate the same id
+        prefixes = sorted(entry.prefix for entry in self.skus)
+        for a, b in zip(prefixes, prefixes[1:]):
+            if b.startswith(a):
+                raise ValueError(f"sku id prefixes {a!r} and {b!r} overlap")
+        # A box id can only be generated by the entry whose prefix it starts with
+        by_prefix = {entry.prefix: entry for entry in self.skus}
+        for box in self.boxes if by_prefix else []:
+            for end in range(len(box.id) + 1):
+                entry = by_prefix.get(box.id[:end])
+                if entry is not None and entry.generates(box.id):
+                    raise ValueError(f"box id {box.id!r} is also generated by sku {entry.sku!r}")
+        return self
+
+class PackingOptions(BaseModel):
+    time_budget_ms: Optional[float] = Field(default=None, gt=0)
+    quality: Literal["draft", "balanced", "thorough"] = "balanced"
+    selector: Literal["trials", "predict", "race"] = "trials"
+    mode: Literal["auto", "regional", "restart", "beam", "exact", "partitioned"] = "auto"
+    workers: Optional[int] = Field(default=None, ge=1)
+    beam_width: int = Field(default=4, ge=1)
+    target_gap: float = Field(default=0.0, ge=0, lt=1)
+    geometry: Literal["float", "integer"] = "float"
+    unit_scale: int = Field(default=1000, ge=1)
+    engine: Literal["regions", "extreme_points", "heightmap", "walls"] = "regions"
+    heightmap_resolution: float = Field(default=0.05, gt=0)
+
+    @model_validator(mode="after")
+    def _engine_supports_mode(self) -> "PackingOptions":
+        if self.engine != "regions" and self.mode not in ("auto", "regional"):
+            raise ValueError(f"mode {self.mode!r} requires engine 'regions'")
+        return self
+
+class Pallet(BaseModel):
+    # Defaults: EUR pallet (1.2 x 0.8 m, 0.144 m deck, 25 kg), loaded to 1.8 m
+    width: float = Field(default=1.2, gt=0)
+    depth: float = Field(default=0.8, gt=0)
+    max_height: float = Field(default=1.8, gt=0) # loaded height, deck included
+    base_height: float = Field(default=0.144, ge=0)
+    weight: float = Field(default=25.0, ge=0)
+    max_weight: Optional[float] = Field(default=None, gt=0) # load on one pallet, deck excluded
+
+    @model_validator(mode="after")
+    def _room_above_deck(self) -> "Pallet":
+        if self.max_height <= self.base_height:
+            raise ValueError("pallet max_height must exceed base_height")
+        return self
+
+class PackingRequest(PackingOptions, SkuLoad):
     truck: Truck
-    boxes: List[Box]
+    pallet: Optional[Pallet] = None
+
+def _check_unique_truck_ids(trucks: List[Truck]) -> None:
+    ids = [truck.id for truck in trucks]
+    if len(set(ids)) != len(ids):
+        raise ValueError("truck ids must be unique")
+
+class FleetPackingRequest(PackingOptions, SkuLoad):
+    trucks: List[Truck] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def _unique_truck_ids(self) -> "FleetPackingRequest":
+        _check_unique_truck_ids(self.trucks)
+        return self
+
+class CatalogueTruck(Truck):
+    cost: float = Field(ge=0)
+
+class TruckSelectionRequest(PackingOptions, SkuLoad):
+    trucks: List[CatalogueTruck] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def _unique_truck_ids(self) -> "TruckSelectionRequest":
+        _check_unique_truck_ids(self.trucks)
+        return self
+
+class OnlinePackingHeader(BaseModel):
+    # First line of a /pack/online stream; every later line is one box or a JSON list of boxes
+    truck: Truck
+    open_trucks: int = Field(default=1, ge=1, le=8)
+    geometry: Literal["float", "integer"] = "float"
+    unit_scale: int = Field(default=1000, ge=1)
 
 class PlacedBox(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -32,7 +171,103 @@ class PlacedBox(BaseModel):
     x: float
     y: float
     z: float
-    rotation: int # Y-axis only: 0 - not rotated, 1 - rotated
+    rotation: int # 0-5, see vtl_core/orientations.py: 0 - as given, 1 - turned about Y, 2-5 - on its side/back
+
+class RepackRequest(BaseModel):
+    truck: Truck
+    boxes: List[Box] # every box of the current layout, placed or not
+    placed: List[PlacedBox] # the current layout
+    add: List[Box] = []
+    remove: List[str] = []
+    pinned: List[PlacedBox] = [] # boxes put in place by hand, from `boxes` or `add`; kept exactly there
+
+    @model_validator(mode="after")
+    def _consistent_ids(self) -> "RepackRequest":
+        ids = [box.id for box in self.boxes + self.add]
+        if len(set(ids)) != len(ids):
+            raise ValueError("box ids must be unique across boxes and add")
+        known = set(ids)
+        layout = set(box.id for box in self.boxes)
+        for name, refs, scope in (
+            ("placed", [pb.id for pb in self.placed], layout),
+            ("remove", self.remove, layout),
+            ("pinned", [pb.id for pb in self.pinned], known),
+        ):
+            if len(set(refs)) != len(refs):
+                raise ValueError(f"{name} ids must be unique")
+            if not set(refs) <= scope:
+                raise ValueError(f"{name} names unknown boxes: {sorted(set(refs) - scope)}")
+        if set(self.remove) & set(pb.id for pb in self.pinned):
+            raise ValueError("a box cannot be both removed and pinned")
+        return self
+
+class SessionOpen(PackingRequest):
+    # Opens a /pack/session session; with `placed`, adopts that layout instead of packing
+    type: Literal["open"]
+    placed: Optional[List[PlacedBox]] = None
+
+    @model_validator(mode="after")
+    def _placed_boxes_known(self) -> "SessionOpen":
+        if self.pallet is not None:
+            raise ValueError("pallet packing has no session; use /pack")
+        ids = [box.id for box in self.boxes] + [i for entry in self.skus for i in entry.box_ids()]
+        if len(set(ids)) != len(ids):
+            raise ValueError("box ids must be unique")
+        placed = [pb.id for pb in self.placed or []]
+        if len(set(placed)) != len(placed) or not set(placed) <= set(ids):
+            raise ValueError("placed must name distinct boxes of the session")
+        return self
+
+class SessionResume(BaseModel):
+    type: Literal["resume"]
+    session: str
+
+class SessionEdit(BaseModel):
+    type: Literal["edit"]
+    add: List[Box] = []
+    remove: List[str] = []
+    pinned: List[PlacedBox] = []
+
+class SessionRepack(BaseModel):
+    type: Literal["repack"]
+
+class SessionConfigure(BaseModel):
+    type: Literal["configure"]
+    options: Dict[str, Any] # PackingOptions fields to change
+
+class SessionClose(BaseModel):
+    type: Literal["close"]
+
+SessionMessage = Annotated[
+    Union[SessionOpen, SessionResume, SessionEdit, SessionRepack, SessionConfigure, SessionClose],
+    Field(discriminator="type"),
+]
+
+class SearchStats(BaseModel):
+    mode: str
+    best_score: float
+    # restart search
+    workers: Optional[int] = None
+    packings: Optional[int] = None
+    packings_per_second: Optional[float] = None
+    initial_score: Optional[float] = None
+    # beam search
+    beam_width: Optional[int] = None
+    expansions: Optional[int] = None
+    expansions_per_second: Optional[float] = None
+    # exact
+    status: Optional[str] = None
+    proven_optimal: Optional[bool] = None
+    # partitioned
+    siblings: Optional[int] = None
+
+class LoadedPallet(BaseModel):
+    id: str
+    width: float
+    height: float
+    depth: float
+    weight: float
+    placed: List[PlacedBox] # relative to the pallet's corner on the floor
 
 class PackingResponse(BaseModel):
     placed: Optional[List[PlacedBox]]
@@ -40,3 +275,126 @@ class PackingResponse(BaseModel):
     utilization: float
     runtime_ms: float
     notes: List[str]
+    truncated: bool = False
+    search: Optional[SearchStats] = None
+    gap: Optional[float] = None
+    pallets: Optional[List[LoadedPallet]] = None
+
+class RepackResponse(BaseModel):
+    changed: List[PlacedBox] # new and moved placements; every other placement is unchanged
+    removed: List[str] # ids that had a placement and no longer do
+    unplaced: List[Box]
+    unchanged_count: int
+    utilization: float
+    runtime_ms: float
+    notes: List[str]
+
+class PackingRegionChunk(BaseModel):
+    type: Literal["region"] = "region"
+    region: int
+    heuristic: str
+    placed: List[PlacedBox]
+
+class PackingSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    placed_count: int
+    unplaced: List[Box]
+    utilization: float
+    stability: float
+    mass_balance: float
+    total_score: float
+    runtime_ms: float
+    truncated: bool = False
+
+class PackingStreamError(BaseModel):
+    # Last record of a /pack/stream response cut short, in place of the summary
+    type: Literal["error"] = "error"
+    detail: str
+
+class TruckLayout(BaseModel):
+    truck_id: str
+    placed: List[PlacedBox]
+    utilization: float
+    notes: List[str]
+    truncated: bool = False
+    search: Optional[SearchStats] = None
+    gap: Optional[float] = None
+
+class FleetPackingResponse(BaseModel):
+    trucks: List[TruckLayout]
+    unplaced: List[Box]
+    utilization: float
+    runtime_ms: float
+    notes: List[str]
+    truncated: bool = False
+
+class TruckCandidate(BaseModel):
+    truck_id: str
+    cost: float
+    status: Literal["pruned", "fits", "does_not_fit", "skipped"]
+    placed_count: Optional[int] = None
+    utilization: Optional[float] = None
+
+class TruckSelectionResponse(BaseModel):
+    truck_id: Optional[str]
+    cost: Optional[float]
+    fits: bool
+    placed: List[PlacedBox]
+    unplaced: List[Box]
+    utilization: float
+    runtime_ms: float
+    notes: List[str]
+    truncated: bool = False
+    search: Optional[SearchStats] = None
+    gap: Optional[float] = None
+    candidates: List[TruckCandidate]
+
+class OnlinePlacedBox(PlacedBox):
+    truck: int # index of the truck in the order trucks were opened
+
+class ClosedTruckSummary(BaseModel):
+    truck: int
+    box_count: int
+    utilization: float
+    weight: float
+
+class OnlineStepChunk(BaseModel):
+    type: Literal["step"] = "step"
+    line: int # arrival line the step answers, the header being line 0
+    placed: List[OnlinePlacedBox]
+    rejected: List[Box]
+    closed: List[ClosedTruckSummary]
+
+class OnlineErrorChunk(BaseModel):
+    type: Literal["error"] = "error"
+    line: int
+    detail: str
+
+class OnlinePackingSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    trucks: int
+    placed_count: int
+    rejected_count: int
+    utilization: float
+    runtime_ms: float
+
+class SessionLayout(PackingResponse):
+    type: Literal["layout"] = "layout"
+    session: str
+
+class SessionDiff(RepackResponse):
+    type: Literal["diff"] = "diff"
+    session: str
+
+class SessionConfigured(BaseModel):
+    type: Literal["configured"] = "configured"
+    session: str
+    options: PackingOptions
+
+class SessionClosed(BaseModel):
+    type: Literal["closed"] = "closed"
+    session: str
+
+class SessionError(BaseModel):
+    type: Literal["error"] = "error"
+    detail: str
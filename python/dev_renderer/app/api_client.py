@@ -1,7 +1,13 @@
 import requests
 
-def fetch_packing_result(api_url: str, payload: dict) -> dict:
-        response = requests.post(api_url, json=payload, timeout=10)
+from utils.layout_decoder import LAYOUT_MEDIA_TYPE, decode_layout
+
+def fetch_packing_result(api_url: str, payload: dict, binary: bool = True) -> dict:
+        # The binary layout is smaller and faster to decode for large loads; JSON stays the fallback
+        headers = {"Accept": f"{LAYOUT_MEDIA_TYPE}, application/json;q=0.5"} if binary else {}
+        response = requests.post(api_url, json=payload, headers=headers, timeout=10)
         # print(response.text)
         response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        if response.headers.get("content-type", "").startswith(LAYOUT_MEDIA_TYPE):
+            return decode_layout(response.content)
+        return response.json()
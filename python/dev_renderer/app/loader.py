@@ -2,6 +2,17 @@ from panda3d.core import NodePath, TransparencyAttrib
 from scene.primitives import create_box, create_box_outline
 import utils.helpers as BoxUtils
 
+# Response rotation code -> which spec dimension (width, height, depth) becomes the placed
+# (width, height, depth). Mirrors ROTATIONS in vtl_core/orientations.py.
+ROTATIONS = (
+    ("width", "height", "depth"),
+    ("depth", "height", "width"),
+    ("height", "width", "depth"),
+    ("depth", "width", "height"),
+    ("width", "depth", "height"),
+    ("height", "depth", "width"),
+)
+
 def spawn_truck(render, truck_data):
 
     eps = 0.05
@@ -47,16 +58,8 @@ def spawn_box(render, box_data, box_specs):
     y: float
     z: float
 
-    # Swap width/depth if box is rotated
-    if (box_data["rotation"]):
-        width = box_specs["depth"]
-        depth = box_specs["width"]
-
-    else:
-        width = box_specs["width"]
-        depth = box_specs["depth"]
-
-    height = box_specs["height"]
+    # Placed extents of the box in its response orientation
+    width, height, depth = (box_specs[key] for key in ROTATIONS[box_data["rotation"]])
 
     x = box_data["x"] + width / 2
     y = box_data["y"] + height / 2
@@ -0,0 +1,71 @@
+import json
+import struct
+
+import numpy as np
+
+# Binary layout of POST /pack, see python/api/encoding.py for the format
+LAYOUT_MEDIA_TYPE = "application/vnd.vtl.layout"
+LAYOUT_MAGIC = b"VTLL"
+LAYOUT_VERSION = 1
+LAYOUT_HEADER = struct.Struct("<4sHHIII")
+FLAG_PLACED_NONE = 1
+FLAG_UNPLACED_NONE = 2
+
+
+def _aligned(offset: int) -> int:
+    return offset + (-offset % 4)
+
+
+def decode_layout(data: bytes, columns: bool = False) -> dict:
+    """
+    Decodes a binary layout into the dict the JSON response parses to. With `columns`,
+    `placed` and `unplaced` are dicts of numpy arrays (ids as a list) instead of lists of
+    dicts, which skips building one dict per box.
+    """
+    magic, version, flags, meta_len, n, m = LAYOUT_HEADER.unpack_from(data)
+    if magic != LAYOUT_MAGIC or version != LAYOUT_VERSION:
+        raise ValueError(f"not a version {LAYOUT_VERSION} binary layout")
+
+    pos = LAYOUT_HEADER.size
+    result = json.loads(bytes(data[pos:pos + meta_len]))
+    pos += meta_len
+
+    offsets = np.frombuffer(data, dtype="<u4", count=n + m + 1, offset=pos)
+    pos += offsets.nbytes
+    blob = bytes(data[pos:pos + int(offsets[-1])])
+    bounds = offsets.tolist()
+    ids = [blob[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+    pos = _aligned(pos + len(blob))
+
+    positions = np.frombuffer(data, dtype="<f4", count=3 * n, offset=pos).reshape(3, n)
+    pos += positions.nbytes
+    rotations = np.frombuffer(data, dtype="u1", count=n, offset=pos)
+    pos = _aligned(pos + n)
+    sizes = np.frombuffer(data, dtype="<f4", count=5 * m, offset=pos).reshape(5, m)
+    pos += sizes.nbytes
+    rotatable = np.frombuffer(data, dtype="u1", count=m, offset=pos)
+
+    if columns:
+        placed = {"id": ids[:n], "x": positions[0], "y": positions[1], "z": positions[2], "rotation": rotations}
+        unplaced = {
+            "id": ids[n:], "width": sizes[0], "height": sizes[1], "depth": sizes[2], "weight": sizes[3],
+            "priority": sizes[4], "rotatable": rotatable.astype(bool),
+        }
+    else:
+        x, y, z = positions.tolist()
+        placed = [
+            {"id": i, "x": a, "y": b, "z": c, "rotation": r}
+            for i, a, b, c, r in zip(ids[:n], x, y, z, rotations.tolist())
+        ]
+        width, height, depth, weight, priority = sizes.tolist()
+        unplaced = [
+            {
+                "id": i, "width": w, "height": h, "depth": d, "weight": kg,
+                "rotatable": bool(r), "priority": None if p != p else p,
+            }
+            for i, w, h, d, kg, p, r in zip(ids[n:], width, height, depth, weight, priority, rotatable.tolist())
+        ]
+
+    result["placed"] = None if flags & FLAG_PLACED_NONE else placed
+    result["unplaced"] = None if flags & FLAG_UNPLACED_NONE else unplaced
+    return result
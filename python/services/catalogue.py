@@ -0,0 +1,63 @@
+import threading
+from typing import Dict, List, Optional, TypeVar
+
+from python.api.schemas import CatalogueSku, SkuLoad
+
+Load = TypeVar("Load", bound=SkuLoad)
+
+
+class SkuCatalogue:
+    """
+    SKUs registered by code, shared by every request of this process, so a request's `skus`
+    entries can name a SKU and a quantity instead of repeating its size. At most `max_count`
+    SKUs are kept; registering past that is refused rather than dropping SKUs callers rely on.
+    """
+
+    def __init__(self, max_count: int):
+        self.max_count = max_count
+        self._skus: Dict[str, CatalogueSku] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._skus)
+
+    def register(self, skus: List[CatalogueSku]) -> int:
+        """
+        Adds or replaces `skus`, all or none. Raises ValueError when the catalogue would exceed
+        `max_count`.
+        """
+        with self._lock:
+            new = {sku.sku for sku in skus} - set(self._skus)
+            if len(self._skus) + len(new) > self.max_count:
+                raise ValueError(f"the catalogue holds at most {self.max_count} SKUs")
+            self._skus.update((sku.sku, sku) for sku in skus)
+            return len(self._skus)
+
+    def get(self, sku: str) -> Optional[CatalogueSku]:
+        return self._skus.get(sku)
+
+    def all(self) -> List[CatalogueSku]:
+        with self._lock:
+            return list(self._skus.values())
+
+    def remove(self, sku: str) -> bool:
+        with self._lock:
+            return self._skus.pop(sku, None) is not None
+
+    def resolve(self, req: Load) -> Load:
+        """
+        `req` with every field its `skus` entries leave out taken from the catalogue SKU they
+        name; entries that give their whole size need no catalogue SKU. Raises ValueError for an
+        entry without a size whose SKU is not registered. Costs one lookup per entry, not per box.
+        """
+        entries = []
+        for entry in req.skus:
+            known = self._skus.get(entry.sku)
+            if known is None:
+                if not entry.sized:
+                    raise ValueError(f"unknown SKU {entry.sku!r}; register it with PUT /catalogue/skus or give its size")
+                entries.append(entry)
+                continue
+            missing = {name: getattr(known, name) for name in CatalogueSku.model_fields if getattr(entry, name, "") is None}
+            entries.append(entry.model_copy(update=missing) if missing else entry)
+        return req.model_copy(update={"skus": entries}) if req.skus else req
@@ -1,21 +1,66 @@
 import time
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-from python.api.schemas import PackingRequest, PackingResponse
+from pydantic import TypeAdapter, ValidationError
+
+from python.api.schemas import (
+    Box, ClosedTruckSummary, FleetPackingRequest, FleetPackingResponse, OnlineErrorChunk, OnlinePackingHeader,
+    OnlinePackingSummary, OnlinePlacedBox, OnlineStepChunk, PackingRequest, PackingResponse, PackingSummary,
+    RepackRequest, RepackResponse, SearchStats, TruckSelectionRequest, TruckSelectionResponse,
+)
+from python.vtl_core.domain.models import OnlineStep
+from python.vtl_core.geometry import restore_boxes, restore_placement
 from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.fleet import fleet_pack, select_truck
+from python.vtl_core.packing.incremental import repack
+from python.vtl_core.packing.online import OnlinePacker
+from python.vtl_core.packing.pallets import pallet_pack
+from python.vtl_core.packing.control import CancelToken
+
+def pack_request(req: PackingRequest, cancel: Optional[CancelToken] = None) -> Dict[str, Any]:
+    """
+    run_packing without the response model: the PackingResponse fields, with the packer's own
+    placement and box records where no pallet is involved, ready for python/api/encoding.py.
+    """
 
-def run_packing(req: PackingRequest) -> PackingResponse:
-    
     # Start runtime timer
     start = time.time()
 
     # Instantiate data models for packing
-    (truck, unplaced_objs) = Proc.create_instances(req)
+    (truck, unplaced_objs, originals) = Proc.create_packing_instances(req)
 
     # Sort by descending height
     unplaced_objs.sort(key=lambda box: box.height, reverse=True)
 
-    # Run packing sequence
-    pack_result = Proc.begin_pack(truck, unplaced_objs)
+    # Run packing sequence, palletizing first when the request brings a pallet
+    options = dict(
+        time_budget_ms=req.time_budget_ms,
+        cancel=cancel,
+        quality=req.quality,
+        selector=req.selector,
+        mode=req.mode,
+        workers=req.workers,
+        beam_width=req.beam_width,
+        target_gap=req.target_gap,
+        unit_scale=req.unit_scale if req.geometry == "integer" else None,
+        engine=req.engine,
+        resolution=req.heightmap_resolution,
+    )
+    if req.pallet is not None:
+        (pallet, base_height) = Proc.create_pallet_instance(req)
+        footprint = (req.pallet.width, req.pallet.depth)
+        pack_result = pallet_pack(truck, unplaced_objs, pallet, base_height, req.pallet.weight, footprint, **options)
+    else:
+        pack_result = Proc.begin_pack_internal(truck, unplaced_objs, **options)
+        pack_result["pallets"] = None
+
+    # Unplaced boxes go back as the client sent them, not as their integer copies
+    if originals is not None:
+        pack_result["unplaced"] = restore_boxes(pack_result["unplaced"], originals)
+
+    # One small model, so the stats keep every field of SearchStats, null or not
+    if pack_result["search"] is not None:
+        pack_result["search"] = SearchStats.model_validate(pack_result["search"])
 
     # Record runtime
     pack_result["runtime_ms"] = (time.time() - start) * 1000
@@ -23,4 +68,170 @@ def run_packing(req: PackingRequest) -> PackingResponse:
     for note in pack_result["notes"]:
         print(note)
 
-    return PackingResponse(**pack_result)
+    return pack_result
+
+def run_packing(req: PackingRequest, cancel: Optional[CancelToken] = None) -> PackingResponse:
+    return PackingResponse.model_validate(pack_request(req, cancel), from_attributes=True)
+
+def run_fleet_packing(req: FleetPackingRequest, cancel: Optional[CancelToken] = None) -> FleetPackingResponse:
+
+    # Instantiate data models for packing, one truck per fleet entry
+    (trucks, unplaced_objs, originals) = Proc.create_fleet_instances(req)
+
+    # Sort by descending height
+    unplaced_objs.sort(key=lambda box: box.height, reverse=True)
+
+    # Distribute the load across the fleet and pack the trucks
+    fleet_result = fleet_pack(
+        trucks,
+        unplaced_objs,
+        workers=req.workers,
+        time_budget_ms=req.time_budget_ms,
+        cancel=cancel,
+        unit_scale=req.unit_scale if req.geometry == "integer" else None,
+        quality=req.quality,
+        selector=req.selector,
+        mode=req.mode,
+        beam_width=req.beam_width,
+        target_gap=req.target_gap,
+        engine=req.engine,
+        resolution=req.heightmap_resolution,
+    )
+
+    if originals is not None:
+        fleet_result["unplaced"] = restore_boxes(fleet_result["unplaced"], originals)
+
+    for note in fleet_result["notes"]:
+        print(note)
+
+    return FleetPackingResponse(**fleet_result)
+
+def run_truck_selection(req: TruckSelectionRequest, cancel: Optional[CancelToken] = None) -> TruckSelectionResponse:
+
+    # Instantiate data models for packing, one truck per catalogue entry
+    (trucks, unplaced_objs, originals) = Proc.create_fleet_instances(req)
+
+    # Sort by descending height
+    unplaced_objs.sort(key=lambda box: box.height, reverse=True)
+
+    # Pick the cheapest truck that takes the whole load
+    selection = select_truck(
+        trucks,
+        [truck.cost for truck in req.trucks],
+        unplaced_objs,
+        workers=req.workers,
+        time_budget_ms=req.time_budget_ms,
+        cancel=cancel,
+        unit_scale=req.unit_scale if req.geometry == "integer" else None,
+        quality=req.quality,
+        selector=req.selector,
+        mode=req.mode,
+        beam_width=req.beam_width,
+        target_gap=req.target_gap,
+        engine=req.engine,
+        resolution=req.heightmap_resolution,
+    )
+
+    if originals is not None:
+        selection["unplaced"] = restore_boxes(selection["unplaced"], originals)
+
+    for note in selection["notes"]:
+        print(note)
+
+    return TruckSelectionResponse(**selection)
+
+def run_repack(req: RepackRequest, cancel: Optional[CancelToken] = None) -> RepackResponse:
+
+    # Start runtime timer
+    start = time.time()
+
+    # Instantiate the layout and the edits
+    (truck, boxes, placed, add, pinned) = Proc.create_repack_instances(req)
+
+    # Apply the edits, packing only the boxes they displace or bring in
+    diff = repack(truck, boxes, placed, add=add, remove=req.remove, pinned=pinned, cancel=cancel)
+    diff["runtime_ms"] = (time.time() - start) * 1000
+
+    for note in diff["notes"]:
+        print(note)
+
+    return RepackResponse(**diff)
+
+def stream_packing(req: PackingRequest, cancel: Optional[CancelToken] = None) -> Iterator[str]:
+
+    # Instantiate data models for packing
+    (truck, unplaced_objs, originals) = Proc.create_packing_instances(req)
+
+    # Sort by descending height
+    unplaced_objs.sort(key=lambda box: box.height, reverse=True)
+
+    # Emit one NDJSON line per committed region, then the summary record
+    unit_scale = req.unit_scale if req.geometry == "integer" else None
+    records = Proc.stream_pack(
+        truck, unplaced_objs, time_budget_ms=req.time_budget_ms, unit_scale=unit_scale, engine=req.engine,
+        resolution=req.heightmap_resolution, workers=req.workers, cancel=cancel, quality=req.quality,
+        selector=req.selector, target_gap=req.target_gap,
+    )
+    for record in records:
+        if originals is not None and isinstance(record, PackingSummary):
+            record.unplaced = [Box.model_validate(b) for b in restore_boxes(record.unplaced, originals)]
+        yield record.model_dump_json() + "\n"
+
+# One arrival line of a /pack/online stream
+ARRIVAL = TypeAdapter(Union[Box, List[Box]])
+
+class OnlinePackingSession:
+    """
+    State of one /pack/online stream: an OnlinePacker and a line counter. Each arrival line is
+    answered by one NDJSON record, a step or an error for a line that is not a box or a list of
+    boxes; the stream goes on after an error.
+    """
+
+    def __init__(self, header: OnlinePackingHeader):
+        self.header = header
+        self.unit_scale = header.unit_scale if header.geometry == "integer" else None
+        self.truck = Proc.create_online_truck(header)
+        self.packer = OnlinePacker(self.truck, header.open_trucks)
+        self.line = 0
+        self.start = time.time()
+
+    def _record(self, step: OnlineStep, arrivals: Optional[Dict[str, Box]] = None) -> str:
+        # Rejected boxes are echoed from the arrival line, never from their integer copies
+        scale = self.unit_scale
+        placed = [(index, pb if scale is None else restore_placement(pb, scale)) for index, pb in step.placed]
+        record = OnlineStepChunk(
+            line=self.line,
+            placed=[OnlinePlacedBox(truck=index, id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=pb.rotation) for index, pb in placed],
+            rejected=restore_boxes(step.rejected, arrivals or {}),
+            closed=[
+                ClosedTruckSummary(
+                    truck=c.index, box_count=c.box_count, utilization=c.volume / self.truck.volume, weight=c.weight,
+                )
+                for c in step.closed
+            ],
+        )
+        return record.model_dump_json() + "\n"
+
+    def step(self, line: bytes) -> str:
+        self.line += 1
+        try:
+            boxes = ARRIVAL.validate_json(line.decode())
+        except UnicodeDecodeError as e:
+            return OnlineErrorChunk(line=self.line, detail=f"line is not valid UTF-8: {e}").model_dump_json() + "\n"
+        except ValidationError as e:
+            return OnlineErrorChunk(line=self.line, detail=str(e)).model_dump_json() + "\n"
+        boxes = [boxes] if isinstance(boxes, Box) else boxes
+        arrival = Proc.create_arrival_instances(self.header, boxes)
+        return self._record(self.packer.add(arrival), {box.id: box for box in boxes})
+
+    def finish(self) -> str:
+        # Closes the trucks still open, then the summary record
+        closing = self._record(self.packer.close())
+        summary = OnlinePackingSummary(
+            trucks=self.packer.trucks_opened,
+            placed_count=self.packer.placed_count,
+            rejected_count=self.packer.rejected_count,
+            utilization=self.packer.utilization,
+            runtime_ms=(time.time() - self.start) * 1000,
+        )
+        return closing + summary.model_dump_json() + "\n"
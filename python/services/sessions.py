@@ -0,0 +1,218 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from python.api.schemas import (
+    Box, PackingOptions, PlacedBox, SessionClosed, SessionConfigured, SessionDiff, SessionEdit, SessionError, SessionLayout,
+    SessionMessage, SessionOpen,
+)
+from python.services.catalogue import SkuCatalogue
+from python.vtl_core.geometry import quantize_instances
+from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.control import CancelToken
+from python.vtl_core.packing.incremental import IncrementalLayout, diff_payload
+
+# Approximate bytes held per box, placement or packer entry of a session layout (IncrementalLayout.item_count),
+# measured with tracemalloc on a 900-box layout
+SESSION_BYTES_PER_ITEM = 512
+
+# One client message of a /pack/session socket
+SESSION_MESSAGE = TypeAdapter(SessionMessage)
+
+
+class PackingSession:
+    """
+    Server-side state of one packing session: the truck and boxes, validated once when the
+    session opens, the packing options, and the current layout as an IncrementalLayout. Edits
+    only carry what changed and are applied to the layout in place.
+
+    Calls are serialised by `lock`, as a session can be resumed from a second socket.
+    """
+
+    def __init__(self, req: SessionOpen):
+        self.id = uuid.uuid4().hex
+        self.options = PackingOptions.model_validate(req.model_dump(include=set(PackingOptions.model_fields)))
+        (self.truck, boxes, placed) = Proc.create_session_instances(req)
+        self.layout = IncrementalLayout(self.truck, boxes, placed)
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        return self.layout.item_count * SESSION_BYTES_PER_ITEM
+
+    def snapshot(self, runtime_ms: float = 0.0, notes: Optional[list] = None) -> SessionLayout:
+        return SessionLayout(
+            session=self.id,
+            placed=[PlacedBox(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=pb.rotation) for pb in self.layout.placed.values()],
+            unplaced=[Box.model_validate(b) for b in self.layout.unplaced],
+            utilization=self.layout.utilization,
+            runtime_ms=runtime_ms,
+            notes=notes or [],
+        )
+
+    def pack(self, cancel: Optional[CancelToken] = None) -> SessionLayout:
+        """
+        Packs every box of the session from scratch with begin_pack and the session's options,
+        and makes the result the current layout.
+        """
+        start = time.time()
+        opts = self.options
+        unit_scale = opts.unit_scale if opts.geometry == "integer" else None
+        truck, boxes = self.truck, list(self.layout.specs.values())
+        if unit_scale is not None:
+            truck, boxes = quantize_instances(truck, boxes, unit_scale)
+        boxes.sort(key=lambda box: box.height, reverse=True)
+
+        result = Proc.begin_pack_internal(
+            truck,
+            boxes,
+            time_budget_ms=opts.time_budget_ms,
+            cancel=cancel,
+            quality=opts.quality,
+            selector=opts.selector,
+            mode=opts.mode,
+            workers=opts.workers,
+            beam_width=opts.beam_width,
+            target_gap=opts.target_gap,
+            unit_scale=unit_scale,
+            engine=opts.engine,
+            resolution=opts.heightmap_resolution,
+        )
+        self.layout = IncrementalLayout(self.truck, list(self.layout.specs.values()), result["placed"])
+
+        layout = self.snapshot((time.time() - start) * 1000, result["notes"])
+        layout.truncated, layout.search, layout.gap = result["truncated"], result["search"], result["gap"]
+        return layout
+
+    def edit(self, req: SessionEdit, cancel: Optional[CancelToken] = None) -> SessionDiff:
+        """
+        Applies an edit to the current layout. An edit cut short (cancelled, or failing past its
+        checks) may have moved boxes already, so the layout goes back to where it started.
+        """
+        start = time.time()
+        (add, pinned) = Proc.create_edit_instances(req)
+        before = IncrementalLayout(self.truck, list(self.layout.specs.values()), list(self.layout.placed.values()))
+        try:
+            diff = self.layout.edit(add=add, remove=req.remove, pinned=pinned, cancel=cancel)
+        except Exception:
+            self.layout = before
+            raise
+        return SessionDiff(session=self.id, runtime_ms=(time.time() - start) * 1000, **diff_payload(self.layout, diff))
+
+    def configure(self, changes: Dict[str, Any]) -> SessionConfigured:
+        # Validated as a whole, so the engine / mode check sees the merged options
+        self.options = PackingOptions.model_validate({**self.options.model_dump(), **changes})
+        return SessionConfigured(session=self.id, options=self.options)
+
+
+class SessionStore:
+    """
+    Packing sessions by id, least recently used first. A session idle for longer than
+    `idle_timeout_s` is dropped, and the least recently used ones are dropped while there are
+    more than `max_count` or their layouts hold more than `max_bytes`. The session just used is
+    never dropped to make room, so one session larger than the cap still works alone.
+    """
+
+    def __init__(self, max_count: int, idle_timeout_s: float, max_bytes: float):
+        self.max_count = max_count
+        self.idle_timeout_s = idle_timeout_s
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, PackingSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.nbytes for s in self._sessions.values())
+
+    def _evict(self, keep: Optional[str]) -> None:
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if session_id != keep and now - session.last_used > self.idle_timeout_s:
+                del self._sessions[session_id]
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_count or self.nbytes > self.max_bytes):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                self._sessions.move_to_end(oldest)
+                oldest = next(iter(self._sessions))
+            del self._sessions[oldest]
+
+    def touch(self, session: PackingSession) -> None:
+        """
+        Adds `session`, or marks it used after a call that may have grown it, then evicts.
+        """
+        with self._lock:
+            session.last_used = time.monotonic()
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            self._evict(keep=session.id)
+
+    def get(self, session_id: str) -> Optional[PackingSession]:
+        with self._lock:
+            self._evict(keep=None)
+            return self._sessions.get(session_id)
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+def handle_session_message(
+    store: SessionStore,
+    session_id: Optional[str],
+    text: str,
+    catalogue: Optional[SkuCatalogue] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[Optional[str], BaseModel]:
+    """
+    Answers one client message of a /pack/session socket bound to `session_id` (None until a
+    session is opened or resumed). Returns the session the socket is bound to afterwards and
+    the reply. Errors are replies too, and leave the session as it was: invalid messages,
+    packing cut short by `cancel`, and unexpected failures alike. `skus` entries of an open
+    message are filled from `catalogue`.
+    """
+    try:
+        message = SESSION_MESSAGE.validate_json(text)
+    except ValidationError as e:
+        return session_id, SessionError(detail=str(e))
+
+    if message.type == "open":
+        try:
+            session = PackingSession(message if catalogue is None else catalogue.resolve(message))
+        except Exception as e:
+            return session_id, SessionError(detail=str(e))
+    else:
+        session = store.get(message.session if message.type == "resume" else session_id or "")
+    if session is None:
+        detail = "unknown or expired session" if message.type == "resume" or session_id else "no open session"
+        return None, SessionError(detail=detail)
+
+    try:
+        with session.lock:
+            if message.type == "open":
+                reply = session.snapshot() if message.placed is not None else session.pack(cancel)
+            elif message.type == "resume":
+                reply = session.snapshot()
+            elif message.type == "edit":
+                reply = session.edit(message, cancel)
+            elif message.type == "repack":
+                reply = session.pack(cancel)
+            elif message.type == "configure":
+                reply = session.configure(message.options)
+            else:
+                store.drop(session.id)
+                return None, SessionClosed(session=session.id)
+    except Exception as e:
+        # Bad edits and options (ValueError, which pydantic's ValidationError is too), PackCancelled
+        # and failures of the packer; a session that fails to open is not stored
+        return session_id if message.type == "open" else session.id, SessionError(detail=str(e))
+
+    store.touch(session)
+    return session.id, reply
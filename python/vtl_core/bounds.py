@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
+from python.vtl_core.orientations import orientations_of
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class PackingBounds:
+    """
+    Upper bounds on what any layout of a manifest in a truck can achieve.
+
+    - fitting_count : boxes that fit the empty truck in some allowed orientation
+    - max_count     : most boxes any layout can place
+    - max_volume    : most box volume any layout can place
+    - max_utilization : max_volume / truck volume
+    - max_weight    : most box weight any layout can carry
+
+    truck.max_weight is not applied: the packers do not enforce it, so a bound below it would
+    stop them early and report a gap no layout they build can close.
+    """
+    fitting_count: int
+    max_count: int
+    max_volume: float
+    max_utilization: float
+    max_weight: float
+
+    def gap(self, utilization: float) -> float:
+        """
+        Relative gap between an achieved utilization and its upper bound; 0.0 means no
+        layout can place more volume.
+        """
+        if self.max_utilization <= _EPS:
+            return 0.0
+        return max(0.0, 1.0 - utilization / self.max_utilization)
+
+    def target_volume(self, target_gap: float) -> float:
+        """
+        Placed volume at which a layout is within `target_gap` of the bound.
+        """
+        return self.max_volume * (1.0 - target_gap) - _EPS
+
+
+def orientations(box: Box_t) -> List[Tuple[float, float, float]]:
+    """
+    (width, height, depth) of every orientation the box may be placed in (see vtl_core.orientations).
+    """
+    return [(w, h, d) for w, h, d, _ in orientations_of(box)]
+
+
+def fits_truck(box: Box_t, truck: Truck_t) -> bool:
+    return any(
+        w <= truck.width + _EPS and h <= truck.height + _EPS and d <= truck.depth + _EPS
+        for w, h, d in orientations(box)
+    )
+
+
+def _dimension_cap(box: Box_t, truck: Truck_t) -> int:
+    """
+    Per-dimension fit bound on copies of `box`: a line along an axis crosses at most
+    floor(length / shortest extent along it) copies, and each copy covers at least its
+    smallest cross-section perpendicular to that axis.
+    """
+    shapes = orientations(box)
+    cap = math.inf
+    for axis, length in enumerate((truck.width, truck.height, truck.depth)):
+        extent = min(shape[axis] for shape in shapes)
+        section = min(shape[(axis + 1) % 3] * shape[(axis + 2) % 3] for shape in shapes)
+        cross = (truck.width * truck.height * truck.depth) / length
+        if extent <= _EPS or section <= _EPS:
+            continue
+        cap = min(cap, math.floor(length / extent + _EPS) * cross / section)
+    return math.floor(cap + _EPS) if cap != math.inf else 0
+
+
+def _prefix_count(values: List[float], limit: float) -> int:
+    """
+    Largest n such that the n smallest values sum to at most `limit`.
+    """
+    total, n = 0.0, 0
+    for v in sorted(values):
+        if total + v > limit + _EPS:
+            break
+        total += v
+        n += 1
+    return n
+
+
+def compute_bounds(truck: Truck_t, boxes: List[Box_t]) -> PackingBounds:
+    """
+    Cheap bounds from the manifest alone, each valid for every layout:
+
+    - dimension bound: boxes that fit the truck in no orientation are dropped
+    - per-dimension fit bound: a SKU places at most _dimension_cap copies
+    - volume bound: placed volume is at most the truck volume, and the count at most the
+      number of smallest boxes whose volumes fit
+    """
+    truck_volume = truck.width * truck.height * truck.depth
+    fitting = [b for b in boxes if fits_truck(b, truck)]
+
+    # Per-SKU cap: same-type boxes are interchangeable apart from weight
+    skus: Dict[Tuple[float, float, float], List[Box_t]] = {}
+    for box in fitting:
+        skus.setdefault((box.width, box.height, box.depth), []).append(box)
+
+    capped: List[Box_t] = []
+    heaviest: List[Box_t] = []
+    for group in skus.values():
+        cap = min(_dimension_cap(group[0], truck), len(group))
+        capped.extend(group[:cap])
+        heaviest.extend(sorted(group, key=lambda b: b.weight, reverse=True)[:cap])
+
+    max_count = min(len(capped), _prefix_count([b.volume for b in capped], truck_volume))
+    max_volume = min(truck_volume, sum(b.volume for b in capped))
+    max_weight = sum(b.weight for b in heaviest)
+
+    return PackingBounds(
+        fitting_count=len(fitting),
+        max_count=max_count,
+        max_volume=max_volume,
+        max_utilization=max_volume / truck_volume if truck_volume > 0 else 0.0,
+        max_weight=max_weight,
+    )
+
+
+def placed_volume(placed: List[PlacedBox_t], box_map: Dict[str, Box_t]) -> float:
+    return sum(box_map[p.id].volume for p in placed)
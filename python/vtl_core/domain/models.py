@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Literal, Optional
+from typing import List, Literal, Optional, Tuple
 
 @dataclass
 class Box_t:
@@ -15,6 +15,7 @@ class Box_t:
 
     # Config
     priority: Optional[float] = None
+    rotatable: bool = True
 
     # Methods
 
@@ -24,7 +25,8 @@ class Box_t:
         return (
             self.width == other.width and
             self.height == other.height and
-            self.depth == other.depth
+            self.depth == other.depth and
+            self.rotatable == other.rotatable
         )
 
     # Returns the volume occupied by Item
@@ -38,8 +40,7 @@ class Box_t:
         return self.width * self.depth
     
     # Rotates Item 90 degrees along any one axis
-    @property
-    def rotate(self, axis: Literal['x', 'y', 'z']):
+    def rotate(self, axis: Literal['x', 'y', 'z']) -> None:
         match axis:
             case 'x':
                 self.depth, self.height = self.height, self.depth
@@ -130,4 +131,61 @@ class PackRegion:
     z: float
     width: float
     depth: float
-    height: float
\ No newline at end of file
+    height: float
+
+
+@dataclass
+class RegionResult:
+    index: int
+    region: PackRegion
+    heuristic: str
+    placed: List[PlacedBox_t]
+    notes: List[str]
+
+
+"""
+One pallet built by the pallet stage: its boxes and their placements relative to the top of
+the pallet deck, and the height the load reaches above the deck.
+"""
+@dataclass
+class PalletLoad:
+    id: str
+    boxes: List[Box_t]
+    placed: List[PlacedBox_t]
+    load_height: float
+
+
+"""
+A truck closed by the online packer: its place in the sequence of trucks opened and what it
+holds. Only these totals outlive the truck.
+"""
+@dataclass
+class ClosedTruck:
+    index: int
+    box_count: int
+    volume: float
+    weight: float
+
+
+"""
+What the online packer did with one arrival: placements as (truck index, placement), boxes no
+empty truck can take, and the trucks closed to make room, in the order they were closed.
+"""
+@dataclass
+class OnlineStep:
+    placed: List[Tuple[int, PlacedBox_t]]
+    rejected: List[Box_t]
+    closed: List[ClosedTruck]
+
+
+"""
+The outcome of one edit to an incremental layout: new and moved placements, ids that lost
+their placement, boxes left without one, and how many placements did not change.
+"""
+@dataclass
+class LayoutDiff:
+    changed: List[PlacedBox_t]
+    removed: List[str]
+    unplaced: List[Box_t]
+    unchanged_count: int
+    notes: List[str]
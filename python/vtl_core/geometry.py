@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Sequence, Tuple, TypeVar
+
+from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
+
+GEOMETRY_MODES = ("float", "integer")
+
+_T = TypeVar("_T")
+
+# Integer units per metre used by the "integer" geometry mode unless the request sets one (millimetres)
+DEFAULT_UNIT_SCALE = 1000
+
+# Slack for decimal inputs whose scaled value lands just off an integer (1.2 * 1000 = 1199.9999999999998)
+_ROUND_TOL = 1e-6
+
+
+def box_units(value: float, scale: int) -> int:
+    # Boxes round up and the truck rounds down, so every integer layout is a real one
+    return max(1, math.ceil(value * scale - _ROUND_TOL))
+
+
+def truck_units(value: float, scale: int) -> int:
+    return math.floor(value * scale + _ROUND_TOL)
+
+
+def quantize_instances(truck: Truck_t, boxes: List[Box_t], scale: int) -> Tuple[Truck_t, List[Box_t]]:
+    """
+    Integer copies of the truck and boxes, with every dimension in units of 1/scale metre.
+    Weights and priorities are unchanged.
+
+    The heuristics, region splitting and scoring only add, subtract and compare dimensions,
+    so on these instances they run on exact integer arithmetic: every `_EPS` tolerance is
+    inert, no sub-unit sliver regions appear, and equal box types compare and hash exactly.
+    """
+    quantized_truck = Truck_t(
+        id=truck.id,
+        width=truck_units(truck.width, scale),
+        height=truck_units(truck.height, scale),
+        depth=truck_units(truck.depth, scale),
+        max_weight=truck.max_weight,
+    )
+    quantized_boxes = [
+        Box_t(
+            id=box.id,
+            width=box_units(box.width, scale),
+            height=box_units(box.height, scale),
+            depth=box_units(box.depth, scale),
+            weight=box.weight,
+            priority=box.priority,
+            rotatable=box.rotatable,
+        )
+        for box in boxes
+    ]
+    return quantized_truck, quantized_boxes
+
+
+def from_units(value: float, scale: int) -> float:
+    # Division (not multiplication by 1/scale) returns the closest float to the decimal value
+    return value / scale
+
+
+def restore_placement(pb: PlacedBox_t, scale: int) -> PlacedBox_t:
+    return PlacedBox_t(
+        id=pb.id,
+        x=from_units(pb.x, scale),
+        y=from_units(pb.y, scale),
+        z=from_units(pb.z, scale),
+        rotation=pb.rotation,
+    )
+
+
+def restore_boxes(boxes: Sequence[Any], originals: Dict[str, _T]) -> List[_T]:
+    """
+    The caller's own boxes, by id, for the packer's integer copies of them. Rounded-up sizes
+    only exist for packing: converting them back would echo sizes the client never sent.
+    """
+    return [originals[box.id] for box in boxes]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Tuple
+
+from python.vtl_core.domain.models import Box_t
+
+# Rotation code -> which of the box's (width, height, depth) becomes the placed (width, height, depth).
+# Codes come in pairs sharing an upright edge; the odd code is the even one turned 90 degrees
+# about the Y axis, so 0 and 1 keep their original meaning.
+ROTATIONS: Tuple[Tuple[int, int, int], ...] = (
+    (0, 1, 2),  # 0: as given
+    (2, 1, 0),  # 1: turned about Y (width <-> depth)
+    (1, 0, 2),  # 2: on its side, width upright
+    (2, 0, 1),  # 3: on its side, width upright, turned about Y
+    (0, 2, 1),  # 4: on its back, depth upright
+    (1, 2, 0),  # 5: on its back, depth upright, turned about Y
+)
+
+# Rotations allowed for boxes with rotatable=False ("this side up")
+UPRIGHT_ROTATIONS = (0, 1)
+
+# (placed width, placed height, placed depth, rotation code)
+Orientation = Tuple[float, float, float, int]
+
+
+def oriented_dims(width: float, height: float, depth: float, rotation: int) -> Tuple[float, float, float]:
+    dims = (width, height, depth)
+    a, b, c = ROTATIONS[rotation]
+    return dims[a], dims[b], dims[c]
+
+
+def placed_dims(box: Box_t, rotation: int) -> Tuple[float, float, float]:
+    return oriented_dims(box.width, box.height, box.depth, rotation)
+
+
+@lru_cache(maxsize=4096)
+def orientation_table(width: float, height: float, depth: float, rotatable: bool = True) -> Tuple[Orientation, ...]:
+    """
+    Distinct orientations of one SKU, lowest rotation code first. Rotations that give the same
+    placed dimensions (cubes, square faces) are dropped, so a cube has a single entry.
+    """
+    seen = set()
+    table = []
+    for rotation in (range(len(ROTATIONS)) if rotatable else UPRIGHT_ROTATIONS):
+        dims = oriented_dims(width, height, depth, rotation)
+        if dims not in seen:
+            seen.add(dims)
+            table.append((*dims, rotation))
+    return tuple(table)
+
+
+def orientations_of(box: Box_t) -> Tuple[Orientation, ...]:
+    return orientation_table(box.width, box.height, box.depth, box.rotatable)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from python.vtl_core.domain.models import Box_t, PackRegion, PlacedBox_t, RegionResult, Truck_t
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+from python.vtl_core.packing.processing import (
+    FAST_HEURISTIC,
+    HEURISTIC_LABELS,
+    Hstix,
+    child_regions,
+    run_heuristic,
+)
+from python.vtl_core.packing.scoring import ScoreTally, ScoringEngine
+from python.vtl_core.utils import _compute_local_extents, _translate_placements
+
+_EPS = 1e-9
+
+# Default number of partial layouts kept per step
+DEFAULT_BEAM_WIDTH = 4
+
+# How many regions from the top of the region stack each beam may branch on
+BEAM_REGION_BRANCH = 2
+
+# Persistent singly linked stack: (head, tail) or None. Pushing shares the whole tail.
+Stack = Optional[Tuple[Any, "Stack"]]
+
+
+def _push(stack: Stack, item: Any) -> Stack:
+    return (item, stack)
+
+
+def _iter_stack(stack: Stack) -> Iterator[Any]:
+    while stack is not None:
+        item, stack = stack
+        yield item
+
+
+@dataclass(frozen=True)
+class BeamState:
+    """
+    One partial layout. Every field is immutable or shared, so branching never copies
+    earlier decisions:
+
+    - `regions`: persistent stack of open regions (top is processed next)
+    - `head` + `load[offset:]`: the remaining boxes. Heuristics only consume the leading
+      same-type batch, so the rest is always an untouched suffix of the sorted load.
+    - `trace`: persistent stack of committed RegionResults, newest first
+    - `tally`: additive score totals of everything placed so far
+    - `greedy`: whether this is the width-1 lane (always the best-ranked child)
+    """
+    regions: Stack
+    head: Tuple[Box_t, ...]
+    offset: int
+    trace: Stack
+    tally: ScoreTally
+    score: float
+    depth: int = 0
+    greedy: bool = False
+
+
+class BeamSearch:
+    """
+    Beam search over layer_pack's region decisions: which of the top open regions to pack
+    next and which heuristic to pack it with. Keeps the `beam_width` best partial layouts,
+    ranked by placed volume and then by their incremental ScoringEngine score, and returns
+    the finished layout with the best score.
+    """
+
+    def __init__(
+        self,
+        truck: Truck_t,
+        boxes: List[Box_t],
+        beam_width: int = DEFAULT_BEAM_WIDTH,
+        region_branch: int = BEAM_REGION_BRANCH,
+    ):
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1.")
+        self.truck = truck
+        self.load: Tuple[Box_t, ...] = tuple(boxes)
+        self.beam_width = beam_width
+        self.region_branch = region_branch
+        self.engine = ScoringEngine(truck)
+        self.box_map = {b.id: b for b in boxes}
+        self.expansions = 0
+
+    def initial_state(self) -> BeamState:
+        root = PackRegion(x=0.0, y=0.0, z=0.0, width=self.truck.width, depth=self.truck.depth, height=self.truck.height)
+        return BeamState(
+            regions=_push(None, root), head=(), offset=0, trace=None, tally=ScoreTally(), score=0.0, greedy=True
+        )
+
+    def remaining(self, state: BeamState) -> List[Box_t]:
+        return list(state.head) + list(self.load[state.offset:])
+
+    def is_terminal(self, state: BeamState) -> bool:
+        return state.regions is None or (not state.head and state.offset >= len(self.load))
+
+    def _next_batch(self, state: BeamState) -> Tuple[List[Box_t], int]:
+        """
+        The boxes the next heuristic run sees, and the load offset once they are consumed.
+        """
+        if state.head:
+            return list(state.head), state.offset
+        end = state.offset
+        anchor = self.load[end]
+        while end < len(self.load) and self.load[end] == anchor:
+            end += 1
+        return list(self.load[state.offset:end]), end
+
+    def _region_choices(self, state: BeamState) -> Iterator[Tuple[PackRegion, Stack]]:
+        """
+        Yields (region, stack without it) for the top `region_branch` usable regions.
+        Degenerate regions above a choice are dropped, as layer_pack would skip them.
+        """
+        skipped: List[PackRegion] = []
+        stack = state.regions
+        found = 0
+        while stack is not None and found < self.region_branch:
+            region, stack = stack
+            if region.width <= _EPS or region.depth <= _EPS or region.height <= _EPS:
+                continue
+            rest = stack
+            for kept in reversed(skipped):
+                rest = _push(rest, kept)
+            yield region, rest
+            skipped.append(region)
+            found += 1
+
+    def expand(self, state: BeamState, heuristics: Tuple[Hstix, ...]) -> List[BeamState]:
+        children: List[BeamState] = []
+        choices = list(self._region_choices(state))
+        if not choices:
+            return [replace(state, regions=None)]
+
+        for region, rest in choices:
+            local_truck = Truck_t(
+                id=f"{self.truck.id}_region_{state.depth}",
+                width=region.width,
+                depth=region.depth,
+                height=region.height,
+                max_weight=self.truck.max_weight,
+            )
+            stalled = False
+            for heuristic in heuristics:
+                batch, next_offset = self._next_batch(state)
+                anchor = batch[0]
+                local_placed, layer_notes, used_h, x_cursor, z_cursor = run_heuristic(heuristic, local_truck, batch, region.y)
+                self.expansions += 1
+
+                notes = [
+                    f"\n> Region {state.depth}: Selected [{HEURISTIC_LABELS[heuristic]}] (beam)",
+                    f"\t↳ origin=({region.x:.3f}, {region.y:.3f}, {region.z:.3f}) | "
+                    f"size=({region.width:.3f}, {region.depth:.3f}, {region.height:.3f})",
+                ]
+                notes.extend(layer_notes)
+
+                regions = rest
+                tally = state.tally
+                if local_placed:
+                    used_x, used_z = _compute_local_extents(anchor, local_placed)
+                    _translate_placements(local_placed, region.x, region.z)
+                    notes.extend(f"Box [{lp.id}] placed at ({lp.x}, {lp.y}, {lp.z})" for lp in local_placed)
+                    for child in child_regions(region, used_h, x_cursor, z_cursor, used_x, used_z):
+                        regions = _push(regions, child)
+                    tally = self.engine.tally(local_placed, self.box_map, tally)
+                elif stalled:
+                    # Heuristics that place nothing all leave the same state behind
+                    continue
+                else:
+                    stalled = True
+                    notes.append("\t↳ No boxes placed in this region.")
+
+                result = RegionResult(index=state.depth, region=region, heuristic=heuristic.name, placed=local_placed, notes=notes)
+                children.append(BeamState(
+                    regions=regions,
+                    head=tuple(batch),
+                    offset=next_offset,
+                    trace=_push(state.trace, result),
+                    tally=tally,
+                    score=self.engine.total_from_tally(tally),
+                    depth=state.depth + 1,
+                    greedy=state.greedy,
+                ))
+
+        return children
+
+    @staticmethod
+    def _rank(state: BeamState) -> Tuple[float, float]:
+        # Placed volume never decreases, so it compares partial layouts of different depths
+        # fairly; the full score only breaks ties.
+        return state.tally.volume, state.score
+
+    def _select(self, candidates: List[BeamState], width: int) -> List[BeamState]:
+        """
+        Keeps the `width` best-ranked candidates, plus the best child of the greedy lane so a
+        wider beam never ends below the width-1 result.
+        """
+        # Stable sort: ties keep expansion order, i.e. the greedy region/heuristic order
+        ranked = sorted(candidates, key=self._rank, reverse=True)
+        lane = next((s for s in ranked if s.greedy), None)
+        kept = [s if s is lane or not s.greedy else replace(s, greedy=False) for s in ranked[:width]]
+        if lane is not None and lane not in kept:
+            kept[-1] = lane
+        return kept
+
+    def run(
+        self,
+        budget: Optional[TimeBudget] = None,
+        cancel: Optional[CancelToken] = None,
+        stop_volume: Optional[float] = None,
+    ) -> BeamState:
+        """
+        Expands every non-terminal beam one region at a time until all are terminal, or
+        until the leading state has placed `stop_volume` (it is then within the target gap
+        of the utilization bound and is returned as is).
+
+        Once the budget is degraded the beam collapses to its best state, packed with
+        FAST_HEURISTIC; once exhausted the best state so far is returned and
+        `budget.truncated` is set.
+        """
+        beam = [self.initial_state()]
+        all_heuristics = tuple(Hstix)
+
+        while not all(self.is_terminal(s) for s in beam):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+            if budget is not None and budget.exhausted:
+                budget.truncated = True
+                break
+
+            if stop_volume is not None and beam[0].tally.volume >= stop_volume:
+                return beam[0]
+
+            fast_mode = budget is not None and budget.degraded
+            width = 1 if fast_mode else self.beam_width
+            heuristics = (FAST_HEURISTIC,) if fast_mode else all_heuristics
+
+            candidates: List[BeamState] = []
+            for state in beam[:width]:
+                if self.is_terminal(state):
+                    candidates.append(state)
+                else:
+                    candidates.extend(self.expand(state, heuristics))
+            beam = self._select(candidates, width)
+
+        return max(beam, key=lambda s: s.score)
+
+
+def beam_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+) -> Tuple[List[PlacedBox_t], List[str], Dict[str, Any]]:
+    """
+    Beam-search counterpart of layer_pack. `boxes` is mutated the same way: afterwards it
+    holds the unplaced boxes. Returns (placed, notes, stats).
+    """
+    start = time.perf_counter()
+    search = BeamSearch(truck, boxes, beam_width=beam_width)
+    best = search.run(budget=budget, cancel=cancel, stop_volume=stop_volume)
+
+    results = list(_iter_stack(best.trace))[::-1]
+    placed = [pb for result in results for pb in result.placed]
+    notes = [note for result in results for note in result.notes]
+    boxes[:] = search.remaining(best)
+
+    elapsed_s = max(time.perf_counter() - start, 1e-9)
+    stats = {
+        "mode": "beam",
+        "beam_width": beam_width,
+        "expansions": search.expansions,
+        "expansions_per_second": search.expansions / elapsed_s,
+        "best_score": round(best.score, 4),
+    }
+    notes.insert(
+        0,
+        f"\n[BEAM SEARCH] width={beam_width} | regions={len(results)} | expansions={search.expansions} | "
+        f"score {best.score * 100:.2f}",
+    )
+    return placed, notes, stats
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+
+class TimeBudget:
+    """
+    Wall-clock budget for one packing run (anytime mode).
+
+    The packing loop checks the budget between regions:
+        - degraded  : `degrade_ratio` of the budget is spent -> use one fast heuristic, no trials
+        - exhausted : the whole budget is spent -> stop and return the layout built so far
+
+    A budget of None never degrades or expires.
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None, degrade_ratio: float = 0.5):
+        self.budget_ms = budget_ms
+        self.degrade_ratio = degrade_ratio
+        self.start = time.perf_counter()
+        self.truncated = False
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    @property
+    def degraded(self) -> bool:
+        if self.budget_ms is None:
+            return False
+        return self.elapsed_ms() >= self.budget_ms * self.degrade_ratio
+
+    @property
+    def exhausted(self) -> bool:
+        if self.budget_ms is None:
+            return False
+        return self.elapsed_ms() >= self.budget_ms
+
+
+class PackCancelled(Exception):
+    """
+    Raised from inside the packing loop once its CancelToken has been tripped.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"Packing cancelled: {reason}")
+        self.reason = reason
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared between the API layer and a packing run.
+
+    The API layer calls cancel() from another thread (client disconnect, server deadline);
+    the packing loop calls raise_if_cancelled() between regions and heuristic trials.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self.cancelled_at = time.perf_counter()
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the token is tripped or `timeout` seconds pass; returns cancelled.
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise PackCancelled(self.reason or "cancelled")
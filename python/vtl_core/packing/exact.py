@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+from python.vtl_core.bounds import fits_truck, placed_volume
+from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
+from python.vtl_core.geometry import box_units, truck_units
+from python.vtl_core.orientations import orientations_of
+from python.vtl_core.packing.control import CancelToken, PackCancelled
+from python.vtl_core.packing.scoring import ScoringEngine
+
+_EPS = 1e-9
+
+# Solver time limit when the request sets no time_budget_ms
+EXACT_DEFAULT_TIME_LIMIT_MS = 2000.0
+
+# Finest grid the model is built on, in units per metre (1 mm)
+EXACT_MAX_SCALE = 1000
+
+# How often the cancel watcher checks the token while the solver runs
+EXACT_CANCEL_POLL_S = 0.005
+
+
+def grid_scale(truck: Truck_t, boxes: List[Box_t]) -> int:
+    """
+    Coarsest power-of-ten grid (units per metre) on which every dimension is integral,
+    capped at EXACT_MAX_SCALE. Coarser grids give the solver much smaller domains.
+    """
+    values = [truck.width, truck.height, truck.depth]
+    for box in boxes:
+        values.extend((box.width, box.height, box.depth))
+
+    scale = 1
+    while scale < EXACT_MAX_SCALE:
+        if all(abs(v * scale - round(v * scale)) <= 1e-6 for v in values):
+            return scale
+        scale *= 10
+    return EXACT_MAX_SCALE
+
+
+class ExactModel:
+    """
+    CP-SAT formulation of one truck load on an integer grid.
+
+    Per box: presence, one orientation from its SKU's orientation table and the min-corner
+    position.
+    Present boxes stay inside the truck, pairwise separated along at least one axis, and
+    either stand on the floor or have their whole footprint resting on the tops of boxes
+    directly below them (the layer heuristics stack the same way).
+
+    Objective: placed volume first, then the number of boxes on the floor (the stability
+    term of ScoringEngine).
+    """
+
+    def __init__(self, truck: Truck_t, boxes: List[Box_t]):
+        self.truck = truck
+        self.boxes = list(boxes)
+        self.scale = grid_scale(truck, boxes)
+        self.model = cp_model.CpModel()
+
+        W, H, D = (truck_units(v, self.scale) for v in (truck.width, truck.height, truck.depth))
+        self.size = (W, H, D)
+        n = len(self.boxes)
+
+        self.dims = [tuple(box_units(v, self.scale) for v in (b.width, b.height, b.depth)) for b in self.boxes]
+        # Per box: (dx, dy, dz, rotation) of each distinct orientation, on the grid
+        self.tables = [
+            [(box_units(w, self.scale), box_units(h, self.scale), box_units(d, self.scale), rot)
+             for w, h, d, rot in orientations_of(b)]
+            for b in self.boxes
+        ]
+        self.present, self.orient, self.on_floor = [], [], []
+        self.x, self.y, self.z, self.dx, self.dy, self.dz = [], [], [], [], [], []
+
+        m = self.model
+        for i, box in enumerate(self.boxes):
+            table = self.tables[i]
+            present = m.NewBoolVar(f"present_{i}")
+            orient = [m.NewBoolVar(f"orient_{i}_{k}") for k in range(len(table))]
+            x = m.NewIntVar(0, W, f"x_{i}")
+            y = m.NewIntVar(0, H, f"y_{i}")
+            z = m.NewIntVar(0, D, f"z_{i}")
+            extents = []
+            for axis, name in enumerate(("dx", "dy", "dz")):
+                sizes = [o[axis] for o in table]
+                extent = m.NewIntVar(min(sizes), max(sizes), f"{name}_{i}")
+                m.Add(extent == sum(size * o for size, o in zip(sizes, orient)))
+                extents.append(extent)
+            dx, dy, dz = extents
+
+            m.AddExactlyOne(orient)
+            if not fits_truck(box, truck):
+                m.Add(present == 0)
+
+            m.Add(x + dx <= W).OnlyEnforceIf(present)
+            m.Add(y + dy <= H).OnlyEnforceIf(present)
+            m.Add(z + dz <= D).OnlyEnforceIf(present)
+            # Pin absent boxes so they add no symmetry
+            for var in (x, y, z):
+                m.Add(var == 0).OnlyEnforceIf(present.Not())
+            m.AddImplication(present.Not(), orient[0])
+
+            on_floor = m.NewBoolVar(f"floor_{i}")
+            m.AddImplication(on_floor, present)
+            m.Add(y == 0).OnlyEnforceIf(on_floor)
+
+            self.present.append(present)
+            self.orient.append(orient)
+            self.on_floor.append(on_floor)
+            self.x.append(x)
+            self.y.append(y)
+            self.z.append(z)
+            self.dx.append(dx)
+            self.dy.append(dy)
+            self.dz.append(dz)
+
+        for i in range(n):
+            for j in range(i + 1, n):
+                self._separate(i, j)
+                # Identical boxes are interchangeable: fill them in order, left to right
+                if self.boxes[i] == self.boxes[j]:
+                    m.AddImplication(self.present[j], self.present[i])
+                    m.Add(self.x[i] <= self.x[j]).OnlyEnforceIf(self.present[j])
+
+        for i in range(n):
+            self._support(i)
+
+        volume = [w * h * d for w, h, d in self.dims]
+        m.Maximize(
+            sum((n + 1) * volume[i] * self.present[i] for i in range(n)) + sum(self.on_floor)
+        )
+
+    def _separate(self, i: int, j: int) -> None:
+        m = self.model
+        sides = [m.NewBoolVar(f"sep_{i}_{j}_{k}") for k in range(6)]
+        m.Add(self.x[i] + self.dx[i] <= self.x[j]).OnlyEnforceIf(sides[0])
+        m.Add(self.x[j] + self.dx[j] <= self.x[i]).OnlyEnforceIf(sides[1])
+        m.Add(self.y[i] + self.dy[i] <= self.y[j]).OnlyEnforceIf(sides[2])
+        m.Add(self.y[j] + self.dy[j] <= self.y[i]).OnlyEnforceIf(sides[3])
+        m.Add(self.z[i] + self.dz[i] <= self.z[j]).OnlyEnforceIf(sides[4])
+        m.Add(self.z[j] + self.dz[j] <= self.z[i]).OnlyEnforceIf(sides[5])
+        m.AddBoolOr(sides + [self.present[i].Not(), self.present[j].Not()])
+
+    def _support(self, i: int) -> None:
+        """
+        Off the floor, the footprint of box i must be covered by the tops of boxes whose top
+        face is exactly at y_i. Boxes never overlap, so covered area >= footprint means the
+        bottom face is fully supported.
+        """
+        m = self.model
+        max_footprint = max(o[0] * o[2] for o in self.tables[i])
+        footprint = m.NewIntVar(0, max_footprint, f"footprint_{i}")
+        m.AddMultiplicationEquality(footprint, [self.dx[i], self.dz[i]])
+        areas = []
+
+        def lowest(k: int) -> int:
+            return min(o[1] for o in self.tables[k])
+
+        def longest(k: int) -> int:
+            return max(max(o[0], o[2]) for o in self.tables[k])
+
+        for j in range(len(self.boxes)):
+            if j == i or lowest(j) + lowest(i) > self.size[1]:
+                continue
+            touch = m.NewBoolVar(f"touch_{i}_{j}")
+            m.AddImplication(touch, self.present[j])
+            m.Add(self.y[i] == self.y[j] + self.dy[j]).OnlyEnforceIf(touch)
+
+            ox = m.NewIntVar(0, min(longest(i), longest(j)), f"ox_{i}_{j}")
+            oz = m.NewIntVar(0, min(longest(i), longest(j)), f"oz_{i}_{j}")
+            m.Add(ox <= self.x[i] + self.dx[i] - self.x[j]).OnlyEnforceIf(touch)
+            m.Add(ox <= self.x[j] + self.dx[j] - self.x[i]).OnlyEnforceIf(touch)
+            m.Add(ox <= self.dx[i])
+            m.Add(ox <= self.dx[j])
+            m.Add(oz <= self.z[i] + self.dz[i] - self.z[j]).OnlyEnforceIf(touch)
+            m.Add(oz <= self.z[j] + self.dz[j] - self.z[i]).OnlyEnforceIf(touch)
+            m.Add(oz <= self.dz[i])
+            m.Add(oz <= self.dz[j])
+            m.Add(ox == 0).OnlyEnforceIf(touch.Not())
+
+            area = m.NewIntVar(0, max_footprint, f"area_{i}_{j}")
+            m.AddMultiplicationEquality(area, [ox, oz])
+            areas.append(area)
+
+        supported = m.NewBoolVar(f"supported_{i}")
+        m.Add(sum(areas) >= footprint).OnlyEnforceIf(supported)
+        if not areas:
+            m.Add(supported == 0)
+        m.AddBoolOr([self.on_floor[i], supported, self.present[i].Not()])
+
+    def add_hint(self, placed: List[PlacedBox_t]) -> None:
+        """
+        Warm start from a heuristic layout. Identical boxes are matched left to right so the
+        hint respects the model's symmetry breaking.
+        """
+        by_id = {p.id: p for p in placed}
+
+        groups: Dict[Tuple[float, float, float], List[int]] = {}
+        for i, box in enumerate(self.boxes):
+            groups.setdefault((box.width, box.height, box.depth), []).append(i)
+
+        for members in groups.values():
+            layouts = sorted(
+                (by_id[self.boxes[i].id] for i in members if self.boxes[i].id in by_id),
+                key=lambda p: p.x,
+            )
+            for k, i in enumerate(members):
+                m = self.model
+                if k < len(layouts):
+                    p = layouts[k]
+                    m.AddHint(self.present[i], 1)
+                    for (_, _, _, rot), o in zip(self.tables[i], self.orient[i]):
+                        m.AddHint(o, int(rot == p.rotation))
+                    m.AddHint(self.x[i], round(p.x * self.scale))
+                    m.AddHint(self.y[i], round(p.y * self.scale))
+                    m.AddHint(self.z[i], round(p.z * self.scale))
+                    m.AddHint(self.on_floor[i], int(abs(p.y) <= _EPS))
+                else:
+                    m.AddHint(self.present[i], 0)
+
+    def placements(self, solver: cp_model.CpSolver) -> List[PlacedBox_t]:
+        placed = []
+        for i, box in enumerate(self.boxes):
+            if solver.Value(self.present[i]):
+                placed.append(PlacedBox_t(
+                    id=box.id,
+                    x=solver.Value(self.x[i]) / self.scale,
+                    y=solver.Value(self.y[i]) / self.scale,
+                    z=solver.Value(self.z[i]) / self.scale,
+                    rotation=next(
+                        rot for (_, _, _, rot), o in zip(self.tables[i], self.orient[i]) if solver.Value(o)
+                    ),
+                ))
+        # Same order the layer heuristics emit: bottom-up, then front to back
+        placed.sort(key=lambda p: (p.y, p.z, p.x))
+        return placed
+
+
+def exact_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    hint: Optional[List[PlacedBox_t]] = None,
+    time_limit_ms: Optional[float] = None,
+    workers: Optional[int] = None,
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+    target_gap: float = 0.0,
+) -> Tuple[List[PlacedBox_t], List[str], Dict[str, Any]]:
+    """
+    Solves the load with CP-SAT, warm-started from `hint` (a heuristic layout of the same
+    boxes), for at most `time_limit_ms` on `workers` solver threads. The hint is kept
+    when the solver finds nothing better. `boxes` ends up holding the unplaced boxes.
+
+    The solver is skipped when the hint already places `stop_volume`, and stops once its
+    objective is within `target_gap` of its own bound.
+
+    Returns (placed, notes, stats); stats["proven_optimal"] is True when the solver closed
+    the search on the model's objective.
+    """
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+
+    start = time.perf_counter()
+    limit_ms = time_limit_ms if time_limit_ms is not None else EXACT_DEFAULT_TIME_LIMIT_MS
+    box_map = {b.id: b for b in boxes}
+    engine = ScoringEngine(truck)
+    placed = list(hint or [])
+
+    if stop_volume is not None and placed_volume(placed, box_map) >= stop_volume:
+        placed_ids = {p.id for p in placed}
+        boxes[:] = [b for b in boxes if b.id not in placed_ids]
+        stats = {
+            "mode": "exact",
+            "status": "SKIPPED",
+            "proven_optimal": True,
+            "best_score": engine.get_all_scores(placed, list(box_map.values()))["total_score"],
+        }
+        notes = ["\n[EXACT CP-SAT] skipped: the heuristic layout already meets the utilization bound"]
+        notes.extend(f"Box [{p.id}] placed at ({p.x}, {p.y}, {p.z})" for p in placed)
+        return placed, notes, stats
+
+    exact = ExactModel(truck, boxes)
+    if hint:
+        exact.add_hint(hint)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max(limit_ms - (time.perf_counter() - start) * 1000, 1.0) / 1000
+    solver.parameters.relative_gap_limit = target_gap
+    if workers:
+        solver.parameters.num_workers = workers
+
+    done = threading.Event()
+
+    def watch_cancel() -> None:
+        while not done.is_set():
+            if cancel.wait(EXACT_CANCEL_POLL_S):
+                solver.StopSearch()
+                return
+
+    watcher = threading.Thread(target=watch_cancel, daemon=True) if cancel is not None else None
+    if watcher is not None:
+        watcher.start()
+    try:
+        status = solver.Solve(exact.model)
+    finally:
+        done.set()
+        if watcher is not None:
+            watcher.join()
+
+    if cancel is not None and cancel.cancelled:
+        raise PackCancelled(cancel.reason or "cancelled")
+
+    source = "heuristic hint"
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        solved = exact.placements(solver)
+        candidate = (placed_volume(solved, box_map), engine.get_all_scores(solved, boxes)["total_score"])
+        incumbent = (placed_volume(placed, box_map), engine.get_all_scores(placed, boxes)["total_score"])
+        if candidate >= incumbent:
+            placed, source = solved, "CP-SAT"
+
+    placed_ids = {p.id for p in placed}
+    boxes[:] = [b for b in boxes if b.id not in placed_ids]
+
+    # With a gap limit, OPTIMAL only means "within target_gap of the bound"
+    proven = status == cp_model.OPTIMAL and target_gap == 0.0
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = {
+        "mode": "exact",
+        "workers": solver.parameters.num_workers or None,
+        "status": solver.StatusName(status),
+        "proven_optimal": proven,
+        "best_score": engine.get_all_scores(placed, list(box_map.values()))["total_score"],
+    }
+    notes = [
+        f"\n[EXACT CP-SAT] status={stats['status']} | grid=1/{exact.scale} m | boxes={len(box_map)} | "
+        f"{elapsed_ms:.0f} ms | layout from {source}"
+        + (" (proven optimal)" if proven else ""),
+    ]
+    notes.extend(f"Box [{p.id}] placed at ({p.x}, {p.y}, {p.z})" for p in placed)
+    return placed, notes, stats
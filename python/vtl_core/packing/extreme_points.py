@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from python.vtl_core.domain.models import Box_t, PackRegion, PlacedBox_t, RegionResult, Truck_t
+from python.vtl_core.orientations import orientations_of
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+
+_EPS = 1e-9
+
+# Boxes processed between two budget / cancel / stop_volume checks (and per streamed chunk)
+EP_CHECK_EVERY = 64
+
+# Upper bound on grid cells along one axis
+EP_MAX_CELLS = 256
+
+# Extreme points are split into this many heaps by capacity (see ExtremePointPacker)
+EP_CAPACITY_BUCKETS = 32
+
+# (x0, y0, z0, x1, y1, z1) of one placed box
+Cuboid = Tuple[float, float, float, float, float, float]
+
+# Extreme points are ordered bottom first, then front to back, then left to right: (y, z, x)
+PointKey = Tuple[float, float, float]
+
+# Offsets (ox, oy, oz) from a point: a box placed there collides if it is larger on all three axes
+Obstacle = Tuple[float, float, float]
+
+# (sorted dimensions, (height, shorter side, longer side) for boxes kept upright else None)
+Shape = Tuple[Tuple[float, float, float], Optional[Tuple[float, float, float]]]
+
+
+def shape_of(box: Box_t) -> Shape:
+    dims = (box.width, box.height, box.depth)
+    upright = None if box.rotatable else (box.height, min(box.width, box.depth), max(box.width, box.depth))
+    return tuple(sorted(dims)), upright
+
+
+def contains(shape: Shape, other: Shape) -> bool:
+    """
+    True if every placement of `shape` has a placement of `other` inside it, anchored at the
+    same corner: wherever `other` cannot go, `shape` cannot go either.
+    """
+    if other[1] is None:
+        return all(a >= b - _EPS for a, b in zip(shape[0], other[0]))
+    return shape[1] is not None and all(a >= b - _EPS for a, b in zip(shape[1], other[1]))
+
+
+def _blocked(obstacles: List[Obstacle], w: float, h: float, d: float) -> bool:
+    for ox, oy, oz in obstacles:
+        if w > ox + _EPS and h > oy + _EPS and d > oz + _EPS:
+            return True
+    return False
+
+
+def _capacity(obstacles: List[Obstacle]) -> float:
+    # Side of the largest cube not blocked by any obstacle corner
+    return min(max(o) for o in obstacles)
+
+
+def _add_obstacle(obstacles: List[Obstacle], new: Obstacle) -> None:
+    # Keeps only corners not implied by another one (a smaller corner blocks every box a larger one does)
+    nx, ny, nz = new
+    for ox, oy, oz in obstacles:
+        if ox <= nx + _EPS and oy <= ny + _EPS and oz <= nz + _EPS:
+            return
+    obstacles[:] = [o for o in obstacles if not (nx <= o[0] + _EPS and ny <= o[1] + _EPS and nz <= o[2] + _EPS)]
+    obstacles.append(new)
+
+
+class CuboidGrid:
+    """
+    Uniform 3D bucket grid over the truck indexing placed boxes.
+
+    Each box is registered in every cell it overlaps, so collision, support and projection
+    queries only visit the boxes near the space they touch instead of the whole load; a walk
+    along a line at one height stays in that height's band of cells.
+    """
+
+    def __init__(self, truck: Truck_t, cell: float):
+        self.cx = max(cell, truck.width / EP_MAX_CELLS)
+        self.cy = max(cell, truck.height / EP_MAX_CELLS)
+        self.cz = max(cell, truck.depth / EP_MAX_CELLS)
+        self.nx = max(1, math.ceil(truck.width / self.cx))
+        self.ny = max(1, math.ceil(truck.height / self.cy))
+        self.nz = max(1, math.ceil(truck.depth / self.cz))
+        self.cells: Dict[Tuple[int, int, int], List[int]] = {}
+
+    @staticmethod
+    def _span(lo: float, hi: float, size: float, count: int) -> range:
+        first = min(count - 1, max(0, int(lo / size)))
+        last = min(count - 1, max(first, int((hi - _EPS) / size)))
+        return range(first, last + 1)
+
+    def index(self, x: float, y: float, z: float) -> Tuple[int, int, int]:
+        return (
+            min(self.nx - 1, max(0, int(x / self.cx))),
+            min(self.ny - 1, max(0, int(y / self.cy))),
+            min(self.nz - 1, max(0, int(z / self.cz))),
+        )
+
+    def insert(self, index: int, cuboid: Cuboid) -> None:
+        x0, y0, z0, x1, y1, z1 = cuboid
+        for i in self._span(x0, x1, self.cx, self.nx):
+            for j in self._span(y0, y1, self.cy, self.ny):
+                for k in self._span(z0, z1, self.cz, self.nz):
+                    self.cells.setdefault((i, j, k), []).append(index)
+
+    def query(self, x0: float, y0: float, z0: float, x1: float, y1: float, z1: float) -> Set[int]:
+        found: Set[int] = set()
+        cells = self.cells
+        for i in self._span(x0, x1, self.cx, self.nx):
+            for j in self._span(y0, y1, self.cy, self.ny):
+                for k in self._span(z0, z1, self.cz, self.nz):
+                    bucket = cells.get((i, j, k))
+                    if bucket:
+                        found.update(bucket)
+        return found
+
+
+def grid_cell_size(truck: Truck_t, boxes: List[Box_t]) -> float:
+    """
+    Grid pitch: the median of the boxes' smallest dimension, so a box typically spans a
+    handful of cells whatever the units.
+    """
+    if not boxes:
+        return max(truck.width, truck.height, truck.depth, _EPS)
+    smallest = sorted(min(b.width, b.height, b.depth) for b in boxes)
+    return max(smallest[len(smallest) // 2], _EPS)
+
+
+class ExtremePointPacker:
+    """
+    3D extreme-point packer for a whole truck.
+
+    Placed boxes live in a CuboidGrid. Candidate positions are extreme points: the corners
+    of placed boxes projected back towards the walls, floor and other boxes, ordered by
+    PointKey. A box goes to the first point, in that order, where one of its orientations
+    fits inside the truck, overlaps nothing and has its whole footprint on the floor or on
+    box tops (the layer heuristics stack the same way).
+
+    Placed boxes never move, so failures are remembered instead of re-tested:
+        - each point keeps obstacle corners (ox, oy, oz), offsets from the point beyond which
+          a box is rejected: the nearest walls and boxes along +x, +y and +z when the point
+          is first tried, then every box a candidate collided with there and every footprint
+          that was not fully supported. A box larger than one corner on all three axes is
+          rejected without touching the grid
+        - the largest cube the corners leave (the point's capacity) sorts points into
+          EP_CAPACITY_BUCKETS heaps, and a box only looks at heaps whose capacity can hold
+          its smallest side
+        - points are dropped for good once a box covers them, once they are left hanging
+          above the floor with no box top under them, or once the smallest remaining box is
+          over their capacity
+        - points a SKU fails on are set aside until the next SKU, so a run of identical boxes
+          never re-tests them
+        - shapes that fit nowhere are kept, and boxes containing one of them fail at once
+    Support is the exception: a spot that only becomes supported by boxes placed after a
+    failure there is not reconsidered. That case is given up for the speed.
+    """
+
+    def __init__(self, truck: Truck_t, cell: float, largest: float):
+        self.truck = truck
+        self.cuboids: List[Cuboid] = []
+        self.grid = CuboidGrid(truck, cell)
+        self.known: Set[PointKey] = set()
+        self.points_created = 0
+
+        # Capacity range covered by one heap; points not tried yet sit in the last one
+        self._pitch = max(largest, _EPS) / EP_CAPACITY_BUCKETS
+        self._heaps: List[List[PointKey]] = [[] for _ in range(EP_CAPACITY_BUCKETS + 1)]
+        self._capacity: Dict[PointKey, float] = {}
+        self._add_point(0.0, 0.0, 0.0)
+
+        # Points the current SKU failed on, returned to the heaps when the SKU changes
+        self._sku: Optional[Tuple[float, float, float, bool]] = None
+        self._set_aside: List[PointKey] = []
+        self._obstacles: Dict[PointKey, List[Obstacle]] = {}
+        self._failed: List[Shape] = []
+
+    def _bucket(self, capacity: float) -> int:
+        return min(EP_CAPACITY_BUCKETS, int(min(capacity / self._pitch, EP_CAPACITY_BUCKETS)))
+
+    def _push(self, key: PointKey) -> None:
+        heapq.heappush(self._heaps[self._bucket(self._capacity.get(key, math.inf))], key)
+
+    def _pop(self, smallest: float) -> Optional[PointKey]:
+        # First point, in PointKey order, among the heaps that may hold a cube of side `smallest`
+        heaps = self._heaps
+        heads = [(heaps[b][0], b) for b in range(self._bucket(smallest - 2 * _EPS), len(heaps)) if heaps[b]]
+        if not heads:
+            return None
+        return heapq.heappop(heaps[min(heads)[1]])
+
+    def check(self, x: float, y: float, z: float, w: float, h: float, d: float) -> Tuple[bool, Optional[Cuboid]]:
+        """
+        Whether a (w, h, d) box fits with its min corner at (x, y, z): inside the truck,
+        overlapping no placed box and fully supported. On a collision, also the box hit.
+        """
+        truck = self.truck
+        x1, y1, z1 = x + w, y + h, z + d
+        if x1 > truck.width + _EPS or y1 > truck.height + _EPS or z1 > truck.depth + _EPS:
+            return False, None
+
+        support = 0.0
+        cuboids = self.cuboids
+        # Starts just below y so the tops the box would rest on are found too
+        for n in self.grid.query(x, y - 2 * _EPS, z, x1, y1, z1):
+            bx0, by0, bz0, bx1, by1, bz1 = cuboids[n]
+            ox = min(x1, bx1) - max(x, bx0)
+            oz = min(z1, bz1) - max(z, bz0)
+            if ox <= _EPS or oz <= _EPS:
+                continue
+            if by0 < y1 - _EPS and by1 > y + _EPS:
+                return False, cuboids[n]
+            if abs(by1 - y) <= _EPS:
+                support += ox * oz
+
+        return y <= _EPS or support >= w * d - _EPS, None
+
+    def _cell(self, i: int, j: int, k: int) -> List[int]:
+        return self.grid.cells.get((i, j, k), [])
+
+    def covered(self, x: float, y: float, z: float) -> bool:
+        for n in self._cell(*self.grid.index(x, y, z)):
+            bx0, by0, bz0, bx1, by1, bz1 = self.cuboids[n]
+            if bx0 - _EPS <= x < bx1 - _EPS and bz0 - _EPS <= z < bz1 - _EPS and by0 - _EPS <= y < by1 - _EPS:
+                return True
+        return False
+
+    def _drop(self, x: float, y: float, z: float) -> float:
+        # Highest box top at or below y under (x, z), else the floor. Walks bands downwards:
+        # the first band holding such a top holds the highest one.
+        i, top_band, k = self.grid.index(x, y, z)
+        for j in range(top_band, -1, -1):
+            best = 0.0
+            for n in self._cell(i, j, k):
+                bx0, _, bz0, bx1, by1, bz1 = self.cuboids[n]
+                if bx0 - _EPS <= x < bx1 - _EPS and bz0 - _EPS <= z < bz1 - _EPS and best < by1 <= y + _EPS:
+                    best = by1
+            if best > 0.0:
+                return best
+        return 0.0
+
+    def _slide_z(self, x: float, y: float, z: float) -> float:
+        # Nearest box back face at or in front of z along the line (x, y), else the front wall.
+        # Walks cells from z towards the front and stops once no nearer face is possible.
+        grid = self.grid
+        i, j, start = grid.index(x, y, z - _EPS)
+        best = 0.0
+        for k in range(start, -1, -1):
+            for n in self._cell(i, j, k):
+                bx0, by0, _, bx1, by1, bz1 = self.cuboids[n]
+                if bx0 - _EPS <= x < bx1 - _EPS and by0 - _EPS <= y < by1 - _EPS and best < bz1 <= z + _EPS:
+                    best = bz1
+            if best >= k * grid.cz - _EPS:
+                break
+        return best
+
+    def _slide_x(self, x: float, y: float, z: float) -> float:
+        grid = self.grid
+        start, j, k = grid.index(x - _EPS, y, z)
+        best = 0.0
+        for i in range(start, -1, -1):
+            for n in self._cell(i, j, k):
+                _, by0, bz0, bx1, by1, bz1 = self.cuboids[n]
+                if bz0 - _EPS <= z < bz1 - _EPS and by0 - _EPS <= y < by1 - _EPS and best < bx1 <= x + _EPS:
+                    best = bx1
+            if best >= i * grid.cx - _EPS:
+                break
+        return best
+
+    def _supported_run(self, x: float, y: float, z: float, along_x: bool, limit: float) -> float:
+        # How far box tops at height y continue without a gap from (x, z) along +x (or +z)
+        start = x if along_x else z
+        cur = start
+        while cur < limit - _EPS:
+            px, pz = (cur, z) if along_x else (x, cur)
+            reached = cur
+            for n in self._cell(*self.grid.index(px, y - 2 * _EPS, pz)):
+                bx0, _, bz0, bx1, by1, bz1 = self.cuboids[n]
+                if abs(by1 - y) <= _EPS and bx0 - _EPS <= px < bx1 - _EPS and bz0 - _EPS <= pz < bz1 - _EPS:
+                    reached = max(reached, bx1 if along_x else bz1)
+            if reached <= cur:
+                break
+            cur = reached
+        return min(cur, limit) - start
+
+    def _reach(self, x: float, y: float, z: float, max_side: float) -> Optional[List[Obstacle]]:
+        """
+        Initial obstacle corners of a point: the free distance to the nearest box or wall along
+        +x, +y and +z, with x and z capped above the floor by the run of box tops the point
+        stands on. None for a dead point: inside a box, or hanging with no box top under it.
+        Distances past `max_side` (the largest side of any box still to come) are not looked at.
+        """
+        if self.covered(x, y, z) or (y > _EPS and abs(self._drop(x, y, z) - y) > _EPS):
+            return None
+
+        grid, cuboids, truck = self.grid, self.cuboids, self.truck
+        i, j, k = grid.index(x, y, z)
+
+        up = min(truck.height, y + max_side)
+        for jj in range(j, grid.ny):
+            if up <= jj * grid.cy + _EPS:
+                break
+            for n in self._cell(i, jj, k):
+                bx0, by0, bz0, bx1, _, bz1 = cuboids[n]
+                if bx0 - _EPS <= x < bx1 - _EPS and bz0 - _EPS <= z < bz1 - _EPS and y - _EPS <= by0 < up:
+                    up = by0
+
+        right = min(truck.width, x + max_side)
+        for ii in range(i, grid.nx):
+            if right <= ii * grid.cx + _EPS:
+                break
+            for n in self._cell(ii, j, k):
+                bx0, by0, bz0, _, by1, bz1 = cuboids[n]
+                if bz0 - _EPS <= z < bz1 - _EPS and by0 - _EPS <= y < by1 - _EPS and x - _EPS <= bx0 < right:
+                    right = bx0
+
+        back = min(truck.depth, z + max_side)
+        for kk in range(k, grid.nz):
+            if back <= kk * grid.cz + _EPS:
+                break
+            for n in self._cell(i, j, kk):
+                bx0, by0, bz0, bx1, by1, _ = cuboids[n]
+                if bx0 - _EPS <= x < bx1 - _EPS and by0 - _EPS <= y < by1 - _EPS and z - _EPS <= bz0 < back:
+                    back = bz0
+
+        if y > _EPS:
+            right = x + self._supported_run(x, y, z, True, right)
+            back = z + self._supported_run(x, y, z, False, back)
+        return [(right - x, 0.0, 0.0), (0.0, up - y, 0.0), (0.0, 0.0, back - z)]
+
+    def _add_point(self, x: float, y: float, z: float) -> None:
+        truck = self.truck
+        if x >= truck.width - _EPS or y >= truck.height - _EPS or z >= truck.depth - _EPS:
+            return
+        key = (y, z, x)
+        if key in self.known:
+            return
+        self.known.add(key)
+        self.points_created += 1
+        self._push(key)
+
+    def _drop_point(self, key: PointKey) -> None:
+        self.known.discard(key)
+        self._obstacles.pop(key, None)
+        self._capacity.pop(key, None)
+
+    def _commit(self, x: float, y: float, z: float, w: float, h: float, d: float) -> None:
+        cuboid = (x, y, z, x + w, y + h, z + d)
+        self.grid.insert(len(self.cuboids), cuboid)
+        self.cuboids.append(cuboid)
+
+        # The three corners next to the min corner, each also projected along the other two axes
+        right, top, back = x + w, y + h, z + d
+        self._add_point(right, y, z)
+        self._add_point(right, self._drop(right, y, z), z)
+        self._add_point(right, y, self._slide_z(right, y, z))
+        self._add_point(x, top, z)
+        self._add_point(self._slide_x(x, top, z), top, z)
+        self._add_point(x, top, self._slide_z(x, top, z))
+        self._add_point(x, y, back)
+        self._add_point(self._slide_x(x, y, back), y, back)
+        self._add_point(x, self._drop(x, y, back), back)
+
+    def occupy(self, x: float, y: float, z: float, w: float, h: float, d: float) -> None:
+        """
+        Adds a box that is already in place, such as one kept from an earlier layout, with the
+        extreme points of its corners. Boxes should come bottom first, in PointKey order, as
+        place() would have put them; points they cover are dropped when next popped.
+        """
+        self._commit(x, y, z, w, h, d)
+
+    def place(self, box: Box_t, min_side: float, max_side: float) -> Optional[PlacedBox_t]:
+        """
+        Places `box` at the first extreme point that takes one of its orientations, or returns
+        None. `min_side` and `max_side` are the smallest and largest dimension of any box still
+        to come (this one included).
+        """
+        sku = (box.width, box.height, box.depth, box.rotatable)
+        if sku != self._sku:
+            for key in self._set_aside:
+                self._push(key)
+            self._set_aside = []
+            self._sku = sku
+
+        shape = shape_of(box)
+        if any(contains(shape, failed) for failed in self._failed):
+            return None
+
+        table = orientations_of(box)
+        smallest = min(box.width, box.height, box.depth)
+        while True:
+            key = self._pop(smallest)
+            if key is None:
+                break
+            y, z, x = key
+            obstacles = self._obstacles.get(key)
+            if obstacles is None:
+                obstacles = self._reach(x, y, z, max_side)
+                if obstacles is None:
+                    self._drop_point(key)
+                    continue
+                self._obstacles[key] = obstacles
+                self._capacity[key] = _capacity(obstacles)
+            capacity = self._capacity[key]
+            if min_side > capacity + _EPS:
+                self._drop_point(key)
+                continue
+            if smallest > capacity + _EPS:
+                self._set_aside.append(key)
+                continue
+
+            for w, h, d, rotation in table:
+                if _blocked(obstacles, w, h, d):
+                    continue
+                ok, hit = self.check(x, y, z, w, h, d)
+                if ok:
+                    self._drop_point(key)
+                    self._commit(x, y, z, w, h, d)
+                    return PlacedBox_t(id=box.id, x=x, y=y, z=z, rotation=rotation)
+                if hit is not None:
+                    _add_obstacle(obstacles, (max(0.0, hit[0] - x), max(0.0, hit[1] - y), max(0.0, hit[2] - z)))
+                else:
+                    # Walls are already obstacles, so this footprint is unsupported, and so is any
+                    # footprint containing it, whatever the height
+                    _add_obstacle(obstacles, (w - 2 * _EPS, 0.0, d - 2 * _EPS))
+            self._capacity[key] = _capacity(obstacles)
+
+            self._set_aside.append(key)
+
+        self._failed = [f for f in self._failed if not contains(f, shape)] + [shape]
+        return None
+
+
+def iter_extreme_point_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+) -> Iterator[RegionResult]:
+    """
+    Packs the whole load with one ExtremePointPacker, in the given box order, yielding a
+    RegionResult (heuristic "EP", region = the whole truck) for every EP_CHECK_EVERY boxes
+    processed, so stream_pack can send placements as they are committed.
+
+    `boxes` is mutated like layer_pack: after exhaustion it holds the unplaced boxes. The
+    budget, cancel token and stop_volume are checked between batches; once the budget is
+    exhausted the run stops, sets `budget.truncated` and leaves the remaining boxes unplaced.
+    The last result carries a summary note.
+    """
+    whole = PackRegion(x=0.0, y=0.0, z=0.0, width=truck.width, depth=truck.depth, height=truck.height)
+    unplaced: List[Box_t] = []
+    placed_count = 0
+    volume = 0.0
+
+    # Smallest and largest dimension among boxes[i:]: points no remaining box can use are
+    # dropped, and free space is only measured as far as a remaining box could reach
+    min_side = [0.0] * len(boxes)
+    max_side = [0.0] * len(boxes)
+    low, high = math.inf, 0.0
+    for i in range(len(boxes) - 1, -1, -1):
+        low = min(low, boxes[i].width, boxes[i].height, boxes[i].depth)
+        high = max(high, boxes[i].width, boxes[i].height, boxes[i].depth)
+        min_side[i], max_side[i] = low, high
+
+    packer = ExtremePointPacker(truck, grid_cell_size(truck, boxes), high)
+    pending = list(boxes)
+    for index, start in enumerate(range(0, len(pending), EP_CHECK_EVERY)):
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if budget is not None and budget.exhausted:
+            budget.truncated = True
+            unplaced.extend(pending[start:])
+            break
+        if stop_volume is not None and volume >= stop_volume:
+            unplaced.extend(pending[start:])
+            break
+
+        batch: List[PlacedBox_t] = []
+        for i in range(start, min(start + EP_CHECK_EVERY, len(pending))):
+            box = pending[i]
+            pb = packer.place(box, min_side[i], max_side[i])
+            if pb is None:
+                unplaced.append(box)
+                continue
+            batch.append(pb)
+            volume += box.volume
+
+        placed_count += len(batch)
+        boxes[:] = unplaced + pending[start + EP_CHECK_EVERY:]
+        yield RegionResult(index=index, region=whole, heuristic="EP", placed=batch, notes=[])
+
+    boxes[:] = unplaced
+    yield RegionResult(
+        index=len(pending) // EP_CHECK_EVERY + 1,
+        region=whole,
+        heuristic="EP",
+        placed=[],
+        notes=[
+            f"\n> Extreme points: placed={placed_count} | unplaced={len(unplaced)} | "
+            f"points={packer.points_created} | grid={packer.grid.nx}x{packer.grid.ny}x{packer.grid.nz}"
+        ],
+    )
+
+
+def extreme_point_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+) -> Tuple[List[PlacedBox_t], List[str]]:
+    """
+    Collects iter_extreme_point_pack into (placed, notes), like layer_pack.
+    """
+    placed: List[PlacedBox_t] = []
+    notes: List[str] = []
+    for result in iter_extreme_point_pack(truck, boxes, budget=budget, cancel=cancel, stop_volume=stop_volume):
+        placed.extend(result.placed)
+        notes.extend(result.notes)
+    return placed, notes
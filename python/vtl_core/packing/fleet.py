@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from python.api.schemas import Box
+from python.vtl_core.bounds import compute_bounds, fits_truck
+from python.vtl_core.domain.models import Box_t, Truck_t
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+from python.vtl_core.packing.processing import begin_pack
+from python.vtl_core.packing.search import default_workers, task_pool
+
+_EPS = 1e-9
+
+# Box volume first offered to a truck, as a fraction of its volume; later rounds offer it up to
+# the volume its layout leaves free
+FLEET_FILL = 0.9
+
+# Assignment rounds: each re-offers the boxes the previous round left over to trucks with room
+FLEET_MAX_ROUNDS = 4
+
+# (truck index, boxes offered to the truck this round)
+Offer = Tuple[int, List[Box_t]]
+
+
+def assign_boxes(
+    trucks: List[Truck_t],
+    boxes: List[Box_t],
+    volume_left: List[float],
+    weight_left: List[float],
+    tried: Set[Tuple[int, str]],
+) -> Tuple[List[Offer], List[Box_t]]:
+    """
+    First-fit assignment of `boxes`, in the caller's order, to the trucks, in fleet order: a box
+    goes to the first truck it fits in, that has not been offered it before (`tried`) and whose
+    `volume_left` and `weight_left` still take it. Both lists are reduced by what is assigned.
+
+    Returns the offers, one per truck that got boxes, and the boxes no truck could take.
+    """
+    offered: Dict[int, List[Box_t]] = {}
+    rest: List[Box_t] = []
+    for box in boxes:
+        for t, truck in enumerate(trucks):
+            if (t, box.id) in tried or not fits_truck(box, truck):
+                continue
+            if box.volume > volume_left[t] + _EPS or box.weight > weight_left[t] + _EPS:
+                continue
+            offered.setdefault(t, []).append(box)
+            volume_left[t] -= box.volume
+            weight_left[t] -= box.weight
+            break
+        else:
+            rest.append(box)
+    return sorted(offered.items()), rest
+
+
+def pack_truck(truck: Truck_t, boxes: List[Box_t], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Packs one truck of the fleet with begin_pack. The result also lists the ids of the unplaced
+    boxes, which the caller matches back to its own boxes: a pool worker packs copies.
+    """
+    result = begin_pack(truck, boxes, **options)
+    result["unplaced_ids"] = [b.id for b in boxes]
+    return result
+
+
+def _inside(inner: Truck_t, outer: Truck_t) -> bool:
+    return inner.width <= outer.width + _EPS and inner.height <= outer.height + _EPS and inner.depth <= outer.depth + _EPS
+
+
+def fleet_pack(
+    trucks: List[Truck_t],
+    boxes: List[Box_t],
+    workers: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    unit_scale: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Distributes one manifest across several trucks and packs each truck with begin_pack.
+
+    Every round offers the pending boxes to the trucks first-fit (see assign_boxes): up to
+    FLEET_FILL of an empty truck's volume, up to the volume its layout leaves free once it is
+    packed, and never beyond its max_weight.
+    Trucks are independent once their boxes are assigned, so a round packs them concurrently, in
+    `workers` processes when it is large enough. A truck that was packed before is repacked with
+    its placed boxes plus the new offer, and the new layout is only kept if it places more
+    volume. Boxes a truck could not take are offered to the other trucks in the next round;
+    rounds stop after FLEET_MAX_ROUNDS, once nothing is offered or when the budget runs out.
+
+    `options` are passed to begin_pack (quality, mode, engine, ...). The remaining time budget
+    is handed to each round's trucks; the cancel token is checked between trucks and only
+    reaches in-process packs.
+
+    Returns a payload with one layout per truck, in fleet order, the boxes no truck took and the
+    fleet utilization (placed volume over the volume of the trucks used). With `unit_scale`,
+    the boxes no truck took are integer copies, as in begin_pack_internal.
+    """
+    start_time = time.time()
+    workers = max(1, workers or default_workers())
+    budget = TimeBudget(time_budget_ms)
+    order = {b.id: i for i, b in enumerate(boxes)}
+    layouts: Dict[int, Dict[str, Any]] = {}
+    loads: List[List[Box_t]] = [[] for _ in trucks]
+    volume_left = [truck.volume * FLEET_FILL for truck in trucks]
+    weight_left = [truck.max_weight if truck.max_weight is not None else float("inf") for truck in trucks]
+    tried: Set[Tuple[int, str]] = set()
+    pending: List[Box_t] = []
+    unfit: List[Box_t] = []
+    for box in boxes:
+        (pending if any(fits_truck(box, truck) for truck in trucks) else unfit).append(box)
+    rounds = 0
+    parallel_rounds = 0
+
+    while pending and rounds < FLEET_MAX_ROUNDS:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if budget.exhausted:
+            budget.truncated = True
+            break
+
+        offers, rest = assign_boxes(trucks, pending, volume_left, weight_left, tried)
+        if not offers:
+            break
+        rounds += 1
+
+        remaining_ms = None if time_budget_ms is None else max(time_budget_ms - budget.elapsed_ms(), 1.0)
+        tasks = [
+            (trucks[t], sorted(loads[t] + offer, key=lambda b: order[b.id]), offer)
+            for t, offer in offers
+        ]
+        round_boxes = sum(len(load) for _, load, _ in tasks)
+        pool = task_pool(workers, len(tasks), round_boxes)
+        if pool is not None:
+            parallel_rounds += 1
+            round_options = {**options, "time_budget_ms": remaining_ms, "unit_scale": unit_scale, "workers": 1}
+            results = pool.map(pack_truck, *zip(*((truck, list(load), round_options) for truck, load, _ in tasks)))
+        else:
+            round_options = {
+                **options, "time_budget_ms": remaining_ms, "unit_scale": unit_scale, "workers": workers, "cancel": cancel,
+            }
+            results = (pack_truck(truck, list(load), round_options) for truck, load, _ in tasks)
+
+        returned: List[Box_t] = []
+        for (t, offer), (truck, load, _), result in zip(offers, tasks, results):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            if result["truncated"]:
+                budget.truncated = True
+            tried.update((t, b.id) for b in offer)
+
+            left_ids = set(result["unplaced_ids"])
+            placed = [b for b in load if b.id not in left_ids]
+            if t in layouts and sum(b.volume for b in placed) <= sum(b.volume for b in loads[t]) + _EPS:
+                # Keep the previous layout; the whole offer moves on
+                volume_left[t] += sum(b.volume for b in offer)
+                weight_left[t] += sum(b.weight for b in offer)
+                returned.extend(offer)
+                continue
+
+            layouts[t] = result
+            loads[t] = placed
+            volume_left[t] = truck.volume - sum(b.volume for b in placed)
+            weight_left[t] += sum(b.weight for b in load if b.id in left_ids)
+            returned.extend(b for b in load if b.id in left_ids)
+
+        pending = sorted(rest + returned, key=lambda b: order[b.id])
+
+    unplaced = sorted(unfit + pending, key=lambda b: order[b.id])
+    used = [t for t in range(len(trucks)) if loads[t]]
+    placed_volume = sum(b.volume for t in used for b in loads[t])
+    used_volume = sum(trucks[t].volume for t in used)
+
+    truck_layouts = []
+    for t, truck in enumerate(trucks):
+        result = layouts.get(t) if loads[t] else None
+        truck_layouts.append({
+            "truck_id": truck.id,
+            "placed": result["placed"] if result else [],
+            "utilization": result["utilization"] if result else 0.0,
+            "notes": result["notes"] if result else [],
+            "truncated": result["truncated"] if result else False,
+            "search": result["search"] if result else None,
+            "gap": result["gap"] if result else None,
+        })
+
+    notes = [
+        f"\n[FLEET] trucks={len(trucks)} | used={len(used)} | rounds={rounds} | "
+        f"parallel rounds={parallel_rounds} | workers={workers} | unplaced={len(unplaced)}"
+    ]
+    if budget.truncated:
+        notes.append(f"\n> TRUNCATED: time budget of {time_budget_ms:.0f} ms exhausted with {len(unplaced)} boxes unplaced.")
+
+    return {
+        "trucks": truck_layouts,
+        "unplaced": [Box.model_validate(b) for b in unplaced],
+        "utilization": placed_volume / used_volume if used_volume > 0 else 0.0,
+        "runtime_ms": (time.time() - start_time) * 1000,
+        "notes": notes,
+        "truncated": budget.truncated,
+    }
+
+
+def select_truck(
+    trucks: List[Truck_t],
+    costs: List[float],
+    boxes: List[Box_t],
+    workers: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    unit_scale: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Picks the cheapest truck of a catalogue that takes the whole load, and its layout.
+
+    Trucks whose compute_bounds rule out placing every box (dimensions, volume), or whose
+    max_weight is below the load's weight, are pruned. The rest are packed with begin_pack largest first, up to `workers` at a time when the
+    load is large enough. A truck is skipped without packing when a confirmed fit is cheaper (ties
+    go to the smaller, then the earlier truck), or when it fits inside a truck that could not
+    take the load. With several workers, trucks already running when such a result arrives are
+    still reported, so the candidate statuses, but not the layout of any truck, can depend on
+    `workers`.
+
+    When no truck fits, the one that placed the most volume is returned with fits False.
+    `options` are passed to begin_pack, as in fleet_pack, and the unplaced boxes are integer
+    copies with `unit_scale`, as in fleet_pack.
+    """
+    start_time = time.time()
+    workers = max(1, workers or default_workers())
+    budget = TimeBudget(time_budget_ms)
+    candidates: List[Dict[str, Any]] = [
+        {"truck_id": truck.id, "cost": cost, "status": "pruned"} for truck, cost in zip(trucks, costs)
+    ]
+    load_weight = sum(b.weight for b in boxes)
+    queue = [
+        t for t, truck in enumerate(trucks)
+        if compute_bounds(truck, boxes).max_count >= len(boxes)
+        and (truck.max_weight is None or load_weight <= truck.max_weight + _EPS)
+    ]
+    queue.sort(key=lambda t: (-trucks[t].volume, t))
+    pool = task_pool(workers, len(queue), len(boxes))
+    results: Dict[int, Dict[str, Any]] = {}
+    failed: List[int] = []
+    best: Optional[int] = None
+
+    def rank(t: int) -> Tuple[float, float, int]:
+        return costs[t], trucks[t].volume, t
+
+    def record(t: int, result: Dict[str, Any]) -> None:
+        nonlocal best
+        fits = not result["unplaced"]
+        results[t] = result
+        candidates[t].update(
+            status="fits" if fits else "does_not_fit",
+            placed_count=len(result["placed"]),
+            utilization=result["utilization"],
+        )
+        if result["truncated"]:
+            budget.truncated = True
+        if not fits:
+            failed.append(t)
+        elif best is None or rank(t) < rank(best):
+            best = t
+
+    running: Dict[Future, int] = {}
+    try:
+        while queue or running:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+            # Fill the free slots, largest truck first
+            while queue and len(running) < (workers if pool is not None else 1):
+                t = queue.pop(0)
+                beaten = best is not None and rank(best) < rank(t)
+                if beaten or any(_inside(trucks[t], trucks[f]) for f in failed) or budget.exhausted:
+                    budget.truncated = budget.truncated or budget.exhausted
+                    candidates[t]["status"] = "skipped"
+                    continue
+                remaining_ms = None if time_budget_ms is None else max(time_budget_ms - budget.elapsed_ms(), 1.0)
+                truck_options = {**options, "time_budget_ms": remaining_ms, "unit_scale": unit_scale}
+                if pool is not None:
+                    running[pool.submit(pack_truck, trucks[t], list(boxes), {**truck_options, "workers": 1})] = t
+                else:
+                    record(t, pack_truck(trucks[t], list(boxes), {**truck_options, "workers": workers, "cancel": cancel}))
+
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: running[f]):
+                    record(running.pop(future), future.result())
+    finally:
+        # Trucks still queued in the shared pool are dropped; running ones finish unread
+        for future in running:
+            future.cancel()
+
+    chosen = best
+    if chosen is None and results:
+        chosen = min(results, key=lambda t: (-results[t]["utilization"] * trucks[t].volume, rank(t)))
+    result = results.get(chosen) if chosen is not None else None
+
+    statuses = [c["status"] for c in candidates]
+    notes = [
+        f"\n[SELECT] trucks={len(trucks)} | pruned={statuses.count('pruned')} | "
+        f"evaluated={len(results)} | skipped={statuses.count('skipped')} | "
+        f"chosen={trucks[chosen].id if chosen is not None else None} | fits={best is not None}"
+    ]
+
+    return {
+        "truck_id": trucks[chosen].id if chosen is not None else None,
+        "cost": costs[chosen] if chosen is not None else None,
+        "fits": best is not None,
+        "placed": result["placed"] if result else [],
+        "unplaced": result["unplaced"] if result else [Box.model_validate(b) for b in boxes],
+        "utilization": result["utilization"] if result else 0.0,
+        "runtime_ms": (time.time() - start_time) * 1000,
+        "notes": notes + (result["notes"] if result else []),
+        "truncated": budget.truncated,
+        "search": result["search"] if result else None,
+        "gap": result["gap"] if result else None,
+        "candidates": candidates,
+    }
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from python.vtl_core.domain.models import Box_t, PackRegion, PlacedBox_t, RegionResult, Truck_t
+from python.vtl_core.orientations import orientations_of
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+
+_EPS = 1e-9
+
+# Default heightmap cell size in metres (scaled by unit_scale in integer geometry)
+HM_RESOLUTION = 0.05
+
+# Most grid cells a packer allocates; a finer resolution is coarsened to stay within it (each
+# cell costs four float64 arrays, so 1M cells take 32 MB)
+HM_MAX_CELLS = 1_000_000
+
+# Boxes processed between two budget / cancel / stop_volume checks (and per streamed chunk)
+HM_CHECK_EVERY = 64
+
+# Grid cells of sliding windows kept between boxes (over all orientations), and how many
+# placements a kept window is brought up to date with before it is recomputed instead
+HM_CACHE_CELLS = 4_000_000
+HM_REPLAY_CHANGES = 32
+
+# Height written to cells a box top only partly covers: lower than any real height, so a
+# window containing one is never flat
+_UNSUPPORTED = -1.0
+
+# (cells along x, cells along z, height) of one orientation on the grid
+CellShape = Tuple[int, int, float]
+
+# CellShape plus the cover its last column and last row need, as fractions of a cell
+OrientationKey = Tuple[int, int, float, float, float]
+
+
+def cells_for(length: float, resolution: float) -> int:
+    """
+    Cells a box side occupies: rounded up, so the box always stays inside its cells.
+    """
+    return max(1, math.ceil(length / resolution - _EPS))
+
+
+def grid_resolution(truck: Truck_t, resolution: float) -> float:
+    """
+    `resolution`, coarsened where needed so the truck floor holds at most HM_MAX_CELLS cells.
+    """
+    return max(resolution, math.sqrt(truck.width * truck.depth / HM_MAX_CELLS))
+
+
+def sliding(field: np.ndarray, size: int, axis: int, op: Callable) -> np.ndarray:
+    """
+    `op` (np.maximum / np.minimum) over every run of `size` consecutive cells along `axis`.
+    The result is `size - 1` cells shorter on that axis. Runs in O(log size) array passes by
+    doubling the window, then covering the remainder with one overlapping pass.
+    """
+    def part(a: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        return a[lo:hi] if axis == 0 else a[:, lo:hi]
+
+    out, span = field, 1
+    while span * 2 <= size:
+        n = out.shape[axis]
+        out = op(part(out, 0, n - span), part(out, span, n))
+        span *= 2
+    if span < size:
+        n, rest = out.shape[axis], size - span
+        out = op(part(out, 0, n - rest), part(out, rest, n))
+    return out
+
+
+class HeightmapPacker:
+    """
+    Packs a whole truck on a 2D height field over its floor.
+
+    The floor is cut into square cells of `resolution` (rows along z, columns along x), at most
+    HM_MAX_CELLS of them (see grid_resolution). `top` holds the highest box top over each cell.
+    Boxes start on cell corners and occupy whole cells, rounded up, so the top over a cell is
+    covered from the cell's low corner: `cover_x` and `cover_z` hold how much of the cell it
+    covers, as fractions of a cell. Boxes always sit on the heightmap, so nothing is ever placed
+    under a box.
+
+    For one orientation of a*b cells, a sliding window max of `top` gives the height the box
+    would rest at from every origin. A sliding window min over `top`, with the cells whose
+    cover is too small for the box's footprint replaced by _UNSUPPORTED, tells whether that
+    footprint is flat and fully supported: the box fits where the min equals the max and its
+    top stays under the roof. The box takes the lowest such origin, then the frontmost, then
+    the leftmost, over all its orientations.
+
+    The windows of the most recently used orientations, up to HM_CACHE_CELLS cells, are kept
+    and, after a placement, only recomputed for the origins whose window overlaps the changed
+    cells. An orientation
+    that fits nowhere keeps failing until the next placement, and so does any larger one, so
+    failed cell shapes are remembered until a box is placed.
+    """
+
+    def __init__(self, truck: Truck_t, resolution: float):
+        self.truck = truck
+        self.resolution = resolution = grid_resolution(truck, resolution)
+        self.nx = max(0, math.floor(truck.width / resolution + _EPS))
+        self.nz = max(0, math.floor(truck.depth / resolution + _EPS))
+        self.top = np.zeros((self.nz, self.nx))
+        self.cover_x = np.ones((self.nz, self.nx))
+        self.cover_z = np.ones((self.nz, self.nx))
+        # `top` where the whole cell is covered, else _UNSUPPORTED
+        self.full = np.zeros((self.nz, self.nx))
+
+        # Cells changed by each placement, (row0, row1, col0, col1), and per orientation the
+        # number of placements its windows are up to date with, with (rest, fits)
+        self._changes: List[Tuple[int, int, int, int]] = []
+        self._windows: "OrderedDict[OrientationKey, Tuple[int, np.ndarray, np.ndarray]]" = OrderedDict()
+        self._cached_shapes = max(1, HM_CACHE_CELLS // max(1, self.nx * self.nz))
+        self._failed: List[CellShape] = []
+
+    def _supporting(self, need_x: float, need_z: float, rows: slice, cols: slice) -> np.ndarray:
+        # `top` where the cover reaches (need_x, need_z), else _UNSUPPORTED
+        if need_x >= 1.0 - _EPS and need_z >= 1.0 - _EPS:
+            return self.full[rows, cols]
+        covered = (self.cover_x[rows, cols] >= need_x - _EPS) & (self.cover_z[rows, cols] >= need_z - _EPS)
+        return np.where(covered, self.top[rows, cols], _UNSUPPORTED)
+
+    def _compute(self, key: OrientationKey, r0: int, r1: int, c0: int, c1: int) -> Tuple[np.ndarray, np.ndarray]:
+        # (rest, fits) for the origins in rows r0..r1 and columns c0..c1
+        a, b, h, fx, fz = key
+        rows, cols = slice(r0, r1 + b - 1), slice(c0, c1 + a - 1)
+        n_r, n_c = r1 - r0, c1 - c0
+        rest = sliding(sliding(self.top[rows, cols], b, 0, np.maximum), a, 1, np.maximum)
+
+        # Footprint split into the inner cells and the partly covered last column, last row
+        # and corner: each part is a window over the cells meeting its cover requirement
+        floor = self._supporting(fx, fz, rows, cols)[b - 1:b - 1 + n_r, a - 1:a - 1 + n_c]
+        if b > 1:
+            edge = sliding(self._supporting(fx, 1.0, rows, cols), b - 1, 0, np.minimum)
+            floor = np.minimum(floor, edge[:n_r, a - 1:a - 1 + n_c])
+        if a > 1:
+            edge = sliding(self._supporting(1.0, fz, rows, cols), a - 1, 1, np.minimum)
+            floor = np.minimum(floor, edge[b - 1:b - 1 + n_r, :n_c])
+        if a > 1 and b > 1:
+            inner = sliding(sliding(self.full[rows, cols], b - 1, 0, np.minimum), a - 1, 1, np.minimum)
+            floor = np.minimum(floor, inner[:n_r, :n_c])
+
+        return rest, (floor >= rest - _EPS) & (rest + h <= self.truck.height + _EPS)
+
+    def _fits(self, key: OrientationKey) -> Tuple[np.ndarray, np.ndarray]:
+        a, b = key[0], key[1]
+        rows, cols = self.nz - b + 1, self.nx - a + 1
+        cached = self._windows.pop(key, None)
+        if cached is None or len(self._changes) - cached[0] > HM_REPLAY_CHANGES:
+            rest, fits = self._compute(key, 0, rows, 0, cols)
+        else:
+            _, rest, fits = cached
+            changes = self._changes[cached[0]:]
+            if changes:
+                # One pass over the origins whose window overlaps any cell changed since
+                r0 = max(0, min(c[0] for c in changes) - b + 1)
+                r1 = min(rows, max(c[1] for c in changes))
+                c0 = max(0, min(c[2] for c in changes) - a + 1)
+                c1 = min(cols, max(c[3] for c in changes))
+                rest[r0:r1, c0:c1], fits[r0:r1, c0:c1] = self._compute(key, r0, r1, c0, c1)
+
+        self._windows[key] = (len(self._changes), rest, fits)
+        if len(self._windows) > self._cached_shapes:
+            self._windows.popitem(last=False)
+        return rest, fits
+
+    def _best_origin(self, key: OrientationKey) -> Optional[Tuple[float, int, int]]:
+        # (rest height, row, column) of the lowest, frontmost, leftmost fitting origin
+        if key[0] > self.nx or key[1] > self.nz:
+            return None
+        rest, fits = self._fits(key)
+        if not fits.any():
+            return None
+        y = rest[fits].min()
+        row, col = divmod(int(np.argmax(fits & (rest <= y + _EPS))), fits.shape[1])
+        return float(y), row, col
+
+    def place(self, box: Box_t) -> Optional[PlacedBox_t]:
+        """
+        Places `box` at its lowest, frontmost, leftmost fitting origin, or returns None.
+        """
+        r = self.resolution
+        best: Optional[Tuple[float, int, int, float, float, float, int]] = None
+        for w, h, d, rotation in orientations_of(box):
+            a, b = cells_for(w, r), cells_for(d, r)
+            if any(a >= fa and b >= fb and h >= fh - _EPS for fa, fb, fh in self._failed):
+                continue
+            # Cover the last column / row needs, as a fraction of a cell
+            origin = self._best_origin((a, b, h, w / r - (a - 1), d / r - (b - 1)))
+            if origin is None:
+                self._failed.append((a, b, h))
+                continue
+            y, row, col = origin
+            if best is None or (y, row, col) < best[:3]:
+                best = (y, row, col, w, h, d, rotation)
+
+        if best is None:
+            return None
+
+        y, row, col, w, h, d, rotation = best
+        a, b = cells_for(w, r), cells_for(d, r)
+        block = (slice(row, row + b), slice(col, col + a))
+        self.top[block] = y + h
+        self.cover_x[block] = 1.0
+        self.cover_z[block] = 1.0
+        self.cover_x[row:row + b, col + a - 1] = min(1.0, w / r - (a - 1))
+        self.cover_z[row + b - 1, col:col + a] = min(1.0, d / r - (b - 1))
+        whole = (self.cover_x[block] >= 1.0 - _EPS) & (self.cover_z[block] >= 1.0 - _EPS)
+        self.full[block] = np.where(whole, y + h, _UNSUPPORTED)
+        self._changes.append((row, row + b, col, col + a))
+        self._failed = []
+        return PlacedBox_t(id=box.id, x=col * r, y=y, z=row * r, rotation=rotation)
+
+
+def iter_heightmap_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    resolution: float = HM_RESOLUTION,
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+) -> Iterator[RegionResult]:
+    """
+    Packs the whole load with one HeightmapPacker, in the given box order, yielding a
+    RegionResult (heuristic "HMAP", region = the whole truck) for every HM_CHECK_EVERY boxes
+    processed, so stream_pack can send placements as they are committed.
+
+    `boxes` is mutated like layer_pack: after exhaustion it holds the unplaced boxes. The
+    budget, cancel token and stop_volume are checked between batches; once the budget is
+    exhausted the run stops, sets `budget.truncated` and leaves the remaining boxes unplaced.
+    The last result carries a summary note.
+    """
+    packer = HeightmapPacker(truck, resolution)
+    whole = PackRegion(x=0.0, y=0.0, z=0.0, width=truck.width, depth=truck.depth, height=truck.height)
+    unplaced: List[Box_t] = []
+    placed_count = 0
+    volume = 0.0
+
+    pending = list(boxes)
+    for index, start in enumerate(range(0, len(pending), HM_CHECK_EVERY)):
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if budget is not None and budget.exhausted:
+            budget.truncated = True
+            unplaced.extend(pending[start:])
+            break
+        if stop_volume is not None and volume >= stop_volume:
+            unplaced.extend(pending[start:])
+            break
+
+        batch: List[PlacedBox_t] = []
+        for box in pending[start:start + HM_CHECK_EVERY]:
+            pb = packer.place(box)
+            if pb is None:
+                unplaced.append(box)
+                continue
+            batch.append(pb)
+            volume += box.volume
+
+        placed_count += len(batch)
+        boxes[:] = unplaced + pending[start + HM_CHECK_EVERY:]
+        yield RegionResult(index=index, region=whole, heuristic="HMAP", placed=batch, notes=[])
+
+    boxes[:] = unplaced
+    yield RegionResult(
+        index=len(pending) // HM_CHECK_EVERY + 1,
+        region=whole,
+        heuristic="HMAP",
+        placed=[],
+        notes=[
+            f"\n> Heightmap: placed={placed_count} | unplaced={len(unplaced)} | "
+            f"resolution={packer.resolution:g} | grid={packer.nx}x{packer.nz}"
+        ],
+    )
+
+
+def heightmap_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    resolution: float = HM_RESOLUTION,
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+) -> Tuple[List[PlacedBox_t], List[str]]:
+    """
+    Collects iter_heightmap_pack into (placed, notes), like layer_pack.
+    """
+    placed: List[PlacedBox_t] = []
+    notes: List[str] = []
+    for result in iter_heightmap_pack(
+        truck, boxes, resolution=resolution, budget=budget, cancel=cancel, stop_volume=stop_volume
+    ):
+        placed.extend(result.placed)
+        notes.extend(result.notes)
+    return placed, notes
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
 
 from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
 from python.vtl_core.domain.models import FreeRectTL, SkylineSeg
@@ -18,6 +18,7 @@ from python.vtl_core.utils import (
     _skyline_merge,
     _split_same_type_prefix,
     _height_cap,
+    _layer_orientations,
     _finalize_batch_result,
     HeuristicResult
 )
@@ -25,238 +26,220 @@ from python.vtl_core.utils import (
 _EPS = 1e-9
 
 
-def ff_row_pack(
-    truck: Truck_t,
-    boxes: List[Box_t],
-    layer_y: float = 0.0,
-    layer_height: Optional[float] = None,
-    sort_boxes: bool = True,
-) -> HeuristicResult:
+class LayerStepper:
     """
-    Packs exactly one layer of exactly one box type using first-fit row packing.
-    Stops at the first different box type by only considering the maximal prefix of boxes[0].
+    Resumable single-layer, single-type packer.
+
+    Wraps one heuristic's per-box placement loop (a generator yielding once per processed box)
+    so callers can advance several heuristics in lockstep with step() and compare their
+    running counts (placed, failures) before deciding which ones to finish.
+
+    finish() runs the remaining boxes and returns the usual HeuristicResult, mutating `boxes`
+    exactly like the *_pack functions.
+
+    Because a batch holds one box type and a failed placement leaves the free space unchanged,
+    a stepper is `settled` after its first failure: every remaining box would fail the same way,
+    so `placed` already holds its final placements.
+
+    The layer's upright height and footprints are looked up once per batch from the SKU's
+    orientation table (see utils._layer_orientations); the step loops only iterate them.
     """
-    placed: List[PlacedBox_t] = []
-    notes: List[str] = []
 
-    if not boxes:
-        return placed, notes, 0.0, 0.0, 0.0
+    def __init__(
+        self,
+        steps: Callable[["LayerStepper"], Iterator[None]],
+        packed_by: str,
+        truck: Truck_t,
+        boxes: List[Box_t],
+        layer_y: float = 0.0,
+        layer_height: Optional[float] = None,
+        sort_boxes: bool = True,
+    ):
+        self.packed_by = packed_by
+        self.truck = truck
+        self.boxes = boxes
+        self.layer_y = layer_y
+
+        self.placed: List[PlacedBox_t] = []
+        self.notes: List[str] = []
+        self.batch_failures: List[Box_t] = []
+        self.used_layer_height = 0.0
+        self.processed = 0
+        self.done = not boxes
+
+        if self.done:
+            return
+
+        self.batch, self.remainder, self.anchor = _split_same_type_prefix(boxes, sort_boxes)
+        self.height_cap = _height_cap(truck, layer_height)
+
+        if self.height_cap <= _EPS:
+            self.notes.append("No available vertical space in current sub-truck.")
+            self.batch_failures = list(self.batch)
+            self.processed = len(self.batch)
+            self.done = True
+            return
+
+        self.box_height, self.footprints = _layer_orientations(self.anchor, truck, self.height_cap)
+        self._steps = steps(self)
+
+    @property
+    def total(self) -> int:
+        return len(self.batch) if self.boxes else 0
+
+    @property
+    def settled(self) -> bool:
+        return self.done or bool(self.batch_failures)
+
+    def place(self, box: Box_t, x: float, z: float, rotation: int) -> None:
+        self.placed.append(PlacedBox_t(id=box.id, x=x, y=self.layer_y, z=z, rotation=rotation))
+        self.used_layer_height = max(self.used_layer_height, self.box_height)
+
+    def fail(self, box: Box_t, reason: str) -> None:
+        self.batch_failures.append(box)
+        self.notes.append(f"Box [{box.id}] {reason}")
+
+    def fits_height(self, box: Box_t) -> bool:
+        if self.box_height > self.height_cap + _EPS:
+            self.fail(box, f"exceeds height cap {self.height_cap:.3f}.")
+            return False
+        return True
+
+    def step(self, n: int = 1) -> bool:
+        """
+        Processes up to n more boxes of the batch. Returns True once the batch is exhausted.
+        """
+        for _ in range(n):
+            if self.done:
+                break
+            try:
+                next(self._steps)
+                self.processed += 1
+            except StopIteration:
+                self.done = True
+        return self.done
+
+    def finish(self) -> HeuristicResult:
+        if not self.boxes:
+            return self.placed, self.notes, 0.0, 0.0, 0.0
+
+        while not self.step(len(self.batch) + 1):
+            pass
 
-    batch, remainder, anchor = _split_same_type_prefix(boxes, sort_boxes)
-    height_cap = _height_cap(truck, layer_height)
-    if height_cap <= _EPS:
-        notes.append("No available vertical space in current sub-truck.")
         return _finalize_batch_result(
-            boxes, batch, remainder, placed, notes, 0.0, anchor, "FFR", truck
+            self.boxes,
+            self.batch_failures,
+            self.remainder,
+            self.placed,
+            self.notes,
+            self.used_layer_height,
+            self.anchor,
+            self.packed_by,
+            self.truck,
         )
 
-    batch_failures: List[Box_t] = []
-    used_layer_height = 0.0
+
+def _ffr_steps(st: LayerStepper) -> Iterator[None]:
+    truck = st.truck
+    # Rows never rotate: the layer's first footprint only
+    box_w, box_d, rot = st.footprints[0]
 
     row_z = 0.0
     row_depth = 0.0
     row_x = 0.0
     has_row = False
 
-    for box in batch:
-        if box.height > height_cap + _EPS:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] exceeds height cap {height_cap:.3f}.")
+    for box in st.batch:
+        if not st.fits_height(box):
+            yield
             continue
 
-        if box.width > truck.width + _EPS or box.depth > truck.depth + _EPS:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] footprint does not fit current sub-truck floor.")
+        if box_w > truck.width + _EPS or box_d > truck.depth + _EPS:
+            st.fail(box, "footprint does not fit current sub-truck floor.")
+            yield
             continue
 
         if not has_row:
-            placed.append(
-                PlacedBox_t(
-                    id=box.id,
-                    x=0.0,
-                    y=layer_y,
-                    z=0.0,
-                    rotation=0,
-                )
-            )
-            row_x = box.width
+            st.place(box, 0.0, 0.0, rot)
+            row_x = box_w
             row_z = 0.0
-            row_depth = box.depth
+            row_depth = box_d
             has_row = True
-            used_layer_height = max(used_layer_height, box.height)
+            yield
             continue
 
         # Same row
-        if row_x + box.width <= truck.width + _EPS and box.depth <= row_depth + _EPS:
-            placed.append(
-                PlacedBox_t(
-                    id=box.id,
-                    x=row_x,
-                    y=layer_y,
-                    z=row_z,
-                    rotation=0,
-                )
-            )
-            row_x += box.width
-            used_layer_height = max(used_layer_height, box.height)
+        if row_x + box_w <= truck.width + _EPS and box_d <= row_depth + _EPS:
+            st.place(box, row_x, row_z, rot)
+            row_x += box_w
+            yield
             continue
 
         # New row
         new_row_z = row_z + row_depth
-        if new_row_z + box.depth <= truck.depth + _EPS:
-            placed.append(
-                PlacedBox_t(
-                    id=box.id,
-                    x=0.0,
-                    y=layer_y,
-                    z=new_row_z,
-                    rotation=0,
-                )
-            )
+        if new_row_z + box_d <= truck.depth + _EPS:
+            st.place(box, 0.0, new_row_z, rot)
             row_z = new_row_z
-            row_x = box.width
-            row_depth = box.depth
-            used_layer_height = max(used_layer_height, box.height)
+            row_x = box_w
+            row_depth = box_d
+            yield
             continue
 
-        batch_failures.append(box)
-        notes.append(f"Box [{box.id}] could not be placed in current batch/layer.")
+        st.fail(box, "could not be placed in current batch/layer.")
+        yield
 
-    return _finalize_batch_result(
-        boxes, batch_failures, remainder, placed, notes, used_layer_height, anchor, "FFR", truck
-    )
 
+def _ffg_steps(st: LayerStepper) -> Iterator[None]:
+    free_rects: List[FreeRectTL] = [FreeRectTL(0.0, 0.0, st.truck.width, st.truck.depth)]
 
-def ff_guillotine_pack(
-    truck: Truck_t,
-    boxes: List[Box_t],
-    layer_y: float = 0.0,
-    layer_height: Optional[float] = None,
-    sort_boxes: bool = True,
-) -> HeuristicResult:
-    """
-    Packs exactly one layer of exactly one box type using first-fit guillotine.
-    """
-    notes: List[str] = []
-    placed: List[PlacedBox_t] = []
-
-    if not boxes:
-        return placed, notes, 0.0, 0.0, 0.0
-
-    batch, remainder, anchor = _split_same_type_prefix(boxes, sort_boxes)
-    height_cap = _height_cap(truck, layer_height)
-    if height_cap <= _EPS:
-        notes.append("No available vertical space in current sub-truck.")
-        return _finalize_batch_result(
-            boxes, batch, remainder, placed, notes, 0.0, anchor, "FFG", truck
-        )
-
-    free_rects: List[FreeRectTL] = [FreeRectTL(0.0, 0.0, truck.width, truck.depth)]
-    batch_failures: List[Box_t] = []
-    used_layer_height = 0.0
-
-    for box in batch:
-        if box.height > height_cap + _EPS:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] exceeds height cap {height_cap:.3f}.")
+    for box in st.batch:
+        if not st.fits_height(box):
+            yield
             continue
 
         placed_this_box = False
 
         for i, rect in enumerate(free_rects):
-            orient = _choose_orientation(box, rect)
+            orient = _choose_orientation(st.footprints, rect)
             if orient is None:
                 continue
 
             pw, pd, rot = orient
-            px = rect.x
-            pz = rect.z
-
-            placed.append(
-                PlacedBox_t(
-                    id=box.id,
-                    x=px,
-                    y=layer_y,
-                    z=pz,
-                    rotation=rot,
-                )
-            )
+            st.place(box, rect.x, rect.z, rot)
 
             new_rects = free_rects[:i] + free_rects[i + 1 :]
             new_rects.extend(_ffg_split_free_rect(rect, pw, pd))
             free_rects = _ffg_prune_free_rects(new_rects)
 
-            used_layer_height = max(used_layer_height, box.height)
             placed_this_box = True
             break
 
         if not placed_this_box:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] could not be placed in current batch/layer.")
-
-    return _finalize_batch_result(
-        boxes, batch_failures, remainder, placed, notes, used_layer_height, anchor, "FFG", truck
-    )
+            st.fail(box, "could not be placed in current batch/layer.")
+        yield
 
 
-def maxrects_pack(
-    truck: Truck_t,
-    boxes: List[Box_t],
-    layer_y: float = 0.0,
-    layer_height: Optional[float] = None,
-    allow_y_rotation: bool = True,
-    sort_boxes: bool = True,
-) -> HeuristicResult:
-    """
-    Packs exactly one layer of exactly one box type using MaxRects.
-    """
-    placed: List[PlacedBox_t] = []
-    notes: List[str] = []
-
-    if not boxes:
-        return placed, notes, 0.0, 0.0, 0.0
-
-    batch, remainder, anchor = _split_same_type_prefix(boxes, sort_boxes)
-    height_cap = _height_cap(truck, layer_height)
-    if height_cap <= _EPS:
-        notes.append("No available vertical space in current sub-truck.")
-        return _finalize_batch_result(
-            boxes, batch, remainder, placed, notes, 0.0, anchor, "MAX", truck
-        )
-
-    free_rects: List[FreeRectTL] = [FreeRectTL(0.0, 0.0, truck.width, truck.depth)]
-    batch_failures: List[Box_t] = []
-    used_layer_height = 0.0
+def _maxrects_steps(st: LayerStepper, allow_y_rotation: bool = True) -> Iterator[None]:
+    free_rects: List[FreeRectTL] = [FreeRectTL(0.0, 0.0, st.truck.width, st.truck.depth)]
+    footprints = st.footprints if allow_y_rotation else st.footprints[:1]
 
-    for box in batch:
-        if box.height > height_cap + _EPS:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] exceeds height cap {height_cap:.3f}.")
+    for box in st.batch:
+        if not st.fits_height(box):
+            yield
             continue
 
         placement = _find_best_position_for_box_tl(
-            box=box,
+            footprints=footprints,
             free_rects=free_rects,
-            allow_y_rotation=allow_y_rotation,
         )
 
         if placement is None:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] could not be placed in current batch/layer.")
+            st.fail(box, "could not be placed in current batch/layer.")
+            yield
             continue
 
         _, px, pz, pw, pd, rotation = placement
-
-        placed.append(
-            PlacedBox_t(
-                id=box.id,
-                x=px,
-                y=layer_y,
-                z=pz,
-                rotation=rotation,
-            )
-        )
-        used_layer_height = max(used_layer_height, box.height)
+        st.place(box, px, pz, rotation)
 
         new_free_rects: List[FreeRectTL] = []
         placed_rect = FreeRectTL(px, pz, pw, pd)
@@ -269,65 +252,26 @@ def maxrects_pack(
             new_free_rects.extend(_mr_split_free_rect(fr, placed_rect))
 
         free_rects = _mr_prune_free_rects(new_free_rects)
+        yield
 
-    return _finalize_batch_result(
-        boxes, batch_failures, remainder, placed, notes, used_layer_height, anchor, "MAX", truck
-    )
-
-
-def skyline_pack(
-    truck: Truck_t,
-    boxes: List[Box_t],
-    layer_y: float = 0.0,
-    layer_height: Optional[float] = None,
-    sort_boxes: bool = True,
-) -> HeuristicResult:
-    """
-    Packs exactly one layer of exactly one box type using Skyline.
-    """
-    placed: List[PlacedBox_t] = []
-    notes: List[str] = []
-
-    if not boxes:
-        return placed, notes, 0.0, 0.0, 0.0
 
-    batch, remainder, anchor = _split_same_type_prefix(boxes, sort_boxes)
-    height_cap = _height_cap(truck, layer_height)
-    if height_cap <= _EPS:
-        notes.append("No available vertical space in current sub-truck.")
-        return _finalize_batch_result(
-            boxes, batch, remainder, placed, notes, 0.0, anchor, "SKY", truck
-        )
+def _skyline_steps(st: LayerStepper) -> Iterator[None]:
+    skyline: List[SkylineSeg] = [SkylineSeg(0.0, 0.0, st.truck.width)]
 
-    skyline: List[SkylineSeg] = [SkylineSeg(0.0, 0.0, truck.width)]
-    batch_failures: List[Box_t] = []
-    used_layer_height = 0.0
-
-    for box in batch:
-        if box.height > height_cap + _EPS:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] exceeds height cap {height_cap:.3f}.")
+    for box in st.batch:
+        if not st.fits_height(box):
+            yield
             continue
 
-        best = _skyline_find_position(skyline, box, truck.depth)
+        best = _skyline_find_position(skyline, st.footprints, st.truck.depth)
 
         if best is None:
-            batch_failures.append(box)
-            notes.append(f"Box [{box.id}] could not be placed in current batch/layer.")
+            st.fail(box, "could not be placed in current batch/layer.")
+            yield
             continue
 
         seg_index, px, pz, bw, bd, rotation = best
-
-        placed.append(
-            PlacedBox_t(
-                id=box.id,
-                x=px,
-                y=layer_y,
-                z=pz,
-                rotation=rotation,
-            )
-        )
-        used_layer_height = max(used_layer_height, box.height)
+        st.place(box, px, pz, rotation)
 
         _skyline_add_level(
             skyline=skyline,
@@ -338,7 +282,81 @@ def skyline_pack(
             d=bd,
         )
         _skyline_merge(skyline)
+        yield
+
+
+def ff_row_stepper(truck: Truck_t, boxes: List[Box_t], layer_y: float = 0.0,
+                   layer_height: Optional[float] = None, sort_boxes: bool = True) -> LayerStepper:
+    return LayerStepper(_ffr_steps, "FFR", truck, boxes, layer_y, layer_height, sort_boxes)
+
+
+def ff_guillotine_stepper(truck: Truck_t, boxes: List[Box_t], layer_y: float = 0.0,
+                          layer_height: Optional[float] = None, sort_boxes: bool = True) -> LayerStepper:
+    return LayerStepper(_ffg_steps, "FFG", truck, boxes, layer_y, layer_height, sort_boxes)
+
+
+def maxrects_stepper(truck: Truck_t, boxes: List[Box_t], layer_y: float = 0.0,
+                     layer_height: Optional[float] = None, allow_y_rotation: bool = True,
+                     sort_boxes: bool = True) -> LayerStepper:
+    def steps(st: LayerStepper) -> Iterator[None]:
+        return _maxrects_steps(st, allow_y_rotation=allow_y_rotation)
+    return LayerStepper(steps, "MAX", truck, boxes, layer_y, layer_height, sort_boxes)
+
+
+def skyline_stepper(truck: Truck_t, boxes: List[Box_t], layer_y: float = 0.0,
+                    layer_height: Optional[float] = None, sort_boxes: bool = True) -> LayerStepper:
+    return LayerStepper(_skyline_steps, "SKY", truck, boxes, layer_y, layer_height, sort_boxes)
+
+
+def ff_row_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    layer_y: float = 0.0,
+    layer_height: Optional[float] = None,
+    sort_boxes: bool = True,
+) -> HeuristicResult:
+    """
+    Packs exactly one layer of exactly one box type using first-fit row packing.
+    Stops at the first different box type by only considering the maximal prefix of boxes[0].
+    """
+    return ff_row_stepper(truck, boxes, layer_y, layer_height, sort_boxes).finish()
+
+
+def ff_guillotine_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    layer_y: float = 0.0,
+    layer_height: Optional[float] = None,
+    sort_boxes: bool = True,
+) -> HeuristicResult:
+    """
+    Packs exactly one layer of exactly one box type using first-fit guillotine.
+    """
+    return ff_guillotine_stepper(truck, boxes, layer_y, layer_height, sort_boxes).finish()
+
 
-    return _finalize_batch_result(
-        boxes, batch_failures, remainder, placed, notes, used_layer_height, anchor, "SKY", truck
-    )
\ No newline at end of file
+def maxrects_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    layer_y: float = 0.0,
+    layer_height: Optional[float] = None,
+    allow_y_rotation: bool = True,
+    sort_boxes: bool = True,
+) -> HeuristicResult:
+    """
+    Packs exactly one layer of exactly one box type using MaxRects.
+    """
+    return maxrects_stepper(truck, boxes, layer_y, layer_height, allow_y_rotation, sort_boxes).finish()
+
+
+def skyline_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    layer_y: float = 0.0,
+    layer_height: Optional[float] = None,
+    sort_boxes: bool = True,
+) -> HeuristicResult:
+    """
+    Packs exactly one layer of exactly one box type using Skyline.
+    """
+    return skyline_stepper(truck, boxes, layer_y, layer_height, sort_boxes).finish()
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set
+
+from python.api.schemas import Box, PlacedBox
+from python.vtl_core.domain.models import Box_t, LayoutDiff, PlacedBox_t, Truck_t
+from python.vtl_core.orientations import UPRIGHT_ROTATIONS, placed_dims
+from python.vtl_core.packing.control import CancelToken
+from python.vtl_core.packing.extreme_points import Cuboid, CuboidGrid, ExtremePointPacker, grid_cell_size
+
+_EPS = 1e-9
+
+# Boxes placed between two cancel checks
+REPACK_CHECK_EVERY = 64
+
+
+def _cuboid(box: Box_t, pb: PlacedBox_t) -> Cuboid:
+    w, h, d = placed_dims(box, pb.rotation)
+    return (pb.x, pb.y, pb.z, pb.x + w, pb.y + h, pb.z + d)
+
+
+def _overlap(a: Cuboid, b: Cuboid) -> bool:
+    return all(min(a[k + 3], b[k + 3]) - max(a[k], b[k]) > _EPS for k in range(3))
+
+
+def _check_pinned(truck: Truck_t, specs: Dict[str, Box_t], pinned: List[PlacedBox_t]) -> List[Cuboid]:
+    # Pinned boxes are taken as given, so a bad one is the caller's error rather than a box to move
+    cuboids = []
+    for pb in pinned:
+        box = specs[pb.id]
+        if not box.rotatable and pb.rotation not in UPRIGHT_ROTATIONS:
+            raise ValueError(f"pinned box {pb.id!r} is not rotatable; rotation {pb.rotation} turns it over")
+        c = _cuboid(box, pb)
+        if min(c[:3]) < -_EPS or c[3] > truck.width + _EPS or c[4] > truck.height + _EPS or c[5] > truck.depth + _EPS:
+            raise ValueError(f"pinned box {pb.id!r} is outside the truck")
+        for other, placed in zip(pinned, cuboids):
+            if _overlap(c, placed):
+                raise ValueError(f"pinned boxes {other.id!r} and {pb.id!r} overlap")
+        cuboids.append(c)
+    return cuboids
+
+
+def displaced_boxes(
+    truck: Truck_t,
+    specs: Dict[str, Box_t],
+    placed: List[PlacedBox_t],
+    gone: Set[str],
+    pinned: Dict[str, Cuboid],
+) -> Set[str]:
+    """
+    Ids of the placements in `placed` that an edit forces to move: those overlapping a pinned
+    box (`pinned` maps its id to its new cuboid), and, bottom up, those resting on a box that is
+    gone (removed, moved or displaced in turn). Pinned boxes themselves are never displaced, so
+    a box pinned where it already is does not collide with its own placement. Every other
+    placement stays, even one the original layout left without full support.
+    """
+    cuboids = [_cuboid(specs[pb.id], pb) for pb in placed]
+    grid = CuboidGrid(truck, grid_cell_size(truck, [specs[pb.id] for pb in placed]))
+    for n, c in enumerate(cuboids):
+        grid.insert(n, c)
+
+    displaced: Set[str] = set()
+    for c in pinned.values():
+        for n in grid.query(*c):
+            if placed[n].id not in gone and placed[n].id not in pinned and _overlap(c, cuboids[n]):
+                displaced.add(placed[n].id)
+
+    # A box rests on the boxes whose top is at its bottom; those are lower, so one pass bottom up
+    # sees every supporter's fate before the boxes on top of it
+    for n in sorted(range(len(placed)), key=lambda n: cuboids[n][1]):
+        x0, y0, z0, x1, _, z1 = cuboids[n]
+        if placed[n].id in gone or placed[n].id in displaced or placed[n].id in pinned or y0 <= _EPS:
+            continue
+        for m in grid.query(x0, y0 - 2 * _EPS, z0, x1, y0, z1):
+            below = cuboids[m]
+            if abs(below[4] - y0) > _EPS or min(x1, below[3]) - max(x0, below[0]) <= _EPS:
+                continue
+            if min(z1, below[5]) - max(z0, below[2]) <= _EPS:
+                continue
+            if placed[m].id in gone or placed[m].id in displaced:
+                displaced.add(placed[n].id)
+                break
+    return displaced
+
+
+class IncrementalLayout:
+    """
+    A layout kept between edits: its boxes, their placements, and an ExtremePointPacker holding
+    the free space around them.
+
+    The packer is seeded from the placements when first needed. Boxes that are only added go
+    straight into it, so a run of additions never rescans the layout. An edit that removes or
+    pins boxes frees space the packer cannot give back, so the packer is reseeded from the
+    placements that stay. The boxes of later edits are unknown, so points are never dropped for
+    being too small, and free space is measured as far as the largest box seen so far could
+    reach; a larger box reseeds the packer.
+    """
+
+    def __init__(self, truck: Truck_t, boxes: List[Box_t], placed: List[PlacedBox_t]):
+        self.truck = truck
+        self.specs: Dict[str, Box_t] = {b.id: b for b in boxes}
+        self.placed: Dict[str, PlacedBox_t] = {pb.id: pb for pb in placed}
+        self._largest = max((max(b.width, b.height, b.depth) for b in boxes), default=0.0)
+        self._packer: Optional[ExtremePointPacker] = None
+
+    @property
+    def unplaced(self) -> List[Box_t]:
+        return [b for b in self.specs.values() if b.id not in self.placed]
+
+    @property
+    def utilization(self) -> float:
+        return sum(self.specs[i].volume for i in self.placed) / self.truck.volume
+
+    @property
+    def item_count(self) -> int:
+        # Boxes, placements and packer entries held, the size measure of a stored layout
+        packer = self._packer
+        return len(self.specs) + len(self.placed) + (0 if packer is None else len(packer.cuboids) + len(packer.known))
+
+    def _seed(self) -> ExtremePointPacker:
+        packer = ExtremePointPacker(self.truck, grid_cell_size(self.truck, list(self.specs.values())), self._largest)
+        cuboids = [_cuboid(self.specs[pb.id], pb) for pb in self.placed.values()]
+        for c in sorted(cuboids, key=lambda c: (c[1], c[2], c[0])):
+            packer.occupy(c[0], c[1], c[2], c[3] - c[0], c[4] - c[1], c[5] - c[2])
+        return packer
+
+    def edit(
+        self,
+        add: Optional[List[Box_t]] = None,
+        remove: Optional[List[str]] = None,
+        pinned: Optional[List[PlacedBox_t]] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> LayoutDiff:
+        """
+        Applies add / remove / pin edits. Removed boxes leave the layout. Pinned boxes, from the
+        layout or from `add`, stay exactly where the caller put them. Placements displaced by the
+        edits (see displaced_boxes) are packed again with the added and unplaced boxes, tallest
+        first, into the free space around the placements that stay. `max_weight` covers the
+        whole load.
+
+        Raises ValueError, leaving the layout as it was, for ids that clash or are unknown and
+        for a pinned box outside the truck, turned over or overlapping another.
+        """
+        add, remove, pinned = add or [], set(remove or []), pinned or []
+        specs = {**self.specs, **{b.id: b for b in add}}
+        pinned_ids = {pb.id for pb in pinned}
+        if len(specs) != len(self.specs) + len(add):
+            raise ValueError("added box ids must be new and unique")
+        if not remove <= set(self.specs) or not pinned_ids <= set(specs) or len(pinned_ids) != len(pinned):
+            raise ValueError("remove and pinned must name distinct known boxes")
+        if remove & pinned_ids:
+            raise ValueError("a box cannot be both removed and pinned")
+        pinned_cuboids = _check_pinned(self.truck, specs, pinned)
+
+        # Pinned boxes leave their old spot unless they were pinned where they already are
+        before = dict(self.placed)
+        moved = {
+            pb.id for pb in pinned
+            if pb.id in before and (before[pb.id].x, before[pb.id].y, before[pb.id].z, before[pb.id].rotation)
+            != (pb.x, pb.y, pb.z, pb.rotation)
+        }
+        gone = remove | moved
+        pinned_at = {pb.id: c for pb, c in zip(pinned, pinned_cuboids)}
+        displaced = displaced_boxes(self.truck, specs, list(before.values()), gone, pinned_at) if gone or pinned else set()
+
+        for box_id in gone | displaced | pinned_ids:
+            self.placed.pop(box_id, None)
+        for box_id in remove:
+            del specs[box_id]
+        self.placed.update((pb.id, pb) for pb in pinned)
+        self.specs = specs
+
+        pending = [specs[i] for i in before if i in displaced]
+        pending += [b for b in specs.values() if b.id not in before and b.id not in self.placed]
+        pending.sort(key=lambda box: box.height, reverse=True)
+
+        largest = max((max(b.width, b.height, b.depth) for b in add), default=0.0)
+        if self._packer is None or gone or pinned or largest > self._largest:
+            self._largest = max(self._largest, largest)
+            self._packer = self._seed()
+        packer, max_weight = self._packer, self.truck.max_weight
+        weight = sum(specs[i].weight for i in self.placed)
+        new: List[PlacedBox_t] = []
+        unplaced: List[Box_t] = []
+        for i, box in enumerate(pending):
+            if cancel is not None and i % REPACK_CHECK_EVERY == 0:
+                cancel.raise_if_cancelled()
+            pb = None
+            if max_weight is None or weight + box.weight <= max_weight + _EPS:
+                pb = packer.place(box, 0.0, self._largest)
+            if pb is None:
+                unplaced.append(box)
+                continue
+            new.append(pb)
+            self.placed[pb.id] = pb
+            weight += box.weight
+
+        fresh_pins = [pb for pb in pinned if pb.id not in before or pb.id in moved]
+        changed = fresh_pins + new
+        changed_ids = {pb.id for pb in changed}
+        removed = [i for i in before if i not in changed_ids and (i in gone or i in displaced)]
+        kept = len(before) - len(gone | displaced)
+        notes = [
+            f"\n[REPACK] kept={kept} | pinned={len(pinned)} | removed={len(remove)} | displaced={len(displaced)} | "
+            f"packed={len(new)} | unplaced={len(unplaced)}"
+        ]
+        return LayoutDiff(
+            changed=changed, removed=removed, unplaced=unplaced, unchanged_count=len(self.placed) - len(changed),
+            notes=notes,
+        )
+
+
+def diff_payload(layout: IncrementalLayout, diff: LayoutDiff) -> Dict[str, Any]:
+    """
+    A LayoutDiff in API models, with the layout's utilization after the edit.
+    """
+    return {
+        "changed": [PlacedBox(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=pb.rotation) for pb in diff.changed],
+        "removed": diff.removed,
+        "unplaced": [Box.model_validate(b) for b in diff.unplaced],
+        "unchanged_count": diff.unchanged_count,
+        "utilization": layout.utilization,
+        "notes": diff.notes,
+    }
+
+
+def repack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    placed: List[PlacedBox_t],
+    add: Optional[List[Box_t]] = None,
+    remove: Optional[List[str]] = None,
+    pinned: Optional[List[PlacedBox_t]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, Any]:
+    """
+    One-off IncrementalLayout edit of the layout `placed` of `boxes`, whose boxes without a
+    placement are its unplaced boxes. Returns the diff_payload.
+    """
+    layout = IncrementalLayout(truck, boxes, placed)
+    return diff_payload(layout, layout.edit(add, remove, pinned, cancel))
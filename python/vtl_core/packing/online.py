@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Union
+
+from python.vtl_core.bounds import fits_truck
+from python.vtl_core.domain.models import Box_t, ClosedTruck, OnlineStep, Truck_t
+from python.vtl_core.packing.control import CancelToken
+from python.vtl_core.packing.extreme_points import ExtremePointPacker, grid_cell_size
+
+_EPS = 1e-9
+
+# Trucks kept open at once unless the caller asks for more; opening one more closes the oldest
+ONLINE_OPEN_TRUCKS = 1
+
+
+@dataclass
+class _OpenTruck:
+    index: int
+    packer: ExtremePointPacker
+    box_count: int = 0
+    volume: float = 0.0
+    weight: float = 0.0
+
+
+class OnlinePacker:
+    """
+    Places boxes as they arrive into a sequence of identical trucks, without knowing what
+    comes next.
+
+    Every open truck keeps an ExtremePointPacker, so its free space persists between arrivals
+    and a box is placed in one pass over the points left by the boxes before it. An arrival is
+    one box or a small batch; a batch is placed tallest first, like /pack sorts its load. A box
+    goes to the first open truck, oldest first, that takes it within its weight limit. When
+    none does, a new truck opens, and once more than `open_trucks` are open the oldest one is
+    closed for good: its packer is dropped and only its totals are reported. Memory therefore
+    depends on `open_trucks` and on what one truck holds, not on how many boxes went through.
+    Boxes an empty truck cannot take (too large or too heavy) are rejected.
+
+    The packer never sees the boxes still to come, so every point keeps its free space measured
+    up to the walls, and a truck's grid pitch comes from the arrival that opened it.
+    """
+
+    def __init__(self, truck: Truck_t, open_trucks: int = ONLINE_OPEN_TRUCKS):
+        self.truck = truck
+        self.open_trucks = max(1, open_trucks)
+        self.trucks_opened = 0
+        self.placed_count = 0
+        self.placed_volume = 0.0
+        self.rejected_count = 0
+        self._largest = max(truck.width, truck.height, truck.depth)
+        self._open: List[_OpenTruck] = []
+
+    def _fits_empty(self, box: Box_t) -> bool:
+        max_weight = self.truck.max_weight
+        return fits_truck(box, self.truck) and (max_weight is None or box.weight <= max_weight + _EPS)
+
+    def _place(self, state: _OpenTruck, box: Box_t, step: OnlineStep) -> bool:
+        max_weight = self.truck.max_weight
+        if max_weight is not None and state.weight + box.weight > max_weight + _EPS:
+            return False
+        pb = state.packer.place(box, 0.0, self._largest)
+        if pb is None:
+            return False
+        state.box_count += 1
+        state.volume += box.volume
+        state.weight += box.weight
+        self.placed_count += 1
+        self.placed_volume += box.volume
+        step.placed.append((state.index, pb))
+        return True
+
+    def _close(self, state: _OpenTruck, step: OnlineStep) -> None:
+        self._open.remove(state)
+        step.closed.append(ClosedTruck(index=state.index, box_count=state.box_count, volume=state.volume, weight=state.weight))
+
+    def add(self, boxes: Union[Box_t, List[Box_t]]) -> OnlineStep:
+        """
+        Places one arrival, a box or a batch of boxes, and reports what happened to it.
+        """
+        batch = sorted([boxes] if isinstance(boxes, Box_t) else boxes, key=lambda box: box.height, reverse=True)
+        step = OnlineStep(placed=[], rejected=[], closed=[])
+        for box in batch:
+            if not self._fits_empty(box):
+                self.rejected_count += 1
+                step.rejected.append(box)
+                continue
+            if any(self._place(state, box, step) for state in self._open):
+                continue
+
+            state = _OpenTruck(
+                index=self.trucks_opened,
+                packer=ExtremePointPacker(self.truck, grid_cell_size(self.truck, batch), self._largest),
+            )
+            self.trucks_opened += 1
+            self._open.append(state)
+            if len(self._open) > self.open_trucks:
+                self._close(self._open[0], step)
+            if not self._place(state, box, step):
+                # An empty truck takes any box that fits it; kept as a guard against a stuck stream
+                self.rejected_count += 1
+                step.rejected.append(box)
+        return step
+
+    def close(self) -> OnlineStep:
+        """
+        Closes every open truck, oldest first. The packer can be reused afterwards: the next
+        arrival opens a new truck.
+        """
+        step = OnlineStep(placed=[], rejected=[], closed=[])
+        for state in list(self._open):
+            self._close(state, step)
+        return step
+
+    @property
+    def utilization(self) -> float:
+        # Placed volume over the volume of every truck opened so far
+        if self.trucks_opened == 0:
+            return 0.0
+        return self.placed_volume / (self.trucks_opened * self.truck.volume)
+
+
+def online_pack(
+    truck: Truck_t,
+    arrivals: Iterable[Union[Box_t, List[Box_t]]],
+    open_trucks: int = ONLINE_OPEN_TRUCKS,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[OnlineStep]:
+    """
+    Generator API of OnlinePacker: yields one OnlineStep per arrival as soon as it is placed,
+    then a last step closing the trucks still open. `arrivals` is consumed lazily, so it can
+    be a queue or a socket that blocks until the next box comes in. The cancel token is
+    checked between arrivals.
+    """
+    packer = OnlinePacker(truck, open_trucks)
+    for arrival in arrivals:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        yield packer.add(arrival)
+    yield packer.close()
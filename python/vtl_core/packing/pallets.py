@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from python.api.schemas import Box, PlacedBox
+from python.vtl_core.bounds import compute_bounds, fits_truck
+from python.vtl_core.domain.models import Box_t, PalletLoad, PlacedBox_t, Truck_t
+from python.vtl_core.geometry import box_units, from_units, restore_placement
+from python.vtl_core.orientations import placed_dims
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+from python.vtl_core.packing.heightmap import HM_RESOLUTION
+from python.vtl_core.packing.processing import FAST_HEURISTIC, Hstix, begin_pack, engine_pack
+from python.vtl_core.packing.search import default_workers, task_pool
+
+_EPS = 1e-9
+
+# Box volume put on one mixed pallet, as a fraction of its load space; boxes the pallet cannot
+# take move on to the next round
+PALLET_FILL = 0.8
+
+# Pallet layouts kept for reuse, across requests
+PALLET_CACHE_SIZE = 1024
+
+# Placements as (index into the pallet's boxes, x, y, z, rotation)
+Slots = Tuple[Tuple[int, float, float, float, int], ...]
+
+# (slots, budget truncated) of one packed pallet
+PalletResult = Tuple[Slots, bool]
+
+# Shared by concurrent requests: every access holds _PALLET_CACHE_LOCK
+_PALLET_CACHE: "OrderedDict[Tuple[Any, ...], Slots]" = OrderedDict()
+_PALLET_CACHE_LOCK = threading.Lock()
+
+
+def pallet_signature(
+    pallet: Truck_t,
+    boxes: List[Box_t],
+    fixed_heuristic: Optional[Hstix],
+    selector: str,
+    engine: str,
+    resolution: float,
+) -> Tuple[Any, ...]:
+    """
+    Everything a pallet layout depends on apart from the box ids, so pallets with equal
+    signatures share one layout.
+    """
+    return (
+        pallet.width, pallet.height, pallet.depth, pallet.max_weight, fixed_heuristic, selector, engine, resolution,
+        tuple((b.width, b.height, b.depth, b.rotatable, b.weight, b.priority) for b in boxes),
+    )
+
+
+def pack_pallet(
+    pallet: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    engine: str = "regions",
+    resolution: float = HM_RESOLUTION,
+) -> PalletResult:
+    """
+    Packs one pallet with the packer of `engine` (the layer heuristics for "regions"), the
+    pallet's load space standing in for the truck. The layout refers to the boxes by index, so
+    equal pallets can share it, and comes with the budget's truncated flag.
+    """
+    index = {b.id: i for i, b in enumerate(boxes)}
+    placed, _ = engine_pack(
+        engine, truck=pallet, boxes=list(boxes), budget=budget, fixed_heuristic=fixed_heuristic, selector=selector,
+        resolution=resolution, workers=1,
+    )
+    slots = tuple((index[pb.id], pb.x, pb.y, pb.z, pb.rotation) for pb in placed)
+    return slots, budget is not None and budget.truncated
+
+
+def _pack_pallets(
+    pallet: Truck_t,
+    chunks: List[List[Box_t]],
+    workers: int,
+    budget: Optional[TimeBudget],
+    fixed_heuristic: Optional[Hstix],
+    selector: str,
+    engine: str,
+    resolution: float,
+) -> Tuple[List[Slots], int]:
+    """
+    Layouts of `chunks`, in order: each distinct signature is looked up in the cache and packed
+    only when missing, in up to `workers` processes when there are enough boxes (see task_pool).
+    Returns the layouts and the number of cache hits.
+    """
+    keys = [pallet_signature(pallet, chunk, fixed_heuristic, selector, engine, resolution) for chunk in chunks]
+    with _PALLET_CACHE_LOCK:
+        cached = {key: _PALLET_CACHE[key] for key in keys if key in _PALLET_CACHE}
+        for key in cached:
+            _PALLET_CACHE.move_to_end(key)
+    missing = {key: chunk for key, chunk in zip(keys, chunks) if key not in cached}
+    tasks = [(pallet, chunk, budget, fixed_heuristic, selector, engine, resolution) for chunk in missing.values()]
+    pool = task_pool(workers, len(tasks), sum(len(chunk) for chunk in missing.values()))
+    results = pool.map(pack_pallet, *zip(*tasks)) if pool is not None else (pack_pallet(*t) for t in tasks)
+
+    fresh: Dict[Tuple[Any, ...], Slots] = {}
+    for key, (slots, truncated) in zip(missing, results):
+        fresh[key] = slots
+        if budget is not None and truncated:
+            # A truncated layout is not what the signature would produce with time to spare
+            budget.truncated = True
+            continue
+        with _PALLET_CACHE_LOCK:
+            _PALLET_CACHE[key] = slots
+            while len(_PALLET_CACHE) > PALLET_CACHE_SIZE:
+                _PALLET_CACHE.popitem(last=False)
+
+    return [fresh[key] if key in fresh else cached[key] for key in keys], len(keys) - len(missing)
+
+
+def _load(pallet_id: str, boxes: List[Box_t], slots: Slots) -> PalletLoad:
+    placed = [PlacedBox_t(id=boxes[i].id, x=x, y=y, z=z, rotation=rotation) for i, x, y, z, rotation in slots]
+    height = max((pb.y + placed_dims(boxes[i], pb.rotation)[1] for (i, *_), pb in zip(slots, placed)), default=0.0)
+    return PalletLoad(id=pallet_id, boxes=[boxes[i] for i, *_ in slots], placed=placed, load_height=height)
+
+
+def _chunks(boxes: List[Box_t], pallet: Truck_t) -> List[List[Box_t]]:
+    """
+    Consecutive runs of `boxes` of up to PALLET_FILL of the pallet's volume and its max_weight,
+    each at least one box.
+    """
+    chunks: List[List[Box_t]] = []
+    volume = weight = 0.0
+    for box in boxes:
+        full = volume + box.volume > pallet.volume * PALLET_FILL + _EPS
+        heavy = pallet.max_weight is not None and weight + box.weight > pallet.max_weight + _EPS
+        if not chunks or full or heavy:
+            chunks.append([])
+            volume = weight = 0.0
+        chunks[-1].append(box)
+        volume += box.volume
+        weight += box.weight
+    return chunks
+
+
+def build_pallets(
+    pallet: Truck_t,
+    boxes: List[Box_t],
+    workers: Optional[int] = None,
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    engine: str = "regions",
+    resolution: float = HM_RESOLUTION,
+) -> Tuple[List[PalletLoad], List[Box_t], Dict[str, int]]:
+    """
+    Palletizes a load; `pallet` is the load space on top of one pallet deck.
+
+    1. Full pallets: every SKU with at least PALLET_FILL of a pallet's volume is probed once,
+       with one box more than compute_bounds allows on a pallet. When the probe leaves boxes over, the SKU fills floor(count / capacity) identical
+       pallets, which all reuse the probe's layout.
+    2. Mixed pallets: the remaining boxes are cut, in the caller's order, into runs of up to
+       PALLET_FILL of a pallet's volume. Boxes a pallet cannot take are cut into new runs in the
+       next round, until a round places nothing.
+
+    Pallets are packed by the packer of `engine` (see pack_pallet). The probes, and the runs of
+    a round, are packed concurrently, in `workers` processes when
+    there are enough boxes. Equal pallets (see pallet_signature) are packed once, and layouts
+    are kept in a cache shared across calls.
+
+    Returns the pallets, the boxes that went on no pallet, in the caller's order, and stats.
+    """
+    workers = max(1, workers or default_workers())
+    order = {b.id: i for i, b in enumerate(boxes)}
+    pallets: List[PalletLoad] = []
+    loose: List[Box_t] = []
+    pending: List[Box_t] = []
+    stats = {"full": 0, "mixed": 0, "packed": 0, "reused": 0, "rounds": 0}
+
+    taken = set(order)
+
+    def add(chunk: List[Box_t], slots: Slots) -> PalletLoad:
+        pallet_id = f"pallet_{len(pallets)}"
+        while pallet_id in taken:
+            pallet_id += "_"
+        load = _load(pallet_id, chunk, slots)
+        pallets.append(load)
+        return load
+
+    skus: Dict[Tuple[float, float, float, bool], List[Box_t]] = {}
+    for box in boxes:
+        if fits_truck(box, pallet) and (pallet.max_weight is None or box.weight <= pallet.max_weight + _EPS):
+            skus.setdefault((box.width, box.height, box.depth, box.rotatable), []).append(box)
+        else:
+            loose.append(box)
+
+    # Full pallets, one probe per SKU with the volume to fill one
+    groups = []
+    for group in skus.values():
+        if len(group) * group[0].volume >= pallet.volume * PALLET_FILL:
+            groups.append(group)
+        else:
+            pending.extend(group)
+    probes = [group[:compute_bounds(pallet, group).max_count + 1] for group in groups]
+    layouts, hits = _pack_pallets(pallet, probes, workers, budget, fixed_heuristic, selector, engine, resolution)
+    stats["packed"] += len(probes) - hits
+    stats["reused"] += hits
+    for group, probe, slots in zip(groups, probes, layouts):
+        capacity = len(slots)
+        if not capacity or capacity == len(probe):
+            pending.extend(group)
+            continue
+        # Same-SKU boxes are interchangeable: pallet j takes the next `capacity` boxes into the probe's slots
+        full = 0
+        for start in range(0, len(group) - capacity + 1, capacity):
+            chunk = group[start:start + capacity]
+            if pallet.max_weight is not None and sum(b.weight for b in chunk) > pallet.max_weight + _EPS:
+                pending.extend(chunk)
+                continue
+            add(chunk, tuple((k, *slot[1:]) for k, slot in enumerate(slots)))
+            full += 1
+        stats["full"] += full
+        stats["reused"] += max(full - 1, 0)
+        pending.extend(group[len(group) - len(group) % capacity:])
+
+    # Mixed pallets, in rounds
+    pending.sort(key=lambda b: order[b.id])
+    while pending:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if budget is not None and budget.exhausted:
+            budget.truncated = True
+            break
+        stats["rounds"] += 1
+        chunks = _chunks(pending, pallet)
+        layouts, hits = _pack_pallets(pallet, chunks, workers, budget, fixed_heuristic, selector, engine, resolution)
+        stats["packed"] += len(chunks) - hits
+        stats["reused"] += hits
+
+        left: List[Box_t] = []
+        for chunk, slots in zip(chunks, layouts):
+            if slots:
+                add(chunk, slots)
+                stats["mixed"] += 1
+            used = {i for i, *_ in slots}
+            left.extend(b for i, b in enumerate(chunk) if i not in used)
+        if len(left) == len(pending):
+            break
+        pending = left
+
+    loose.extend(pending)
+    loose.sort(key=lambda b: order[b.id])
+    return pallets, loose, stats
+
+
+def pallet_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    pallet: Truck_t,
+    base_height: float,
+    tare_weight: float,
+    footprint: Optional[Tuple[float, float]] = None,
+    workers: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    quality: str = "balanced",
+    selector: str = "trials",
+    unit_scale: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Two-level packing: build_pallets palletizes the load with the request's engine, then
+    begin_pack packs the pallets, each a non-rotatable Box_t of the pallet's footprint,
+    `base_height` plus its load height and `tare_weight` plus its boxes, together with the
+    boxes that went on no pallet. `footprint` is the pallet's (width, depth) as sent, by default
+    the load space's: with `unit_scale` the load space is rounded down like a truck, but the
+    pallets are rounded up like boxes so that neighbours on the truck floor cannot overlap.
+
+    Returns the begin_pack payload, whose placements are pallets and loose boxes, with the
+    pallet contents added under "pallets" (placements relative to the pallet's corner on the
+    floor), the unplaced pallets expanded back into their boxes (integer copies with
+    `unit_scale`, as in begin_pack_internal) and the utilization counting box volume only.
+    `options` are passed to begin_pack.
+    """
+    budget = TimeBudget(time_budget_ms)
+    fixed = FAST_HEURISTIC if quality == "draft" else None
+    resolution = options.get("resolution", HM_RESOLUTION)
+    pallets, loose, stats = build_pallets(
+        pallet, boxes, workers=workers, budget=budget, cancel=cancel, fixed_heuristic=fixed, selector=selector,
+        engine=options.get("engine", "regions"),
+        resolution=resolution * unit_scale if unit_scale is not None else resolution,
+    )
+
+    width, depth = footprint if footprint is not None else (pallet.width, pallet.depth)
+    if unit_scale is not None and footprint is not None:
+        unit_width, unit_depth = box_units(width, unit_scale), box_units(depth, unit_scale)
+    else:
+        unit_width, unit_depth = width, depth
+
+    units = [
+        Box_t(
+            id=load.id,
+            width=unit_width,
+            height=base_height + load.load_height,
+            depth=unit_depth,
+            weight=tare_weight + sum(b.weight for b in load.boxes),
+            priority=max((b.priority or 0.0 for b in load.boxes), default=0.0),
+            rotatable=False,
+        )
+        for load in pallets
+    ] + loose
+    remaining_ms = None if time_budget_ms is None else max(time_budget_ms - budget.elapsed_ms(), 1.0)
+    result = begin_pack(
+        truck, units, time_budget_ms=remaining_ms, cancel=cancel, quality=quality, selector=selector, workers=workers,
+        unit_scale=unit_scale, **options,
+    )
+
+    # `units` now holds what the truck could not take
+    by_id = {load.id: load for load in pallets}
+    left_ids = {u.id for u in units}
+    loaded = [load for load in pallets if load.id not in left_ids]
+    unplaced = [b for u in units for b in (by_id[u.id].boxes if u.id in by_id else [u])]
+    box_volume = sum(b.volume for load in loaded for b in load.boxes) + sum(b.volume for b in loose if b.id not in left_ids)
+
+    def restore(pb: PlacedBox_t) -> PlacedBox_t:
+        shifted = PlacedBox_t(id=pb.id, x=pb.x, y=pb.y + base_height, z=pb.z, rotation=pb.rotation)
+        return restore_placement(shifted, unit_scale) if unit_scale is not None else shifted
+
+    def dim(value: float) -> float:
+        return from_units(value, unit_scale) if unit_scale is not None else value
+
+    result["unplaced"] = [Box.model_validate(b) for b in unplaced]
+    result["utilization"] = box_volume / truck.volume if truck.volume > 0 else 0.0
+    result["pallets"] = [
+        {
+            "id": load.id,
+            "width": width if footprint is not None else dim(width),
+            "height": dim(base_height + load.load_height),
+            "depth": depth if footprint is not None else dim(depth),
+            "weight": tare_weight + sum(b.weight for b in load.boxes),
+            "placed": [PlacedBox(**vars(restore(pb))) for pb in load.placed],
+        }
+        for load in loaded
+    ]
+    result["notes"].insert(
+        0,
+        f"\n[PALLETS] pallets={len(pallets)} (full={stats['full']}, mixed={stats['mixed']}) | "
+        f"packed={stats['packed']} | reused={stats['reused']} | rounds={stats['rounds']} | loose={len(loose)} | "
+        f"truck units={len(pallets) + len(loose)} for {len(boxes)} boxes",
+    )
+    if budget.truncated:
+        result["truncated"] = True
+    return result
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from python.vtl_core.domain.models import Box_t, PackRegion, PlacedBox_t, Truck_t
+from python.vtl_core.orientations import orientations_of
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+from python.vtl_core.packing.processing import Hstix, iter_layer_pack, layer_pack
+from python.vtl_core.packing.scoring import ScoringEngine
+from python.vtl_core.packing.search import default_workers, task_pool
+
+_EPS = 1e-9
+
+# (placed, notes, unplaced boxes, regions left open, budget truncated) of one packed sibling
+SiblingResult = Tuple[List[PlacedBox_t], List[str], List[Box_t], List[PackRegion], bool]
+
+
+def _region_volume(region: PackRegion) -> float:
+    return region.width * region.depth * region.height
+
+
+def _fits(box: Box_t, region: PackRegion) -> bool:
+    return any(
+        w <= region.width + _EPS and h <= region.height + _EPS and d <= region.depth + _EPS
+        for w, h, d, _ in orientations_of(box)
+    )
+
+
+def allocate_boxes(boxes: List[Box_t], regions: List[PackRegion]) -> Tuple[List[List[Box_t]], List[Box_t]]:
+    """
+    Splits the boxes of every SKU between the sibling `regions` in proportion to the volume of
+    the regions the SKU fits in (largest remainder rounding), each region getting one
+    consecutive run of the SKU. Every share keeps the boxes in the caller's order.
+
+    Returns the shares, one per region, and the boxes that fit none of the regions.
+    """
+    skus: Dict[Tuple[float, float, float, bool], List[int]] = {}
+    for i, box in enumerate(boxes):
+        skus.setdefault((box.width, box.height, box.depth, box.rotatable), []).append(i)
+
+    volumes = np.array([_region_volume(r) for r in regions], dtype=float)
+    shares: List[List[int]] = [[] for _ in regions]
+    unfit: List[int] = []
+    for indices in skus.values():
+        fits = np.array([_fits(boxes[indices[0]], r) for r in regions], dtype=bool)
+        if not fits.any() or volumes[fits].sum() <= _EPS:
+            unfit.extend(indices)
+            continue
+
+        weights = np.where(fits, volumes, 0.0)
+        quotas = len(indices) * weights / weights.sum()
+        counts = np.floor(quotas + _EPS).astype(np.int64)
+        short = len(indices) - int(counts.sum())
+        if short > 0:
+            counts[np.argsort(counts - quotas, kind="stable")[:short]] += 1
+
+        bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+        for r in range(len(regions)):
+            shares[r].extend(indices[bounds[r]:bounds[r + 1]])
+
+    return [[boxes[i] for i in sorted(share)] for share in shares], [boxes[i] for i in sorted(unfit)]
+
+
+def pack_sibling(
+    truck: Truck_t,
+    region: PackRegion,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+) -> SiblingResult:
+    """
+    Packs one sibling region and everything above and beside it with layer_pack, in absolute
+    truck coordinates. Returns the regions it left open and its budget's truncated flag as
+    values, as a pool worker cannot update the caller's.
+    """
+    regions = [region]
+    placed, notes = layer_pack(
+        truck=truck, boxes=boxes, budget=budget, fixed_heuristic=fixed_heuristic, selector=selector, regions=regions
+    )
+    return placed, notes, boxes, regions, budget is not None and budget.truncated
+
+
+def partitioned_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    workers: Optional[int] = None,
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    stop_volume: Optional[float] = None,
+) -> Tuple[List[PlacedBox_t], List[str], Dict[str, Any]]:
+    """
+    layer_pack with spatially disjoint sibling regions packed concurrently.
+
+    Regions are packed one after another as in layer_pack until a layer leaves two or more
+    sibling regions open (above, right of and behind it). The remaining boxes are then split
+    between the siblings up front with allocate_boxes, and each sibling is packed on its own,
+    in up to `workers` processes when enough boxes are left. Finally
+    the boxes the siblings could not take are packed, in the caller's order, into the regions
+    every sibling left open, so a box that did not fit its own share of space can still use
+    another sibling's.
+
+    `boxes` ends up holding the unplaced boxes, as with layer_pack. The cancel token is checked
+    between siblings, the budget inside each layer_pack, and stop_volume in the serial phases.
+
+    Returns (placed, notes, stats) where stats reports the workers and siblings used.
+    """
+    workers = max(1, workers or default_workers())
+    load = list(boxes)
+    placed: List[PlacedBox_t] = []
+    notes: List[str] = []
+    volumes = {b.id: b.volume for b in boxes}
+    regions: List[PackRegion] = [
+        PackRegion(x=0.0, y=0.0, z=0.0, width=truck.width, depth=truck.depth, height=truck.height)
+    ]
+
+    # Serial phase: pack until sibling regions are open
+    for result in iter_layer_pack(
+        truck=truck, boxes=boxes, budget=budget, cancel=cancel, fixed_heuristic=fixed_heuristic, selector=selector,
+        stop_volume=stop_volume, regions=regions,
+    ):
+        placed.extend(result.placed)
+        notes.extend(result.notes)
+        if len(regions) >= 2:
+            break
+
+    def reached() -> bool:
+        return stop_volume is not None and sum(volumes[p.id] for p in placed) >= stop_volume
+
+    siblings = list(regions) if boxes and not reached() and not (budget is not None and budget.truncated) else []
+    shares, unfit = allocate_boxes(boxes, siblings) if siblings else ([], list(boxes))
+    open_regions: List[PackRegion] = [] if siblings else regions
+    leftover: List[Box_t] = list(unfit)
+    pool = task_pool(workers, len(siblings), len(boxes))
+
+    # Parallel phase: one sibling per task, merged in stack order
+    if siblings:
+        tasks = [(truck, region, share, budget, fixed_heuristic, selector) for region, share in zip(siblings, shares)]
+        results = pool.map(pack_sibling, *zip(*tasks)) if pool is not None else (pack_sibling(*t) for t in tasks)
+        for index, (sibling_placed, sibling_notes, rest, sibling_open, truncated) in enumerate(results):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            if budget is not None and truncated:
+                budget.truncated = True
+            notes.append(
+                f"\n> Sibling {index}: {len(shares[index])} boxes | placed={len(sibling_placed)} | "
+                f"open regions={len(sibling_open)}"
+            )
+            notes.extend(sibling_notes)
+            placed.extend(sibling_placed)
+            leftover.extend(rest)
+            open_regions.extend(sibling_open)
+
+    # Merge phase: leftovers, back in the caller's order, into the regions left open, largest
+    # first. Each region only sees the boxes that fit it, so a leading box that fits nowhere
+    # cannot use up the regions as failed anchors. Worker results hold copies of the boxes, so
+    # they are matched back by id.
+    order = {b.id: i for i, b in enumerate(load)}
+    boxes[:] = [load[order[b.id]] for b in sorted(leftover, key=lambda b: order[b.id])]
+    for region in sorted(open_regions, key=_region_volume, reverse=True) if siblings else []:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if not boxes or reached() or (budget is not None and budget.exhausted):
+            break
+        fitting = [b for b in boxes if _fits(b, region)]
+        if not fitting:
+            continue
+        merged, merge_notes = layer_pack(
+            truck=truck, boxes=fitting, budget=budget, fixed_heuristic=fixed_heuristic, selector=selector,
+            regions=[region],
+        )
+        placed.extend(merged)
+        notes.extend(merge_notes)
+        merged_ids = {p.id for p in merged}
+        boxes[:] = [b for b in boxes if b.id not in merged_ids]
+
+    score = ScoringEngine(truck).get_all_scores(placed, load)["total_score"]
+    stats = {
+        "mode": "partitioned",
+        "workers": min(workers, len(siblings)) if pool is not None else 1,
+        "siblings": len(siblings),
+        "best_score": score,
+    }
+    notes.insert(
+        0,
+        f"\n[PARTITIONED] workers={stats['workers']} | siblings={len(siblings)} | "
+        f"merged leftovers={len(leftover)} | unplaced={len(boxes)}",
+    )
+    return placed, notes, stats
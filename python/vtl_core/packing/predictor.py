@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from python.vtl_core.domain.models import Box_t, Truck_t
+from python.vtl_core.utils import _layer_orientations
+
+_EPS = 1e-9
+
+MODEL_PATH = Path(__file__).with_name("heuristic_model.json")
+
+# Predictions below this confidence (or with fewer samples) fall back to full trials
+MIN_CONFIDENCE = 0.85
+MIN_SAMPLES = 3
+
+
+def _batch_count(boxes: List[Box_t]) -> int:
+    anchor = boxes[0]
+    n = 0
+    while n < len(boxes) and boxes[n] == anchor:
+        n += 1
+    return n
+
+
+def _tiles(length: float, unit: float) -> bool:
+    ratio = length / unit
+    return abs(ratio - round(ratio)) <= 1e-6 and round(ratio) >= 1
+
+
+def region_features(region_truck: Truck_t, boxes: List[Box_t]) -> Dict[str, Any]:
+    """
+    Cheap features of the next batch (same-type prefix of `boxes`) in a region, computed
+    without simulating any heuristic. The orientations are the layer's (see
+    utils._layer_orientations): its footprints, in rotation-code order, at the upright height
+    the heuristics would pick, so `rotatable: false` boxes only turn about Y.
+    """
+    anchor = boxes[0]
+    count = _batch_count(boxes)
+    height, footprints = _layer_orientations(anchor, region_truck, region_truck.height)
+    width, depth, _ = footprints[0]
+
+    caps = [
+        math.floor(region_truck.width / w + _EPS) * math.floor(region_truck.depth / d + _EPS) for w, d, _ in footprints
+    ]
+    capacity = max(caps)
+
+    return {
+        "count": count,
+        "width_ratio": region_truck.width / width,
+        "depth_ratio": region_truck.depth / depth,
+        "capacity": capacity,
+        "fill": count / capacity if capacity > 0 else math.inf,
+        "tiles": any(_tiles(region_truck.width, w) and _tiles(region_truck.depth, d) for w, d, _ in footprints),
+        "rot_better": capacity > caps[0],
+        "aspect": region_truck.width / region_truck.depth if region_truck.depth > _EPS else math.inf,
+        "height_fits": height <= region_truck.height + _EPS,
+    }
+
+
+def feature_key(features: Dict[str, Any]) -> str:
+    """
+    Discretizes raw features into the decision-table key.
+    """
+    count_bucket = min(int(math.log2(features["count"])), 7)
+
+    fill = features["fill"]
+    if math.isinf(fill):
+        fill_bucket = "none"
+    elif fill <= 0.25:
+        fill_bucket = "q1"
+    elif fill <= 0.5:
+        fill_bucket = "q2"
+    elif fill <= 1.0:
+        fill_bucket = "q4"
+    else:
+        fill_bucket = "over"
+
+    aspect = features["aspect"]
+    aspect_bucket = "narrow" if aspect < 0.5 else ("wide" if aspect > 2.0 else "square")
+
+    parts = (
+        f"count{count_bucket}",
+        f"fill_{fill_bucket}",
+        f"tiles{int(features['tiles'])}",
+        f"rot{int(features['rot_better'])}",
+        aspect_bucket,
+        f"h{int(features['height_fits'])}",
+    )
+    return "|".join(parts)
+
+
+def fit_decision_table(samples: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fits the decision table from logged trial outcomes.
+
+    Each sample is {"key": str, "best": [heuristic names tied for the best score]}.
+    A cell predicts the heuristic that is (jointly) best most often; its confidence is the
+    fraction of the cell's samples where that heuristic was among the best.
+    """
+    cells: Dict[str, List[List[str]]] = {}
+    for sample in samples:
+        cells.setdefault(sample["key"], []).append(sample["best"])
+
+    table: Dict[str, Dict[str, Any]] = {}
+    for key, outcomes in sorted(cells.items()):
+        wins: Dict[str, int] = {}
+        for best in outcomes:
+            for name in best:
+                wins[name] = wins.get(name, 0) + 1
+
+        name, hits = max(sorted(wins.items()), key=lambda kv: kv[1])
+        table[key] = {
+            "heuristic": name,
+            "confidence": round(hits / len(outcomes), 4),
+            "samples": len(outcomes),
+        }
+
+    return table
+
+
+class HeuristicPredictor:
+    """
+    Decision-table predictor of the best per-region heuristic, fitted offline by
+    scripts/fit_heuristic_predictor.py.
+    """
+
+    def __init__(
+        self,
+        table: Dict[str, Dict[str, Any]],
+        min_confidence: float = MIN_CONFIDENCE,
+        min_samples: int = MIN_SAMPLES,
+    ):
+        self.table = table
+        self.min_confidence = min_confidence
+        self.min_samples = min_samples
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "HeuristicPredictor":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(
+            table=data["table"],
+            min_confidence=data.get("min_confidence", MIN_CONFIDENCE),
+            min_samples=data.get("min_samples", MIN_SAMPLES),
+        )
+
+    def predict(self, region_truck: Truck_t, boxes: List[Box_t]) -> Optional[Tuple[str, float]]:
+        """
+        Returns (heuristic name, confidence), or None when the cell is unknown or not
+        confident enough and the caller should run full trials.
+        """
+        cell = self.table.get(feature_key(region_features(region_truck, boxes)))
+        if cell is None:
+            return None
+        if cell["samples"] < self.min_samples or cell["confidence"] < self.min_confidence:
+            return None
+        return cell["heuristic"], cell["confidence"]
+
+
+@lru_cache(maxsize=1)
+def default_predictor() -> HeuristicPredictor:
+    return HeuristicPredictor.load()
@@ -1,22 +1,37 @@
 import time
 import copy
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Iterator, Optional, Union
 from enum import Enum, auto
 
-from python.api.schemas import PackingRequest, PlacedBox, Box
-from python.vtl_core.domain.models import Truck_t, Box_t, PlacedBox_t, PackRegion
+from python.api.schemas import (
+    FleetPackingRequest, OnlinePackingHeader, PackingRequest, PlacedBox, Box, Truck, TruckSelectionRequest,
+    PackingRegionChunk, PackingSummary, RepackRequest, SessionEdit, SessionOpen, SkuEntry, SkuLoad,
+)
+from python.vtl_core.domain.models import Truck_t, Box_t, PlacedBox_t, PackRegion, RegionResult
 
 from python.vtl_core.utils import (
     _compute_local_extents,
-    _translate_placements
+    _translate_placements,
+    _sort_key,
+    HeuristicResult,
 )
 from python.vtl_core.packing.heurisitics import (
     ff_row_pack,
     ff_guillotine_pack,
     maxrects_pack,
     skyline_pack,
+    ff_row_stepper,
+    ff_guillotine_stepper,
+    maxrects_stepper,
+    skyline_stepper,
 )
+from python.vtl_core.packing.extreme_points import iter_extreme_point_pack
+from python.vtl_core.packing.heightmap import HM_RESOLUTION, iter_heightmap_pack
 from python.vtl_core.packing.scoring import ScoringEngine
+from python.vtl_core.packing.control import TimeBudget, CancelToken
+from python.vtl_core.packing.predictor import default_predictor, region_features
+from python.vtl_core.bounds import compute_bounds, placed_volume
+from python.vtl_core.geometry import box_units, quantize_instances, restore_placement, truck_units
 
 _EPS = 1e-9
 
@@ -26,47 +41,256 @@ class Hstix(Enum):
     MAX = auto()
     SKY = auto()
 
-def create_instances(req: PackingRequest) -> Tuple[Truck_t, List[Box_t]]:
-    truck = Truck_t(
-        id=req.truck.id,
-        width=req.truck.width,
-        height=req.truck.height,
-        depth=req.truck.depth,
-        max_weight=req.truck.max_weight,
+HEURISTIC_LABELS = {
+    Hstix.FFR: "First-Fit Row",
+    Hstix.FFG: "First-Fit Guillotine",
+    Hstix.MAX: "MaxRects",
+    Hstix.SKY: "Skyline",
+}
+
+# Used without trials once a time budget starts running out, and by the draft tier
+FAST_HEURISTIC = Hstix.FFG
+
+QUALITY_TIERS = ("draft", "balanced", "thorough")
+
+# Tiers stream_pack accepts; /pack/stream returns 422 for the others
+STREAM_QUALITY_TIERS = ("draft", "balanced")
+
+# Per-request latency targets (ms) for each quality tier on the tests/*.json scenarios.
+# Checked by tests/test_stress.py and reported by scripts/run_stress_tests.py.
+QUALITY_LATENCY_TARGET_MS = {
+    "draft": 50.0,
+    "balanced": 250.0,
+    "thorough": 1000.0,
+}
+
+# Extra box orderings tried by the thorough tier; None keeps the caller's order.
+THOROUGH_ORDERINGS = {
+    "input": None,
+    "height_footprint": _sort_key,
+    "footprint": lambda box: (-box.footprint, -box.height, box.id),
+    "volume": lambda box: (-box.volume, box.id),
+}
+
+def _truck_instance(truck: Truck) -> Truck_t:
+    return Truck_t(
+        id=truck.id,
+        width=truck.width,
+        height=truck.height,
+        depth=truck.depth,
+        max_weight=truck.max_weight,
     )
 
-    boxes: List[Box_t] = []
-    for box in req.boxes:
-        boxes.append(
+def _box_instances(boxes: List[Box]) -> List[Box_t]:
+    return [
+        Box_t(
+            id=box.id,
+            width=box.width,
+            height=box.height,
+            depth=box.depth,
+            weight=box.weight,
+            priority=box.priority,
+            rotatable=box.rotatable,
+        )
+        for box in boxes
+    ]
+
+def _sku_instances(skus: List[SkuEntry]) -> List[Box_t]:
+    # The one place a `skus` entry becomes boxes: Box_t's straight from the entry, no Box models
+    boxes = []
+    for entry in skus:
+        if not entry.sized:
+            raise ValueError(f"SKU {entry.sku!r} has no size; give it inline or register it in the catalogue")
+        rotatable = True if entry.rotatable is None else entry.rotatable
+        priority = 0.0 if entry.priority is None else entry.priority
+        boxes += [
             Box_t(
-                id=box.id,
-                width=box.width,
-                height=box.height,
-                depth=box.depth,
-                weight=box.weight,
-                priority=box.priority,
+                id=box_id,
+                width=entry.width,
+                height=entry.height,
+                depth=entry.depth,
+                weight=entry.weight,
+                priority=priority,
+                rotatable=rotatable,
             )
-        )
+            for box_id in entry.box_ids()
+        ]
+    return boxes
+
+def _load_instances(req: SkuLoad) -> List[Box_t]:
+    return _box_instances(req.boxes) + _sku_instances(req.skus)
 
+def create_instances(req: PackingRequest) -> Tuple[Truck_t, List[Box_t]]:
+    truck, boxes, _ = create_packing_instances(req)
     return truck, boxes
 
-def get_best_heuristic_for_region(current_truck: Truck_t, current_batch: List[Box_t], region: PackRegion) -> Hstix:
+def create_packing_instances(req: PackingRequest) -> Tuple[Truck_t, List[Box_t], Optional[Dict[str, Box_t]]]:
     """
-    Simulates packing the current batch in the current region with all available heuristics,
-    scores them using the Math Engine, and returns the optimal Hstix enum.
+    create_instances, plus the request's own boxes by id in integer geometry, where the packer
+    works on rounded-up copies: responses echo these instead (see geometry.restore_boxes).
+    None in float geometry, where the packer's boxes are the request's.
+    """
+    truck = _truck_instance(req.truck)
+    boxes = _load_instances(req)
+
+    if req.geometry == "integer":
+        return (*quantize_instances(truck, boxes, req.unit_scale), {box.id: box for box in boxes})
+    return truck, boxes, None
+
+def create_fleet_instances(
+    req: Union[FleetPackingRequest, TruckSelectionRequest],
+) -> Tuple[List[Truck_t], List[Box_t], Optional[Dict[str, Box_t]]]:
+    """
+    create_packing_instances for a fleet or truck catalogue: one Truck_t per truck, in request
+    order, one shared load and, in integer geometry, the request's own boxes by id.
+    """
+    trucks = [_truck_instance(truck) for truck in req.trucks]
+    boxes = _load_instances(req)
+
+    if req.geometry == "integer":
+        originals = {box.id: box for box in boxes}
+        boxes = quantize_instances(trucks[0], boxes, req.unit_scale)[1]
+        trucks = [quantize_instances(truck, [], req.unit_scale)[0] for truck in trucks]
+        return trucks, boxes, originals
+    return trucks, boxes, None
+
+def _placed_instances(placed: List[PlacedBox]) -> List[PlacedBox_t]:
+    return [PlacedBox_t(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=pb.rotation) for pb in placed]
+
+def create_repack_instances(
+    req: RepackRequest,
+) -> Tuple[Truck_t, List[Box_t], List[PlacedBox_t], List[Box_t], List[PlacedBox_t]]:
+    """
+    The truck, layout boxes, layout placements, added boxes and pinned placements of an
+    incremental repack, in float geometry: placements are positions, not box sizes, so they
+    have no rounding direction that keeps an existing layout valid in integer units.
+    """
+    return (_truck_instance(req.truck), _box_instances(req.boxes), _placed_instances(req.placed), *create_edit_instances(req))
+
+def create_edit_instances(req: Union[RepackRequest, SessionEdit]) -> Tuple[List[Box_t], List[PlacedBox_t]]:
+    return _box_instances(req.add), _placed_instances(req.pinned)
+
+def create_session_instances(req: SessionOpen) -> Tuple[Truck_t, List[Box_t], List[PlacedBox_t]]:
+    """
+    The truck, boxes and adopted placements of a packing session, in float geometry like
+    create_repack_instances; integer geometry only applies to the session's full repacks.
+    """
+    return _truck_instance(req.truck), _load_instances(req), _placed_instances(req.placed or [])
+
+def create_online_truck(req: OnlinePackingHeader) -> Truck_t:
+    truck = _truck_instance(req.truck)
+
+    if req.geometry == "integer":
+        return quantize_instances(truck, [], req.unit_scale)[0]
+    return truck
+
+def create_arrival_instances(req: OnlinePackingHeader, boxes: List[Box]) -> List[Box_t]:
+    """
+    Box_t's for one arrival of an online stream, in the geometry the stream's header asks for.
+    """
+    arrivals = _box_instances(boxes)
+
+    if req.geometry == "integer":
+        return quantize_instances(_truck_instance(req.truck), arrivals, req.unit_scale)[1]
+    return arrivals
+
+def create_pallet_instance(req: PackingRequest) -> Tuple[Truck_t, float]:
+    """
+    The load space on top of one `req.pallet` deck, as a Truck_t, and the deck height. In integer
+    geometry the deck rounds up like a box and the load space down like a truck.
+    """
+    pallet = req.pallet
+    space = Truck_t(
+        id="pallet",
+        width=pallet.width,
+        height=pallet.max_height - pallet.base_height,
+        depth=pallet.depth,
+        max_weight=pallet.max_weight,
+    )
+
+    if req.geometry == "integer":
+        base = box_units(pallet.base_height, req.unit_scale) if pallet.base_height > 0 else 0
+        space = quantize_instances(space, [], req.unit_scale)[0]
+        space = Truck_t(
+            id=space.id,
+            width=space.width,
+            height=truck_units(pallet.max_height, req.unit_scale) - base,
+            depth=space.depth,
+            max_weight=space.max_weight,
+        )
+        return space, base
+    return space, pallet.base_height
+
+HEURISTICS = {
+    Hstix.FFR: ff_row_pack,
+    Hstix.FFG: ff_guillotine_pack,
+    Hstix.MAX: maxrects_pack,
+    Hstix.SKY: skyline_pack,
+}
+
+HEURISTIC_STEPPERS = {
+    Hstix.FFR: ff_row_stepper,
+    Hstix.FFG: ff_guillotine_stepper,
+    Hstix.MAX: maxrects_stepper,
+    Hstix.SKY: skyline_stepper,
+}
+
+SELECTORS = ("trials", "predict", "race")
+
+# Packing engines: "regions" splits the truck into PackRegions, each filled with one layer of
+# one SKU by the Hstix heuristic selected for it; "extreme_points" places boxes one at a time
+# at the extreme points of the whole load (see extreme_points.ExtremePointPacker); "heightmap"
+# places them one at a time on a height field over the truck floor (see
+# heightmap.HeightmapPacker); "walls" clusters boxes by footprint and loads the truck in walls
+# from the front, each filled by the region engine (see walls.plan_walls)
+ENGINES = ("regions", "extreme_points", "heightmap", "walls")
+
+ENGINE_LABELS = {
+    "regions": "Regional Dynamic Selection",
+    "extreme_points": "Extreme-Point Packing",
+    "heightmap": "Heightmap Packing",
+    "walls": "Wall Building",
+}
+
+# Packing modes: "regional" runs layer_pack once on the given order; "restart" searches over
+# SKU orderings in parallel worker processes (see search.restart_search); "beam" keeps the
+# best partial layouts over region decisions (see beam.beam_pack); "exact" solves the load
+# with CP-SAT, warm-started from the regional layout; "partitioned" splits the boxes between
+# sibling regions and packs them in parallel worker processes (see partition.partitioned_pack)
+SEARCH_MODES = ("auto", "regional", "restart", "beam", "exact", "partitioned")
+
+# Modes of the streamed tiers that pack in a single pass; /pack/stream returns 422 for the others
+STREAM_MODES = ("auto", "regional")
+
+# "auto" resolves to "exact" (CP-SAT, see exact.exact_pack) for thorough requests of at most
+# this many boxes on the "regions" engine, within EXACT_AUTO_TIME_LIMIT_MS, and to "regional"
+# otherwise
+EXACT_AUTO_MAX_BOXES = 16
+EXACT_AUTO_TIME_LIMIT_MS = 500.0
+
+# Racing selector: boxes advanced per candidate per round, and how many fewer boxes a settled
+# candidate may have placed than the leader before it is eliminated.
+RACE_STEP = 8
+RACE_MARGIN = 0
+
+def score_heuristics_for_region(
+    current_truck: Truck_t,
+    current_batch: List[Box_t],
+    region: PackRegion,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[Hstix, float]:
+    """
+    Simulates packing the current batch in the current region with all available heuristics
+    and scores each with the Math Engine. Heuristics that place nothing are left out.
+    Raises PackCancelled between trials once `cancel` is tripped.
     """
     engine = ScoringEngine(current_truck)
-    best_score = -1.0
-    best_algo = Hstix.FFG # Default
+    scores: Dict[Hstix, float] = {}
 
-    heuristics = {
-        Hstix.FFR: ff_row_pack,
-        Hstix.FFG: ff_guillotine_pack,
-        Hstix.MAX: maxrects_pack,
-        Hstix.SKY: skyline_pack
-    }
+    for algo_enum, algo_func in HEURISTICS.items():
+        if cancel is not None:
+            cancel.raise_if_cancelled()
 
-    for algo_enum, algo_func in heuristics.items():
         test_truck = copy.deepcopy(current_truck)
         test_batch = copy.deepcopy(current_batch)
 
@@ -81,79 +305,667 @@ def get_best_heuristic_for_region(current_truck: Truck_t, current_batch: List[Bo
             # 2. Translate coordinates to absolute truck space for accurate scoring
             _translate_placements(placed_in_batch, region.x, region.z)
 
-            # 3. Score the layout
-            score_data = engine.get_all_scores(placed_in_batch, test_batch)
-            if score_data["total_score"] > best_score:
-                best_score = score_data["total_score"]
-                best_algo = algo_enum
+            # 3. Score the layout against the batch as it was before the trial consumed it
+            score_data = engine.get_all_scores(placed_in_batch, current_batch)
+            scores[algo_enum] = score_data["total_score"]
         except Exception:
             continue
 
+    return scores
+
+def race_heuristics_for_region(
+    current_truck: Truck_t,
+    current_batch: List[Box_t],
+    region: PackRegion,
+    cancel: Optional[CancelToken] = None,
+    step: int = RACE_STEP,
+    margin: int = RACE_MARGIN,
+) -> Tuple[Dict[Hstix, float], List[Hstix]]:
+    """
+    Racing alternative to score_heuristics_for_region.
+
+    All heuristics advance in lockstep, `step` boxes per round. A candidate that is settled
+    (its first failure fixed its final placement count) and trails the leader's running placed
+    count by more than `margin` boxes is eliminated. Survivors stop as soon as they are settled,
+    so the boxes that could never fit are not searched, and only survivors are scored with the
+    Math Engine.
+
+    Returns (scores of the survivors, eliminated heuristics in elimination order).
+    """
+    engine = ScoringEngine(current_truck)
+    alive = {
+        algo: factory(truck=current_truck, boxes=list(current_batch), layer_y=region.y)
+        for algo, factory in HEURISTIC_STEPPERS.items()
+    }
+    eliminated: List[Hstix] = []
+
+    while True:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+        for stepper in alive.values():
+            if not stepper.settled:
+                stepper.step(step)
+
+        leader = max(len(stepper.placed) for stepper in alive.values())
+        for algo, stepper in list(alive.items()):
+            if len(alive) > 1 and stepper.settled and leader - len(stepper.placed) > margin:
+                eliminated.append(algo)
+                del alive[algo]
+
+        if all(stepper.settled for stepper in alive.values()):
+            break
+
+    scores: Dict[Hstix, float] = {}
+    for algo, stepper in alive.items():
+        if not stepper.placed:
+            continue
+        placed_in_batch = copy.deepcopy(stepper.placed)
+        _translate_placements(placed_in_batch, region.x, region.z)
+        scores[algo] = engine.get_all_scores(placed_in_batch, current_batch)["total_score"]
+
+    return scores, eliminated
+
+def get_best_heuristic_for_region(
+    current_truck: Truck_t,
+    current_batch: List[Box_t],
+    region: PackRegion,
+    cancel: Optional[CancelToken] = None,
+) -> Hstix:
+    """
+    Simulates packing the current batch in the current region with all available heuristics,
+    scores them using the Math Engine, and returns the optimal Hstix enum.
+    Raises PackCancelled between trials once `cancel` is tripped.
+    """
+    scores = score_heuristics_for_region(current_truck, current_batch, region, cancel=cancel)
+    return _best_of(scores)
+
+def _best_of(scores: Dict[Hstix, float]) -> Hstix:
+    best_score = -1.0
+    best_algo = Hstix.FFG # Default
+
+    for algo_enum, score in scores.items():
+        if score > best_score:
+            best_score = score
+            best_algo = algo_enum
+
     return best_algo
 
-def begin_pack(truck: Truck_t, boxes: List[Box_t]) -> Dict[str, Any]:
-    print(f"\nEvaluating {len(boxes)} boxes with Regional Dynamic Selection...")
+def select_heuristic(
+    current_truck: Truck_t,
+    current_batch: List[Box_t],
+    region: PackRegion,
+    selector: str = "trials",
+    cancel: Optional[CancelToken] = None,
+    trial_log: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[Hstix, str]:
+    """
+    Chooses the heuristic for one region. Returns (heuristic, how it was chosen).
+
+    selector:
+        "trials"  : run and score every heuristic (get_best_heuristic_for_region)
+        "predict" : ask the offline-fitted HeuristicPredictor; fall back to trials when
+                    it has no confident answer for the region's features
+        "race"    : advance all heuristics in lockstep and drop clearly losing ones early
+                    (race_heuristics_for_region)
+
+    Every selection is appended to `trial_log` with its selector, choice and selection time;
+    regions that ran full trials also log their features and per-heuristic scores, which is
+    what scripts/fit_heuristic_predictor.py fits the predictor from.
+    """
+    if selector not in SELECTORS:
+        raise ValueError(f"Invalid selector: {selector!r}")
+
+    start = time.perf_counter()
+    entry: Dict[str, Any] = {"selector": selector}
+
+    if selector == "race":
+        scores, eliminated = race_heuristics_for_region(current_truck, current_batch, region, cancel=cancel)
+        heuristic = _best_of(scores)
+        chosen_by = "race" + (f", eliminated {'/'.join(algo.name for algo in eliminated)}" if eliminated else "")
+        entry["eliminated"] = [algo.name for algo in eliminated]
+    else:
+        prediction = None
+        if selector == "predict":
+            prediction = default_predictor().predict(current_truck, current_batch)
+
+        if prediction is not None:
+            name, confidence = prediction
+            heuristic = Hstix[name]
+            chosen_by = f"predicted, confidence {confidence:.2f}"
+        else:
+            scores = score_heuristics_for_region(current_truck, current_batch, region, cancel=cancel)
+            heuristic = _best_of(scores)
+            chosen_by = "trials" if selector == "trials" else "trials, low-confidence prediction"
+            entry["features"] = region_features(current_truck, current_batch)
+            entry["scores"] = {algo.name: score for algo, score in scores.items()}
+
+    if trial_log is not None:
+        entry["chosen"] = heuristic.name
+        entry["selection_ms"] = (time.perf_counter() - start) * 1000
+        trial_log.append(entry)
+
+    return heuristic, chosen_by
+
+def begin_pack_internal(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    time_budget_ms: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    quality: str = "balanced",
+    selector: str = "trials",
+    mode: str = "auto",
+    workers: Optional[int] = None,
+    beam_width: int = 4,
+    target_gap: float = 0.0,
+    unit_scale: Optional[int] = None,
+    engine: str = "regions",
+    resolution: float = HM_RESOLUTION,
+) -> Dict[str, Any]:
+    """
+    begin_pack without the API models: `placed` and `unplaced` are the packer's PlacedBox_t and
+    Box_t records, for callers that serialize or keep them as they are. With `unit_scale`,
+    placements are converted back to metres and unplaced boxes stay the packer's integer
+    copies, for the caller to swap for its own boxes (geometry.restore_boxes).
+    """
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Invalid quality tier: {quality!r}")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Invalid search mode: {mode!r}")
+    if not 0.0 <= target_gap < 1.0:
+        raise ValueError(f"Invalid target gap: {target_gap!r}")
+    if engine not in ENGINES:
+        raise ValueError(f"Invalid packing engine: {engine!r}")
+    if engine != "regions" and mode not in ("auto", "regional"):
+        raise ValueError(f"Search mode {mode!r} requires the 'regions' engine")
+
+    exact_limit_ms = time_budget_ms
+    if mode == "auto":
+        small = quality == "thorough" and len(boxes) <= EXACT_AUTO_MAX_BOXES
+        mode = "exact" if small and engine == "regions" else "regional"
+        if exact_limit_ms is None:
+            exact_limit_ms = EXACT_AUTO_TIME_LIMIT_MS
+
+    print(f"\nEvaluating {len(boxes)} boxes with {ENGINE_LABELS[engine]} ({quality})...")
     start_time = time.time()
     original_load = copy.deepcopy(boxes)
+    budget = TimeBudget(time_budget_ms)
+    search_stats = None
+
+    # The heightmap resolution is given in metres
+    if unit_scale is not None:
+        resolution *= unit_scale
+
+    # Stop searching once the layout is within target_gap of the utilization bound
+    bounds = compute_bounds(truck, boxes)
+    stop_volume = bounds.target_volume(target_gap)
 
     # Execute the core packing loop
-    placed_internal, notes = layer_pack(truck=truck, boxes=boxes)
+    if mode == "restart":
+        # Imported here: the search modules build on this module
+        from python.vtl_core.packing.search import SEARCH_DEFAULT_BUDGET_MS, restart_search
+        if time_budget_ms is None:
+            time_budget_ms = SEARCH_DEFAULT_BUDGET_MS
+        placed_internal, notes, search_stats = restart_search(
+            truck=truck, boxes=boxes, time_budget_ms=time_budget_ms, workers=workers, selector=selector, cancel=cancel,
+            stop_volume=stop_volume, budget=budget,
+        )
+    elif mode == "beam":
+        from python.vtl_core.packing.beam import beam_pack
+        placed_internal, notes, search_stats = beam_pack(
+            truck=truck, boxes=boxes, beam_width=beam_width, budget=budget, cancel=cancel, stop_volume=stop_volume
+        )
+    elif mode == "partitioned":
+        from python.vtl_core.packing.partition import partitioned_pack
+        fixed = FAST_HEURISTIC if quality == "draft" else None
+        placed_internal, notes, search_stats = partitioned_pack(
+            truck=truck, boxes=boxes, workers=workers, budget=budget, cancel=cancel, fixed_heuristic=fixed,
+            selector=selector, stop_volume=stop_volume,
+        )
+    elif mode == "exact":
+        from python.vtl_core.packing.exact import exact_pack
+        hint, _ = layer_pack(truck=truck, boxes=list(boxes), cancel=cancel, selector=selector)
+        if exact_limit_ms is not None:
+            exact_limit_ms = max(exact_limit_ms - budget.elapsed_ms(), 1.0)
+        placed_internal, notes, search_stats = exact_pack(
+            truck=truck, boxes=boxes, hint=hint, time_limit_ms=exact_limit_ms, workers=workers, cancel=cancel,
+            stop_volume=stop_volume, target_gap=target_gap,
+        )
+    elif quality == "thorough":
+        placed_internal, notes = thorough_pack(
+            truck=truck, boxes=boxes, budget=budget, cancel=cancel, selector=selector, stop_volume=stop_volume,
+            engine=engine, resolution=resolution, workers=workers,
+        )
+    else:
+        fixed = FAST_HEURISTIC if quality == "draft" else None
+        placed_internal, notes = engine_pack(
+            engine, truck=truck, boxes=boxes, budget=budget, cancel=cancel, fixed_heuristic=fixed, selector=selector,
+            stop_volume=stop_volume, resolution=resolution, workers=workers,
+        )
 
     # Grade the final, completed truck load
-    engine = ScoringEngine(truck)
-    score_data = engine.get_all_scores(placed_internal, original_load)
+    scorer = ScoringEngine(truck)
+    score_data = scorer.get_all_scores(placed_internal, original_load)
+    achieved = placed_volume(placed_internal, {b.id: b for b in original_load}) / truck.volume if truck.volume > 0 else 0.0
+    gap = bounds.gap(achieved)
 
     # Format output for the API/Unity
     notes.insert(0, "\n[REGIONAL DYNAMIC SELECTION RESULTS]")
-    notes.append("\n===================================")
-    notes.append(f"> UTILIZATION: {score_data['utilization'] * 100:.2f} %")
-    notes.append(f"> STABILITY: {score_data['stability'] * 100:.2f} %")
-    notes.append(f"> MASS BALANCE: {score_data['mass_balance'] * 100:.2f} %")
-    notes.append(f"> FINAL SCORE: {score_data['total_score'] * 100:.2f} / 100")
-    notes.append("===================================")
+    if budget.truncated:
+        notes.append(f"\n> TRUNCATED: time budget of {time_budget_ms:.0f} ms exhausted with {len(boxes)} boxes remaining.")
+    notes.append(
+        f"\n> BOUNDS: utilization <= {bounds.max_utilization * 100:.2f} % | boxes <= {bounds.max_count} | "
+        f"gap {gap * 100:.2f} %" + (" (provably optimal)" if gap <= 0.0 else "")
+    )
+    if unit_scale is not None:
+        notes.append(f"\n> GEOMETRY: integer units of 1/{unit_scale} m")
+    notes.extend(format_score_notes(score_data))
 
-    placed = [PlacedBox(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=getattr(pb, 'rotation', 0)) for pb in placed_internal]
-    unplaced = [Box(id=b.id, width=b.width, height=b.height, depth=b.depth, weight=b.weight, priority=b.priority) for b in boxes]
+    # Integer geometry is converted back to metres only here
+    if unit_scale is not None:
+        placed_internal = [restore_placement(pb, unit_scale) for pb in placed_internal]
 
     best_payload = {
-        "placed": placed,
-        "unplaced": unplaced,
+        "placed": placed_internal,
+        "unplaced": boxes,
         "utilization": score_data["utilization"],
         "runtime_ms": (time.time() - start_time) * 1000,
-        "notes": notes
+        "notes": notes,
+        "truncated": budget.truncated,
+        "search": search_stats,
+        "gap": gap,
     }
     
     print(f"Dynamic Evaluation complete in {best_payload['runtime_ms']:.2f}ms")
     return best_payload
 
+def begin_pack(truck: Truck_t, boxes: List[Box_t], **options: Any) -> Dict[str, Any]:
+    """
+    Packs `boxes` into `truck` (see begin_pack_internal for the options) and returns the
+    PackingResponse fields, with placements and unplaced boxes as API models.
+    """
+    payload = begin_pack_internal(truck, boxes, **options)
+    payload["placed"] = [
+        PlacedBox(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=getattr(pb, 'rotation', 0)) for pb in payload["placed"]
+    ]
+    payload["unplaced"] = [Box.model_validate(b) for b in payload["unplaced"]]
+    return payload
+
+def stream_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    time_budget_ms: Optional[float] = None,
+    unit_scale: Optional[int] = None,
+    engine: str = "regions",
+    resolution: float = HM_RESOLUTION,
+    workers: Optional[int] = None,
+    cancel: Optional[CancelToken] = None,
+    quality: str = "balanced",
+    selector: str = "trials",
+    target_gap: float = 0.0,
+) -> Iterator[Union[PackingRegionChunk, PackingSummary]]:
+    """
+    Streaming counterpart of begin_pack. Yields one PackingRegionChunk per region that
+    committed placements, followed by a single PackingSummary with the final scores and
+    the unplaced boxes. Only the internal placements are retained between chunks.
+    Only the single-pass STREAM_QUALITY_TIERS stream: the thorough tier and the search modes
+    keep the best of several layouts, so none is final before they end.
+    With `unit_scale`, the instances are in integer geometry and chunks are converted back; the
+    summary's unplaced boxes stay integer copies, as in begin_pack_internal.
+    The "extreme_points" and "heightmap" engines have no regions; their chunks are batches of
+    EP_CHECK_EVERY / HM_CHECK_EVERY boxes; the "walls" engine sends one chunk per wall.
+    `resolution` is in metres, like in begin_pack. Raises PackCancelled between chunks and
+    regions once `cancel` is tripped.
+    """
+    if quality not in STREAM_QUALITY_TIERS:
+        raise ValueError(f"Quality tier {quality!r} is not streamed")
+    if not 0.0 <= target_gap < 1.0:
+        raise ValueError(f"Invalid target gap: {target_gap!r}")
+    if unit_scale is not None:
+        resolution *= unit_scale
+
+    start_time = time.time()
+    original_load = list(boxes)
+    placed_internal: List[PlacedBox_t] = []
+    budget = TimeBudget(time_budget_ms)
+    stop_volume = compute_bounds(truck, boxes).target_volume(target_gap)
+    fixed = FAST_HEURISTIC if quality == "draft" else None
+
+    results = iter_engine_pack(
+        engine, truck=truck, boxes=boxes, budget=budget, cancel=cancel, fixed_heuristic=fixed, selector=selector,
+        stop_volume=stop_volume, resolution=resolution, workers=workers,
+    )
+    for result in results:
+        if not result.placed:
+            continue
+
+        placed_internal.extend(result.placed)
+        committed = result.placed if unit_scale is None else [restore_placement(pb, unit_scale) for pb in result.placed]
+        yield PackingRegionChunk(
+            region=result.index,
+            heuristic=result.heuristic,
+            placed=[PlacedBox(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=pb.rotation) for pb in committed],
+        )
+
+    score_data = ScoringEngine(truck).get_all_scores(placed_internal, original_load)
+
+    yield PackingSummary(
+        placed_count=len(placed_internal),
+        unplaced=[Box.model_validate(b) for b in boxes],
+        utilization=score_data["utilization"],
+        stability=score_data["stability"],
+        mass_balance=score_data["mass_balance"],
+        total_score=score_data["total_score"],
+        runtime_ms=(time.time() - start_time) * 1000,
+        truncated=budget.truncated,
+    )
+
+def thorough_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    selector: str = "trials",
+    stop_volume: Optional[float] = None,
+    engine: str = "regions",
+    resolution: float = HM_RESOLUTION,
+    workers: Optional[int] = None,
+) -> Tuple[List[PlacedBox_t], List[str]]:
+    """
+    Thorough tier: runs the regional selection (or the packer of another `engine`) once
+    per THOROUGH_ORDERINGS entry and keeps the layout with the best ScoringEngine total. `boxes`
+    ends up holding the unplaced boxes of the winning layout. Stops trying further orderings
+    once the budget is exhausted or an ordering reaches `stop_volume`.
+    """
+    scorer = ScoringEngine(truck)
+    original_load = list(boxes)
+
+    best: Optional[Tuple[float, int, str, List[PlacedBox_t], List[str], List[Box_t]]] = None
+    summary: List[str] = []
+
+    volumes = {b.id: b.volume for b in original_load}
+
+    for name, key in THOROUGH_ORDERINGS.items():
+        if best is not None and budget is not None and budget.exhausted:
+            break
+        if best is not None and stop_volume is not None and sum(volumes[p.id] for p in best[3]) >= stop_volume:
+            break
+
+        trial_boxes = list(original_load) if key is None else sorted(original_load, key=key)
+        placed, notes = engine_pack(
+            engine, truck=truck, boxes=trial_boxes, budget=budget, cancel=cancel, selector=selector,
+            stop_volume=stop_volume, resolution=resolution, workers=workers,
+        )
+        score = scorer.get_all_scores(placed, original_load)["total_score"]
+        summary.append(f"> Ordering [{name}]: placed={len(placed)} | score={score * 100:.2f}")
+
+        if best is None or (score, len(placed)) > (best[0], best[1]):
+            best = (score, len(placed), name, placed, notes, trial_boxes)
+
+    _, _, name, placed, notes, leftover = best
+    boxes[:] = leftover
+    notes.insert(0, "\n[THOROUGH ORDERING SEARCH]\n" + "\n".join(summary) + f"\n> Kept ordering [{name}]")
+    return placed, notes
+
+def format_score_notes(score_data: Dict[str, Any]) -> List[str]:
+    return [
+        "\n===================================",
+        f"> UTILIZATION: {score_data['utilization'] * 100:.2f} %",
+        f"> STABILITY: {score_data['stability'] * 100:.2f} %",
+        f"> MASS BALANCE: {score_data['mass_balance'] * 100:.2f} %",
+        f"> FINAL SCORE: {score_data['total_score'] * 100:.2f} / 100",
+        "===================================",
+    ]
+
 def layer_pack(
     truck: Truck_t,
-    boxes: List[Box_t]
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    trial_log: Optional[List[Dict[str, Any]]] = None,
+    stop_volume: Optional[float] = None,
+    regions: Optional[List[PackRegion]] = None,
 ) -> Tuple[List[PlacedBox_t], List[str]]:
 
     placed: List[PlacedBox_t] = []
     notes: List[str] = []
 
-    # Start with the full original truck as the first region.
-    regions: List[PackRegion] = [
-        PackRegion(
-            x=0.0,
-            y=0.0,
-            z=0.0,
-            width=truck.width,
-            depth=truck.depth,
-            height=truck.height,
+    for result in iter_layer_pack(
+        truck=truck,
+        boxes=boxes,
+        budget=budget,
+        cancel=cancel,
+        fixed_heuristic=fixed_heuristic,
+        selector=selector,
+        trial_log=trial_log,
+        stop_volume=stop_volume,
+        regions=regions,
+    ):
+        placed.extend(result.placed)
+        notes.extend(result.notes)
+
+    return placed, notes
+
+def engine_pack(
+    engine: str,
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    stop_volume: Optional[float] = None,
+    resolution: float = HM_RESOLUTION,
+    workers: Optional[int] = None,
+) -> Tuple[List[PlacedBox_t], List[str]]:
+    """
+    Collects iter_engine_pack into (placed, notes), like layer_pack.
+    """
+    placed: List[PlacedBox_t] = []
+    notes: List[str] = []
+
+    for result in iter_engine_pack(
+        engine,
+        truck=truck,
+        boxes=boxes,
+        budget=budget,
+        cancel=cancel,
+        fixed_heuristic=fixed_heuristic,
+        selector=selector,
+        stop_volume=stop_volume,
+        resolution=resolution,
+        workers=workers,
+    ):
+        placed.extend(result.placed)
+        notes.extend(result.notes)
+
+    return placed, notes
+
+def iter_engine_pack(
+    engine: str,
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    stop_volume: Optional[float] = None,
+    resolution: float = HM_RESOLUTION,
+    workers: Optional[int] = None,
+) -> Iterator[RegionResult]:
+    """
+    Packs `boxes` with one of the ENGINES. `fixed_heuristic` only applies to "regions",
+    `selector` to "regions" and "walls", `resolution` (heightmap cell size, in the instances'
+    units) only to "heightmap" and `workers` (wall packing processes) only to "walls".
+    """
+    match engine:
+        case "regions":
+            return iter_layer_pack(
+                truck=truck, boxes=boxes, budget=budget, cancel=cancel, fixed_heuristic=fixed_heuristic,
+                selector=selector, stop_volume=stop_volume,
+            )
+        case "extreme_points":
+            return iter_extreme_point_pack(truck=truck, boxes=boxes, budget=budget, cancel=cancel, stop_volume=stop_volume)
+        case "heightmap":
+            return iter_heightmap_pack(
+                truck=truck, boxes=boxes, resolution=resolution, budget=budget, cancel=cancel, stop_volume=stop_volume
+            )
+        case "walls":
+            # Imported here: the wall engine builds on layer_pack
+            from python.vtl_core.packing.walls import iter_wall_pack
+            return iter_wall_pack(
+                truck=truck, boxes=boxes, budget=budget, cancel=cancel, selector=selector, stop_volume=stop_volume,
+                workers=workers,
+            )
+        case _:
+            raise ValueError(f"Invalid packing engine: {engine!r}")
+
+def run_heuristic(heuristic: Hstix, local_truck: Truck_t, boxes: List[Box_t], layer_y: float) -> HeuristicResult:
+    """
+    Packs the next batch of `boxes` into `local_truck` with the given heuristic.
+    """
+    match heuristic:
+        case Hstix.FFR:
+            return ff_row_pack(truck=local_truck, boxes=boxes, layer_y=layer_y)
+        case Hstix.FFG:
+            return ff_guillotine_pack(truck=local_truck, boxes=boxes, layer_y=layer_y)
+        case Hstix.MAX:
+            return maxrects_pack(truck=local_truck, boxes=boxes, layer_y=layer_y)
+        case Hstix.SKY:
+            return skyline_pack(truck=local_truck, boxes=boxes, layer_y=layer_y)
+        case _:
+            raise ValueError("Invalid heuristic choice.")
+
+def child_regions(
+    region: PackRegion,
+    used_h: float,
+    x_cursor: float,
+    z_cursor: float,
+    used_x: float,
+    used_z: float,
+) -> List[PackRegion]:
+    """
+    Sub-regions left after a layer is packed into `region`, in the order they are pushed
+    onto the region stack (the last one is processed first).
+    """
+    children: List[PackRegion] = []
+
+    # 1) Above supported rectangle
+    remaining_height_above = region.height - used_h
+    if used_h > _EPS and x_cursor > _EPS and z_cursor > _EPS and remaining_height_above > _EPS:
+        children.append(
+            PackRegion(
+                x=region.x,
+                y=region.y + used_h,
+                z=region.z,
+                width=x_cursor,
+                depth=z_cursor,
+                height=remaining_height_above,
+            )
         )
-    ]
+
+    # 2) Right floor remainder of the used envelope
+    remaining_right_width = region.width - used_x
+    if remaining_right_width > _EPS:
+        children.append(
+            PackRegion(
+                x=region.x + used_x,
+                y=region.y,
+                z=region.z,
+                width=remaining_right_width,
+                depth=region.depth,
+                height=region.height,
+            )
+        )
+
+    # 3) Back floor remainder of the used envelope
+    remaining_back_depth = region.depth - used_z
+    if remaining_back_depth > _EPS and used_x > _EPS:
+        children.append(
+            PackRegion(
+                x=region.x,
+                y=region.y,
+                z=region.z + used_z,
+                width=used_x,
+                depth=remaining_back_depth,
+                height=region.height,
+            )
+        )
+
+    return children
+
+def iter_layer_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    fixed_heuristic: Optional[Hstix] = None,
+    selector: str = "trials",
+    trial_log: Optional[List[Dict[str, Any]]] = None,
+    stop_volume: Optional[float] = None,
+    regions: Optional[List[PackRegion]] = None,
+) -> Iterator[RegionResult]:
+    """
+    Generator form of layer_pack. Yields one RegionResult per processed region as soon as
+    its placements are committed (in absolute truck coordinates). Regions where nothing
+    could be placed are yielded too, with an empty placement list, so callers see every note.
+
+    `boxes` is mutated exactly as in layer_pack: after exhaustion it holds the unplaced boxes.
+
+    With a `budget`, elapsed time is checked between regions: once degraded, the trial
+    selection is replaced by FAST_HEURISTIC; once exhausted, the loop stops, sets
+    `budget.truncated` and leaves the remaining boxes in `boxes`.
+
+    With a `cancel` token, PackCancelled is raised between regions and heuristic trials
+    as soon as the token is tripped.
+
+    With a `fixed_heuristic`, every region uses that heuristic and no trials are run.
+    Otherwise `selector` and `trial_log` are passed on to select_heuristic.
+
+    With a `stop_volume` (see PackingBounds.target_volume), the loop stops once the placed
+    box volume reaches it, leaving the remaining boxes in `boxes`.
+
+    With `regions` (absolute truck coordinates, the last one is packed first), packing starts
+    from those open regions instead of the whole truck. The list is used as the region stack,
+    so afterwards it holds the regions that were still open when the loop stopped.
+    """
+
+    # Start with the full original truck as the first region.
+    if regions is None:
+        regions = [
+            PackRegion(
+                x=0.0,
+                y=0.0,
+                z=0.0,
+                width=truck.width,
+                depth=truck.depth,
+                height=truck.height,
+            )
+        ]
 
     layer_index = 0
+    volumes = {b.id: b.volume for b in boxes} if stop_volume is not None else {}
+    placed_volume = 0.0
 
     while boxes and regions:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+        if budget is not None and budget.exhausted:
+            budget.truncated = True
+            break
+
+        if stop_volume is not None and placed_volume >= stop_volume:
+            break
+
         region = regions.pop()
 
         if region.width <= _EPS or region.depth <= _EPS or region.height <= _EPS:
             continue
 
+        notes: List[str] = []
         initial_box_count = len(boxes)
         anchor = boxes[0]
 
@@ -166,23 +978,24 @@ def layer_pack(
         )
 
         # --- THE HOOK: Dynamically select the best algorithm for this specific region ---
-        heuristic = get_best_heuristic_for_region(local_truck, boxes, region)
-
-        match heuristic:
-            case Hstix.FFR:
-                layer_data = ff_row_pack(truck=local_truck, boxes=boxes, layer_y=region.y)
-                notes.append(f"\n> Region {layer_index}: Selected [First-Fit Row]")
-            case Hstix.FFG:
-                layer_data = ff_guillotine_pack(truck=local_truck, boxes=boxes, layer_y=region.y)
-                notes.append(f"\n> Region {layer_index}: Selected [First-Fit Guillotine]")
-            case Hstix.MAX:
-                layer_data = maxrects_pack(truck=local_truck, boxes=boxes, layer_y=region.y)
-                notes.append(f"\n> Region {layer_index}: Selected [MaxRects]")
-            case Hstix.SKY:
-                layer_data = skyline_pack(truck=local_truck, boxes=boxes, layer_y=region.y)
-                notes.append(f"\n> Region {layer_index}: Selected [Skyline]")
-            case _:
-                raise ValueError("Invalid heuristic choice.")
+        fast_mode = budget is not None and budget.degraded
+        chosen_by = ""
+        if fixed_heuristic is not None:
+            heuristic = fixed_heuristic
+        elif fast_mode:
+            heuristic = FAST_HEURISTIC
+            chosen_by = "time budget: fast mode"
+        else:
+            heuristic, chosen_by = select_heuristic(
+                local_truck, boxes, region, selector=selector, cancel=cancel, trial_log=trial_log
+            )
+
+        layer_data = run_heuristic(heuristic, local_truck, boxes, region.y)
+
+        notes.append(
+            f"\n> Region {layer_index}: Selected [{HEURISTIC_LABELS[heuristic]}]"
+            + (f" ({chosen_by})" if chosen_by and chosen_by != "trials" else "")
+        )
 
         local_placed, layer_notes, used_h, x_cursor, z_cursor = layer_data
 
@@ -195,6 +1008,7 @@ def layer_pack(
         # If nothing was placed here, skip this region and continue with the next one.
         if not local_placed:
             notes.append("\t↳ No boxes placed in this region.")
+            yield RegionResult(index=layer_index, region=region, heuristic=heuristic.name, placed=[], notes=notes)
             layer_index += 1
             continue
 
@@ -205,60 +1019,18 @@ def layer_pack(
         _translate_placements(local_placed, region.x, region.z)
         for lp in local_placed:
             notes.append(f"Box [{lp.id}] placed at ({lp.x}, {lp.y}, {lp.z})")
-
-        placed.extend(local_placed)
+        if stop_volume is not None:
+            placed_volume += sum(volumes[lp.id] for lp in local_placed)
 
         # ---------- Create child regions ----------
-
-        # 1) Above supported rectangle
-        remaining_height_above = region.height - used_h
-        if used_h > _EPS and x_cursor > _EPS and z_cursor > _EPS and remaining_height_above > _EPS:
-            regions.append(
-                PackRegion(
-                    x=region.x,
-                    y=region.y + used_h,
-                    z=region.z,
-                    width=x_cursor,
-                    depth=z_cursor,
-                    height=remaining_height_above,
-                )
-            )
-
-        # 2) Right floor remainder of the used envelope
-        remaining_right_width = region.width - used_x
-        if remaining_right_width > _EPS:
-            regions.append(
-                PackRegion(
-                    x=region.x + used_x,
-                    y=region.y,
-                    z=region.z,
-                    width=remaining_right_width,
-                    depth=region.depth,
-                    height=region.height,
-                )
-            )
-
-        # 3) Back floor remainder of the used envelope
-        remaining_back_depth = region.depth - used_z
-        if remaining_back_depth > _EPS and used_x > _EPS:
-            regions.append(
-                PackRegion(
-                    x=region.x,
-                    y=region.y,
-                    z=region.z + used_z,
-                    width=used_x,
-                    depth=remaining_back_depth,
-                    height=region.height,
-                )
-            )
+        regions.extend(child_regions(region, used_h, x_cursor, z_cursor, used_x, used_z))
 
         if len(boxes) == initial_box_count:
             notes.append("  ↳ Box list unchanged after placing in region; continuing anyway.")
 
+        yield RegionResult(index=layer_index, region=region, heuristic=heuristic.name, placed=local_placed, notes=notes)
         layer_index += 1
 
-    return placed, notes
-
 def get_utilization(
     truck: Truck_t,
     p_boxes: List[PlacedBox_t],
@@ -1,7 +1,19 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple
 from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
 
+@dataclass(frozen=True)
+class ScoreTally:
+    """
+    Additive totals behind ScoringEngine's components, so a growing layout can be scored
+    incrementally without re-walking every placement.
+    """
+    volume: float = 0.0
+    count: int = 0
+    floor_count: int = 0
+    quads: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+
 class ScoringEngine:
     def __init__(self, truck: Truck_t, weights: Dict[str, float] = None):
         self.truck = truck
@@ -44,4 +56,31 @@ class ScoringEngine:
             idx = (0 if (p.x + b.width/2) < mid_x else 1) + (0 if (p.z + b.depth/2) < mid_z else 2)
             quads[idx] += b.weight
         total_mass = sum(quads)
-        return 1.0 - ((max(quads) - min(quads)) / total_mass) if total_mass > 0 else 1.0
\ No newline at end of file
+        return 1.0 - ((max(quads) - min(quads)) / total_mass) if total_mass > 0 else 1.0
+
+    def tally(self, placed_boxes: List[PlacedBox_t], box_map: Dict[str, Box_t], base: ScoreTally = ScoreTally()) -> ScoreTally:
+        """
+        Returns `base` extended with `placed_boxes`; `base` itself is not modified.
+        """
+        mid_x, mid_z = self.truck.width / 2, self.truck.depth / 2
+        volume, floor_count = base.volume, base.floor_count
+        quads = list(base.quads)
+        for p in placed_boxes:
+            b = box_map[p.id]
+            volume += b.width * b.height * b.depth
+            floor_count += p.y == 0
+            quads[(0 if (p.x + b.width/2) < mid_x else 1) + (0 if (p.z + b.depth/2) < mid_z else 2)] += b.weight
+        return ScoreTally(volume, base.count + len(placed_boxes), floor_count, tuple(quads))
+
+    def total_from_tally(self, tally: ScoreTally) -> float:
+        """
+        Unrounded total_score of the layout summarised by `tally` (same formula as get_all_scores).
+        """
+        if tally.count == 0:
+            return 0.0
+        truck_vol = self.truck.width * self.truck.height * self.truck.depth
+        U = tally.volume / truck_vol if truck_vol > 0 else 0.0
+        S = (tally.floor_count + 0.8 * (tally.count - tally.floor_count)) / tally.count
+        total_mass = sum(tally.quads)
+        M = 1.0 - ((max(tally.quads) - min(tally.quads)) / total_mass) if total_mass > 0 else 1.0
+        return (self.weights['u'] * U) + (self.weights['s'] * S) + (self.weights['m'] * M)
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from python.vtl_core.bounds import placed_volume
+from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+from python.vtl_core.packing.processing import layer_pack
+from python.vtl_core.packing.scoring import ScoringEngine
+
+# Default wall-clock budget when the request does not set time_budget_ms
+SEARCH_DEFAULT_BUDGET_MS = 1000.0
+
+# Length of one annealing slice; workers report back (and cancellation is checked) between slices
+SEARCH_SLICE_MS = 100.0
+
+# Simulated-annealing temperature, in ScoringEngine total_score units, at the start / end of the budget
+SEARCH_T_START = 0.02
+SEARCH_T_END = 0.001
+
+# SKU sequences with at most this many groups are enumerated in-process instead of annealed
+SEARCH_EXHAUSTIVE_GROUPS = 4
+
+Order = List[int]
+
+# Loads with fewer boxes are packed in-process: a worker pool costs more than it saves
+PARALLEL_MIN_BOXES = 200
+
+# Process pools by worker count, shared by every packing call of this process (see worker_pool)
+_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+# Search state of the last task a pool worker ran, so a search's slices reuse it
+_WORKER_STATE: Dict[str, Any] = {}
+
+# Keys of restart searches, telling their states apart in pool workers
+_SEARCH_KEYS = itertools.count()
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool of `workers` workers, shared by every packing call (and request) of this
+    process. Its workers are started by a forkserver (spawn where there is none), never forked
+    from the threaded API server, and outlive the call, so a request does not pay their
+    start-up. Tasks run in another process: they take and return picklable values, and a
+    TimeBudget passed to one comes back with its truncated flag set on a copy.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None or getattr(pool, "_broken", False):
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                # Imported once by the server instead of by every worker it starts
+                context.set_forkserver_preload(["python.vtl_core.packing.processing"])
+            else:
+                context = multiprocessing.get_context("spawn")
+            pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return pool
+
+
+def task_pool(workers: int, tasks: int, boxes: int) -> Optional[ProcessPoolExecutor]:
+    """
+    worker_pool(workers) when `tasks` independent packing tasks over `boxes` boxes in all are
+    worth sending to other processes: there are several workers and tasks, and at least
+    PARALLEL_MIN_BOXES boxes. None means the caller runs the tasks in-process.
+    """
+    if workers > 1 and tasks > 1 and boxes >= PARALLEL_MIN_BOXES:
+        return worker_pool(workers)
+    return None
+
+
+def group_by_sku(boxes: List[Box_t]) -> List[List[Box_t]]:
+    """
+    Splits the load into consecutive runs of the same box type (the SKU sequence the packer sees).
+    """
+    groups: List[List[Box_t]] = []
+    for box in boxes:
+        if groups and groups[-1][0] == box:
+            groups[-1].append(box)
+        else:
+            groups.append([box])
+    return groups
+
+
+class _SearchState:
+    """
+    What packing and scoring one ordering needs, built once per search (and once per pool
+    worker that runs its slices).
+    """
+
+    def __init__(self, truck: Truck_t, groups: List[List[Box_t]], selector: str):
+        self.truck = truck
+        self.groups = groups
+        self.selector = selector
+        self.engine = ScoringEngine(truck)
+        self.load = [box for group in groups for box in group]
+        self.box_map = {box.id: box for box in self.load}
+
+
+# (placed, notes, unplaced boxes) of one packed ordering
+Layout = Tuple[List[PlacedBox_t], List[str], List[Box_t]]
+
+
+def _pack_order(state: _SearchState, order: Order, deadline: float) -> Tuple[float, float, Layout, bool]:
+    """
+    Packs `order`, stopping at `deadline` (a perf_counter time).
+    Returns (score, placed volume, layout, truncated).
+    """
+    boxes = [box for g in order for box in state.groups[g]]
+    # Never degraded: every ordering is packed by the same heuristics, so scores stay comparable
+    budget = TimeBudget((deadline - time.perf_counter()) * 1000, degrade_ratio=1.0)
+    placed, notes = layer_pack(truck=state.truck, boxes=boxes, budget=budget, selector=state.selector)
+    score = state.engine.get_all_scores(placed, state.load)["total_score"]
+    return score, placed_volume(placed, state.box_map), (placed, notes, boxes), budget.truncated
+
+
+def _neighbour(order: Order, rng: random.Random) -> Order:
+    """
+    Local move on the SKU sequence: swap two groups, move one group, or reverse a segment.
+    """
+    out = list(order)
+    i, j = sorted(rng.sample(range(len(out)), 2))
+    move = rng.randrange(3)
+    if move == 0:
+        out[i], out[j] = out[j], out[i]
+    elif move == 1:
+        out.insert(j, out.pop(i))
+    else:
+        out[i:j + 1] = reversed(out[i:j + 1])
+    return out
+
+
+def _anneal_slice(
+    state: _SearchState,
+    order: Order,
+    score: float,
+    seed: int,
+    slice_ms: float,
+    deadline: float,
+    t_start: float,
+    t_end: float,
+    stop_volume: Optional[float] = None,
+) -> Tuple[Order, float, Order, float, float, Optional[Layout], int]:
+    """
+    Runs one simulated-annealing chain for `slice_ms`, starting from (order, score), or
+    until a layout places `stop_volume`. A packing cut short by `deadline` ends the slice
+    and is dropped.
+    Returns (current order, current score, best order, best score, best volume, best layout,
+    packings evaluated); the best layout is None unless the chain improved on `score`.
+    """
+    rng = random.Random(seed)
+    best_order, best_score, best_volume, best_layout = order, score, 0.0, None
+    packings = 0
+    start = time.perf_counter()
+
+    while (time.perf_counter() - start) * 1000 < slice_ms:
+        progress = min(1.0, (time.perf_counter() - start) * 1000 / slice_ms)
+        temperature = t_start + (t_end - t_start) * progress
+
+        candidate = _neighbour(order, rng)
+        candidate_score, candidate_volume, layout, truncated = _pack_order(state, candidate, deadline)
+        if truncated:
+            break
+        packings += 1
+
+        delta = candidate_score - score
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            order, score = candidate, candidate_score
+            if score > best_score:
+                best_order, best_score, best_volume, best_layout = order, score, candidate_volume, layout
+                if stop_volume is not None and best_volume >= stop_volume:
+                    break
+
+    return order, score, best_order, best_score, best_volume, best_layout, packings
+
+
+def _anneal_task(key: int, truck: Truck_t, groups: List[List[Box_t]], selector: str, *args: Any):
+    """
+    _anneal_slice in a pool worker; the search state is rebuilt only when the worker last ran
+    another search.
+    """
+    if _WORKER_STATE.get("key") != key:
+        _WORKER_STATE.update(key=key, state=_SearchState(truck, groups, selector))
+    return _anneal_slice(_WORKER_STATE["state"], *args)
+
+
+def restart_search(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    time_budget_ms: Optional[float] = None,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    selector: str = "race",
+    cancel: Optional[CancelToken] = None,
+    stop_volume: Optional[float] = None,
+    budget: Optional[TimeBudget] = None,
+) -> Tuple[List[PlacedBox_t], List[str], Dict[str, Any]]:
+    """
+    Randomized restart search over the SKU sequence fed to layer_pack.
+
+    Runs one simulated-annealing chain per worker (independent seeds, all starting from the
+    caller's ordering, in worker_pool when there are several) in slices of SEARCH_SLICE_MS until
+    `time_budget_ms` is spent, and keeps the best ScoringEngine result. Loads with at most
+    SEARCH_EXHAUSTIVE_GROUPS SKU groups are enumerated in-process instead. The search stops early
+    once the best layout places `stop_volume` (see PackingBounds.target_volume). `boxes` ends up
+    holding the unplaced boxes of the best layout, as with layer_pack.
+
+    No packing runs past the time budget. When even the caller's ordering cannot be packed
+    within it, its partial layout is returned and the truncated flag of `budget` is set.
+
+    Returns (placed, notes, stats) where stats reports packings and packings per second.
+    """
+    start = time.perf_counter()
+    budget_ms = time_budget_ms if time_budget_ms is not None else SEARCH_DEFAULT_BUDGET_MS
+    deadline = start + budget_ms / 1000
+    workers = max(1, workers or default_workers())
+    groups = group_by_sku(boxes)
+
+    state = _SearchState(truck, groups, selector)
+    initial: Order = list(range(len(groups)))
+    initial_score, best_volume, best_layout, truncated = _pack_order(state, initial, deadline)
+    chains = [(initial, initial_score) for _ in range(workers)]
+    best_score = initial_score
+    packings = 1
+    slices = 0
+
+    def within_gap() -> bool:
+        return stop_volume is not None and best_volume >= stop_volume
+
+    exhaustive = len(groups) <= SEARCH_EXHAUSTIVE_GROUPS
+    if exhaustive and not truncated:
+        for order in itertools.permutations(range(len(groups))):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            if time.perf_counter() >= deadline or within_gap():
+                break
+            if list(order) == initial:
+                continue
+            score, volume, layout, cut = _pack_order(state, list(order), deadline)
+            if cut:
+                break
+            packings += 1
+            if score > best_score:
+                best_score, best_volume, best_layout = score, volume, layout
+
+    pool = worker_pool(workers) if workers > 1 and not exhaustive else None
+    key = next(_SEARCH_KEYS)
+
+    while not exhaustive and not truncated and not within_gap():
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+        elapsed = (time.perf_counter() - start) * 1000
+        remaining = budget_ms - elapsed
+        if remaining <= 0:
+            break
+
+        slice_ms = min(SEARCH_SLICE_MS, remaining)
+        t_hi = SEARCH_T_START + (SEARCH_T_END - SEARCH_T_START) * (elapsed / budget_ms)
+        t_lo = SEARCH_T_START + (SEARCH_T_END - SEARCH_T_START) * min(1.0, (elapsed + slice_ms) / budget_ms)
+        args = [
+            (order, score, seed + 7919 * slices + i, slice_ms, deadline, t_hi, t_lo, stop_volume)
+            for i, (order, score) in enumerate(chains)
+        ]
+
+        if pool is None:
+            results = [_anneal_slice(state, *a) for a in args]
+        else:
+            results = list(pool.map(_anneal_task, *zip(*((key, truck, groups, selector, *a) for a in args))))
+
+        chains = []
+        for order, score, _, chain_best_score, chain_best_volume, layout, count in results:
+            chains.append((order, score))
+            packings += count
+            if chain_best_score > best_score and layout is not None:
+                best_score, best_volume, best_layout = chain_best_score, chain_best_volume, layout
+        slices += 1
+
+    placed, notes, leftover = best_layout
+    notes = list(notes)
+    boxes[:] = leftover
+    if truncated and budget is not None:
+        budget.truncated = True
+
+    elapsed_s = max(time.perf_counter() - start, 1e-9)
+    stats = {
+        "mode": "restart",
+        "workers": workers,
+        "packings": packings,
+        "packings_per_second": packings / elapsed_s,
+        "initial_score": initial_score,
+        "best_score": best_score,
+    }
+    notes.insert(
+        0,
+        f"\n[RESTART SEARCH] workers={workers} | sku_groups={len(groups)} | packings={packings} | "
+        f"{stats['packings_per_second']:.1f} packings/s | score {initial_score * 100:.2f} -> {best_score * 100:.2f}",
+    )
+    return placed, notes, stats
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import math
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from python.vtl_core.domain.models import Box_t, PackRegion, PlacedBox_t, RegionResult, Truck_t
+from python.vtl_core.orientations import UPRIGHT_ROTATIONS, orientations_of, placed_dims
+from python.vtl_core.packing.control import CancelToken, TimeBudget
+from python.vtl_core.packing.processing import layer_pack
+from python.vtl_core.packing.search import default_workers, task_pool
+
+_EPS = 1e-9
+
+# Boxes whose wall depths (see wall_depth_of) are within this relative tolerance share a cluster
+WALL_TOLERANCE = 0.05
+
+# Box volume assigned to one wall, as a fraction of the wall's volume; boxes a wall cannot
+# take move on to the next round
+WALL_FILL = 1.0
+
+# (wall depth, indices into the round's boxes, in the caller's order)
+Wall = Tuple[float, List[int]]
+
+# (placed, notes, unplaced boxes, budget truncated) of one packed wall
+WallResult = Tuple[List[PlacedBox_t], List[str], List[Box_t], bool]
+
+
+def wall_depth_of(box: Box_t, truck: Truck_t, depth_left: float) -> float:
+    """
+    Depth of the shallowest wall that takes `box` the way the layer heuristics place it:
+    upright when an upright footprint fits the truck's width and height and `depth_left`,
+    otherwise on its side. Infinite when no orientation fits.
+    """
+    fitting = [
+        (rotation in UPRIGHT_ROTATIONS, d)
+        for w, h, d, rotation in orientations_of(box)
+        if w <= truck.width + _EPS and h <= truck.height + _EPS
+    ]
+    upright = min((d for is_upright, d in fitting if is_upright), default=math.inf)
+    if upright <= depth_left + _EPS:
+        return upright
+    return min((d for _, d in fitting), default=math.inf)
+
+
+def plan_walls(boxes: List[Box_t], truck: Truck_t, depth_left: float) -> Tuple[List[Wall], List[int]]:
+    """
+    Splits `boxes` into walls that together fit in `depth_left`.
+
+    Boxes are bucketed by their wall_depth_of on a logarithmic scale (one bucket per
+    WALL_TOLERANCE step), and each bucket's wall depth is its deepest box. Walls are filled
+    deepest bucket first; a wall takes boxes until they reach WALL_FILL of its volume, and a
+    wall that is not full yet goes on with the next, shallower bucket.
+
+    Returns the walls and the indices of the boxes no wall (or no remaining depth) can take.
+    """
+    keys = np.array([wall_depth_of(b, truck, depth_left) for b in boxes], dtype=float)
+    fits = keys <= depth_left + _EPS
+    left: List[int] = np.flatnonzero(~fits).tolist()
+    candidates = np.flatnonzero(fits)
+    if not len(candidates):
+        return [], left
+
+    volumes = np.array([b.volume for b in boxes], dtype=float)
+    buckets = np.floor(np.log(keys[candidates]) / math.log1p(WALL_TOLERANCE)).astype(np.int64)
+    _, cluster = np.unique(buckets, return_inverse=True)
+    cluster_depth = np.zeros(cluster.max() + 1)
+    np.maximum.at(cluster_depth, cluster, keys[candidates])
+    depth_of = dict(zip(candidates.tolist(), cluster_depth[cluster].tolist()))
+
+    walls: List[Wall] = []
+    face = truck.width * truck.height
+    depth = 0.0
+    members: List[int] = []
+    filled = 0.0
+    for i in candidates[np.argsort(-buckets, kind="stable")].tolist():
+        if not members:
+            depth = depth_of[i]
+            if depth > depth_left + _EPS:
+                left.append(i)
+                continue
+        members.append(i)
+        filled += volumes[i]
+        if filled >= face * depth * WALL_FILL:
+            walls.append((depth, sorted(members)))
+            depth_left -= depth
+            members, filled = [], 0.0
+    if members:
+        walls.append((depth, sorted(members)))
+
+    return walls, sorted(left)
+
+
+def pack_wall(
+    truck: Truck_t,
+    depth: float,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    selector: str = "trials",
+) -> WallResult:
+    """
+    Fills one wall, a slab of the truck `depth` deep, with layer_pack: the slab's regions are
+    filled by the trial-selected layer heuristics (MaxRects, Skyline, ...). Placements are
+    relative to the front of the wall. Also returns the budget's truncated flag, which a pool
+    worker only sets on its own copy.
+    """
+    slab = Truck_t(
+        id=f"{truck.id}_wall",
+        width=truck.width,
+        height=truck.height,
+        depth=depth,
+        max_weight=truck.max_weight,
+    )
+    placed, notes = layer_pack(truck=slab, boxes=boxes, budget=budget, selector=selector)
+    return placed, notes, boxes, budget is not None and budget.truncated
+
+
+def iter_wall_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    selector: str = "trials",
+    stop_volume: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> Iterator[RegionResult]:
+    """
+    Wall-building engine: loads the truck in walls from the front (z = 0) backwards, yielding
+    one RegionResult (heuristic "WALL", region = the wall's slab) per wall.
+
+    Each round plans walls over the remaining boxes and depth (see plan_walls), packs them
+    independently, in `workers` processes when the round is large enough, and then lays them
+    out front to back, each wall only as deep as its boxes actually reach. Boxes a wall could
+    not take go to the next round, which plans walls in the depth left behind; rounds stop once
+    one places nothing.
+
+    `boxes` is mutated like layer_pack: after exhaustion it holds the unplaced boxes. The cancel
+    token and stop_volume are checked between walls, the budget between rounds and inside each
+    wall's layer_pack.
+    """
+    workers = max(1, workers or default_workers())
+    pending = list(boxes)
+    placed_count = 0
+    volume = 0.0
+    z0 = 0.0
+    index = 0
+    rounds = 0
+
+    while pending:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if budget is not None and budget.exhausted:
+            budget.truncated = True
+            break
+        if stop_volume is not None and volume >= stop_volume:
+            break
+
+        walls, left = plan_walls(pending, truck, truck.depth - z0)
+        if not walls:
+            break
+        rounds += 1
+
+        tasks = [(truck, depth, [pending[i] for i in members], budget, selector) for depth, members in walls]
+        pool = task_pool(workers, len(tasks), len(pending))
+        if pool is not None:
+            results = pool.map(pack_wall, *zip(*tasks))
+        else:
+            results = (pack_wall(*task) for task in tasks)
+
+        unplaced = list(left)
+        round_placed = 0
+        stopped = False
+        for (depth, members), (placed, notes, rest, truncated) in zip(walls, results):
+            if budget is not None and truncated:
+                budget.truncated = True
+            if stopped:
+                unplaced.extend(members)
+                continue
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+            # Worker results hold copies of the boxes: match them back by id
+            wall_boxes = {pending[i].id: pending[i] for i in members}
+            rest_ids = {box.id for box in rest}
+            used = 0.0
+            for pb in placed:
+                used = max(used, pb.z + placed_dims(wall_boxes[pb.id], pb.rotation)[2])
+                pb.z += z0
+            slab = PackRegion(x=0.0, y=0.0, z=z0, width=truck.width, depth=used, height=truck.height)
+            notes.insert(
+                0,
+                f"\n> Wall {index}: depth={depth:.3f} | used={used:.3f} | boxes={len(members)} | "
+                f"placed={len(placed)}",
+            )
+            yield RegionResult(index=index, region=slab, heuristic="WALL", placed=placed, notes=notes)
+
+            z0 += used
+            index += 1
+            round_placed += len(placed)
+            volume += sum(box.volume for box_id, box in wall_boxes.items() if box_id not in rest_ids)
+            unplaced.extend(i for i in members if pending[i].id in rest_ids)
+            stopped = stop_volume is not None and volume >= stop_volume
+
+        placed_count += round_placed
+        pending = [pending[i] for i in sorted(unplaced)]
+        boxes[:] = pending
+        if not round_placed:
+            break
+
+    boxes[:] = pending
+    yield RegionResult(
+        index=index,
+        region=PackRegion(x=0.0, y=0.0, z=0.0, width=truck.width, depth=truck.depth, height=truck.height),
+        heuristic="WALL",
+        placed=[],
+        notes=[
+            f"\n> Walls: placed={placed_count} | unplaced={len(pending)} | walls={index} | rounds={rounds} | "
+            f"depth used={z0:.3f} | workers={workers}"
+        ],
+    )
+
+
+def wall_pack(
+    truck: Truck_t,
+    boxes: List[Box_t],
+    budget: Optional[TimeBudget] = None,
+    cancel: Optional[CancelToken] = None,
+    selector: str = "trials",
+    stop_volume: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> Tuple[List[PlacedBox_t], List[str]]:
+    """
+    Collects iter_wall_pack into (placed, notes), like layer_pack.
+    """
+    placed: List[PlacedBox_t] = []
+    notes: List[str] = []
+
+    for result in iter_wall_pack(
+        truck=truck,
+        boxes=boxes,
+        budget=budget,
+        cancel=cancel,
+        selector=selector,
+        stop_volume=stop_volume,
+        workers=workers,
+    ):
+        placed.extend(result.placed)
+        notes.extend(result.notes)
+
+    return placed, notes
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+import math
+from typing import Dict, List, Optional, Tuple
 from python.vtl_core.domain.models import (
     Box_t, 
     PlacedBox_t, 
@@ -8,12 +9,16 @@ from python.vtl_core.domain.models import (
     SkylineSeg,
     Truck_t
 )
+from python.vtl_core.orientations import orientations_of, placed_dims
 
 
 _EPS = 1e-9
 
 HeuristicResult = Tuple[List[PlacedBox_t], List[str], float, float, float]
 
+# (placed_width, placed_depth, rotation) of one orientation, as seen from above
+Footprint = Tuple[float, float, int]
+
 
 
 def _fits(w: float, d: float, rect: FreeRectTL) -> bool:
@@ -92,31 +97,57 @@ def _ffg_split_free_rect(
 
 
 """
-Allowed orientations for a layer:
-    rotation 0: (width, depth)
-    rotation 1: (depth, width)  -> Y-axis rotation
+Orientations one single-type layer may use. They all share one upright height so the layer
+stays flat: the box's own height when that orientation fits the sub-truck, otherwise the
+upright whose footprint tiles the floor with the most copies (then the lowest).
+
+Returns:
+    (layer_height, footprints) with footprints in rotation-code order
+"""
+def _layer_orientations(anchor: Box_t, truck: Truck_t, height_cap: float) -> Tuple[float, Tuple[Footprint, ...]]:
+
+    uprights: Dict[float, List[Footprint]] = {}
+    for w, h, d, rot in orientations_of(anchor):
+        uprights.setdefault(h, []).append((w, d, rot))
+
+    def fits(h: float) -> bool:
+        return h <= height_cap + _EPS and any(
+            w <= truck.width + _EPS and d <= truck.depth + _EPS for w, d, _ in uprights[h]
+        )
+
+    def capacity(h: float) -> int:
+        return max(
+            math.floor(truck.width / w + _EPS) * math.floor(truck.depth / d + _EPS) for w, d, _ in uprights[h]
+        )
+
+    height = anchor.height
+    if not fits(height):
+        candidates = [h for h in uprights if fits(h)]
+        if candidates:
+            height = max(candidates, key=lambda h: (capacity(h), -h))
+
+    return height, tuple(uprights[height])
+
+
+"""
+Allowed orientations for a layer: the layer's precomputed footprints (see _layer_orientations).
 
 Returns:
     (placed_width, placed_depth, rotation_code)
 """
-def _choose_orientation(box: Box_t, rect: FreeRectTL) -> Optional[Tuple[float, float, int]]:
+def _choose_orientation(footprints: Tuple[Footprint, ...], rect: FreeRectTL) -> Optional[Tuple[float, float, int]]:
 
     candidates: List[Tuple[float, float, int, float]] = []
 
-    # Original orientation
-    if _fits(box.width, box.depth, rect):
-        waste = (rect.w - box.width) * (rect.d - box.depth)
-        candidates.append((box.width, box.depth, 0, waste))
-
-    # Y-axis rotation only
-    if _fits(box.depth, box.width, rect):
-        waste = (rect.w - box.depth) * (rect.d - box.width)
-        candidates.append((box.depth, box.width, 1, waste))
+    for w, d, rot in footprints:
+        if _fits(w, d, rect):
+            waste = (rect.w - w) * (rect.d - d)
+            candidates.append((w, d, rot, waste))
 
     if not candidates:
         return None
 
-    # Prefer lower waste, then non-rotated
+    # Prefer lower waste, then the lower rotation code
     candidates.sort(key=lambda c: (c[3], c[2]))
     w, d, rot, _ = candidates[0]
     return (w, d, rot)
@@ -126,26 +157,19 @@ def _choose_orientation(box: Box_t, rect: FreeRectTL) -> Optional[Tuple[float, f
 Returns:
     (free_rect_index, x, z, placed_width, placed_depth, rotation)
 
-rotation:
-    0 = original footprint (width, depth)
-    1 = Y-rotated footprint (depth, width)
+rotation: code of the footprint used (see vtl_core.orientations)
 """
 def _find_best_position_for_box_tl(
-    box: Box_t,
+    footprints: Tuple[Footprint, ...],
     free_rects: List[FreeRectTL],
-    allow_y_rotation: bool,
 ) -> Optional[Tuple[int, float, float, float, float, int]]:
 
     best: Optional[Tuple[float, float, float, float, float, int, int]] = None
     # Stored as:
     # (area_fit, short_side_fit, x, z, w, d, rotation, rect_index)
 
-    orientations = [(box.width, box.depth, 0)]
-    if allow_y_rotation and abs(box.width - box.depth) > _EPS:
-        orientations.append((box.depth, box.width, 1))
-
     for i, fr in enumerate(free_rects):
-        for bw, bd, rot in orientations:
+        for bw, bd, rot in footprints:
             if bw <= fr.w + _EPS and bd <= fr.d + _EPS:
                 area_fit = (fr.w * fr.d) - (bw * bd)
                 short_side_fit = min(fr.w - bw, fr.d - bd)
@@ -283,28 +307,19 @@ def _mr_prune_free_rects(rects: List[FreeRectTL]) -> List[FreeRectTL]:
 Returns:
     (seg_index, x, z, placed_width, placed_depth, rotation)
 
-rotation:
-    0 = (width, depth)
-    1 = (depth, width)
+rotation: code of the footprint used (see vtl_core.orientations)
 """
 def _skyline_find_position(
     skyline: List[SkylineSeg],
-    box: Box_t,
+    footprints: Tuple[Footprint, ...],
     truck_depth: float,
 ) -> Optional[Tuple[int, float, float, float, float, int]]:
 
     best: Optional[Tuple[float, float, float, int, float, float, int]] = None
     # (top_z, waste, x, seg_index, bw, bd, rotation)
 
-    orientations = [
-        (box.width, box.depth, 0),
-    ]
-
-    if abs(box.width - box.depth) > _EPS:
-        orientations.append((box.depth, box.width, 1))
-
     for i, seg in enumerate(skyline):
-        for bw, bd, rot in orientations:
+        for bw, bd, rot in footprints:
             fit_z = _skyline_compute_fit(skyline, i, bw)
             if fit_z is None:
                 continue
@@ -449,9 +464,8 @@ def _skyline_merge(skyline: List[SkylineSeg]) -> None:
     skyline[:] = merged
 
 def _dims_from_rotation(box: Box_t, rotation: int) -> Tuple[float, float]:
-    if rotation == 1:
-        return box.depth, box.width
-    return box.width, box.depth
+    w, _, d = placed_dims(box, rotation)
+    return w, d
 
 
 def _compute_local_extents(anchor: Box_t, placed: List[PlacedBox_t]) -> Tuple[float, float]:
@@ -532,19 +546,13 @@ def _height_cap(truck: Truck_t, layer_height: Optional[float]) -> float:
 
 def _placed_rects_from_batch(placed: List[PlacedBox_t], anchor: Box_t) -> List[Tuple[float, float, float, float]]:
     """
-    Convert placements into footprint rects (x, z, w, d) using the batch anchor dimensions.
-    rotation:
-      0 -> (width, depth)
-      1 -> (depth, width)
+    Convert placements into footprint rects (x, z, w, d) using the batch anchor dimensions
+    in each placement's rotation.
     """
     rects: List[Tuple[float, float, float, float]] = []
 
     for pb in placed:
-        if pb.rotation == 1:
-            w, d = anchor.depth, anchor.width
-        else:
-            w, d = anchor.width, anchor.depth
-
+        w, d = _dims_from_rotation(anchor, pb.rotation)
         rects.append((pb.x, pb.z, w, d))
 
     return rects
@@ -0,0 +1,144 @@
+"""
+Regenerates python/vtl_core/packing/heuristic_model.json from logged trial outcomes and
+writes docs/evaluation/heuristic-predictor-report.md (accuracy versus speedup).
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/fit_heuristic_predictor.py [--random 60]
+"""
+import argparse
+import contextlib
+import io
+import json
+from statistics import mean
+from time import perf_counter
+
+from python.api.schemas import PackingRequest
+from python.vtl_core.packing import predictor as Pred
+from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.scoring import ScoringEngine
+from scripts.scenarios import ROOT, benchmark_payloads
+
+OUT = ROOT / 'docs' / 'evaluation' / 'heuristic-predictor-report.md'
+
+
+def instances(payload: dict):
+    truck, boxes = Proc.create_instances(PackingRequest(**payload))
+    boxes.sort(key=lambda box: box.height, reverse=True)
+    return truck, boxes
+
+
+def log_trials(payload: dict) -> list:
+    truck, boxes = instances(payload)
+    trial_log: list = []
+    Proc.layer_pack(truck=truck, boxes=boxes, selector='trials', trial_log=trial_log)
+
+    samples = []
+    for entry in trial_log:
+        scores = entry.get('scores')
+        if not scores:
+            continue
+        top = max(scores.values())
+        samples.append({
+            'key': Pred.feature_key(entry['features']),
+            'best': sorted(name for name, score in scores.items() if score == top),
+        })
+    return samples
+
+
+def evaluate(table: dict, samples: list) -> tuple:
+    predictor = Pred.HeuristicPredictor(table)
+    confident = correct = 0
+    for sample in samples:
+        cell = table.get(sample['key'])
+        if cell is None or cell['samples'] < predictor.min_samples or cell['confidence'] < predictor.min_confidence:
+            continue
+        confident += 1
+        correct += cell['heuristic'] in sample['best']
+    return confident, correct
+
+
+def timed_pack(payload: dict, selector: str) -> tuple:
+    truck, boxes = instances(payload)
+    original = list(boxes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = perf_counter()
+        result = Proc.begin_pack(truck, boxes, selector=selector)
+        elapsed = (perf_counter() - t0) * 1000
+    score = ScoringEngine(truck).get_all_scores(result['placed'], original)['total_score']
+    return elapsed, score
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--random', type=int, default=60, help='number of random manifests added to the training runs')
+    args = parser.parse_args()
+
+    payloads = benchmark_payloads(random_count=args.random)
+    logged = {name: log_trials(payload) for name, payload in payloads.items()}
+    all_samples = [s for samples in logged.values() for s in samples]
+
+    table = Pred.fit_decision_table(all_samples)
+    Pred.MODEL_PATH.write_text(json.dumps({
+        'version': 1,
+        'min_confidence': Pred.MIN_CONFIDENCE,
+        'min_samples': Pred.MIN_SAMPLES,
+        'trained_regions': len(all_samples),
+        'table': table,
+    }, indent=2) + '\n', encoding='utf-8')
+    Pred.default_predictor.cache_clear()
+
+    # Leave-one-scenario-out: fit without the scenario, predict its regions
+    loo_confident = loo_correct = 0
+    for name, samples in logged.items():
+        rest = [s for other, ss in logged.items() if other != name for s in ss]
+        confident, correct = evaluate(Pred.fit_decision_table(rest), samples)
+        loo_confident += confident
+        loo_correct += correct
+    in_confident, in_correct = evaluate(table, all_samples)
+
+    rows = []
+    for name, payload in payloads.items():
+        if name.startswith('random-'):
+            continue
+        trials_ms, trials_score = min(timed_pack(payload, 'trials') for _ in range(3))
+        predict_ms, predict_score = min(timed_pack(payload, 'predict') for _ in range(3))
+        rows.append((name, len(payload['boxes']), trials_ms, predict_ms, trials_score, predict_score))
+
+    def pct(a, b):
+        return f"{100 * a / b:.1f} %" if b else 'n/a'
+
+    report = (
+        '# Heuristic Predictor Report\n\n'
+        'Generated by `scripts/fit_heuristic_predictor.py`. The decision table maps cheap region features '
+        '(batch count, fill of the region\'s floor capacity, even tiling, rotation advantage, region aspect, '
+        'height fit) to the heuristic that scored best in logged trials. Cells with confidence below '
+        f'{Pred.MIN_CONFIDENCE} or fewer than {Pred.MIN_SAMPLES} samples fall back to full trials.\n\n'
+        f'- Training runs: {len(payloads)} ({args.random} random manifests)\n'
+        f'- Logged regions: {len(all_samples)}\n'
+        f'- Table cells: {len(table)}\n\n'
+        '## Accuracy\n\n'
+        'A prediction counts as correct when the predicted heuristic is among those tied for the best trial score.\n\n'
+        '| Evaluation | Coverage (confident predictions) | Accuracy when confident |\n'
+        '|---|---:|---:|\n'
+        f'| In-sample | {pct(in_confident, len(all_samples))} | {pct(in_correct, in_confident)} |\n'
+        f'| Leave-one-scenario-out | {pct(loo_confident, len(all_samples))} | {pct(loo_correct, loo_confident)} |\n\n'
+        '## Speedup\n\n'
+        'Best of 3 `begin_pack` runs per selector.\n\n'
+        '| Scenario | Boxes | Trials (ms) | Predict (ms) | Speedup | Trials score | Predict score |\n'
+        '|---|---:|---:|---:|---:|---:|---:|\n'
+    )
+    for name, n, t_ms, p_ms, t_score, p_score in rows:
+        report += f'| {name} | {n} | {t_ms:.2f} | {p_ms:.2f} | {t_ms / p_ms:.2f}x | {t_score:.4f} | {p_score:.4f} |\n'
+    report += (
+        f"\nMean speedup: {mean(r[2] / r[3] for r in rows):.2f}x | "
+        f"mean score change: {mean(r[5] - r[4] for r in rows):+.4f}\n"
+    )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {Pred.MODEL_PATH}')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Runtime/quality curve of beam search over region decisions as the beam width grows, against
+greedy regional selection. Writes docs/evaluation/beam-benchmark.md.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/run_beam_benchmarks.py [--widths 1 2 4 8 16]
+"""
+import argparse
+import contextlib
+import io
+from statistics import mean
+from time import perf_counter
+
+from python.api.schemas import PackingRequest
+from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.scoring import ScoringEngine
+from scripts.scenarios import ROOT, benchmark_payloads
+
+OUT = ROOT / 'docs' / 'evaluation' / 'beam-benchmark.md'
+
+
+def run(payload: dict, mode: str, beam_width: int = 1) -> tuple:
+    truck, boxes = Proc.create_instances(PackingRequest(**payload))
+    boxes.sort(key=lambda box: box.height, reverse=True)
+    original = list(boxes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = perf_counter()
+        result = Proc.begin_pack(truck, boxes, mode=mode, beam_width=beam_width)
+        elapsed = (perf_counter() - t0) * 1000
+    return elapsed, ScoringEngine(truck).get_all_scores(result['placed'], original)['total_score']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--widths', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    rows = []
+    for name, payload in benchmark_payloads().items():
+        results = {'regional': run(payload, 'regional')}
+        for width in args.widths:
+            results[width] = run(payload, 'beam', width)
+        rows.append((name, len(payload['boxes']), results))
+
+    columns = ['regional', *args.widths]
+    header = ' | '.join(['regional (trials)', *(f'beam {w}' for w in args.widths)])
+    report = (
+        '# Beam Search Benchmark\n\n'
+        'Generated by `scripts/run_beam_benchmarks.py`. `regional` is the default greedy `layer_pack` '
+        '(one trial-selected heuristic per region); `beam K` keeps the K best partial layouts while branching '
+        'on the heuristic and on which of the top two open regions is packed next. Cells are '
+        '`total_score / runtime ms` from `begin_pack`.\n\n'
+        f'| Scenario | Boxes | {header} |\n'
+        f"|---|---:|{'---:|' * len(columns)}\n"
+    )
+    for name, n, results in rows:
+        cells = ' | '.join(f'{results[c][1]:.4f} / {results[c][0]:.1f}' for c in columns)
+        report += f'| {name} | {n} | {cells} |\n'
+
+    report += (
+        '\n## Curve\n\n'
+        '| Setting | Total runtime ms | Mean score | Scenarios improved vs regional |\n'
+        '|---|---:|---:|---:|\n'
+    )
+    for c in columns:
+        label = 'regional (trials)' if c == 'regional' else f'beam {c}'
+        improved = sum(r[c][1] > r['regional'][1] + 1e-9 for _, _, r in rows)
+        report += (
+            f"| {label} | {sum(r[c][0] for _, _, r in rows):.1f} | "
+            f"{mean(r[c][1] for _, _, r in rows):.4f} | {improved} |\n"
+        )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
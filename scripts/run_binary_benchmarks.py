@@ -0,0 +1,84 @@
+"""
+Payload size and client decode time of the binary layout (`Accept: application/vnd.vtl.layout`)
+against the JSON response of POST /pack, on the 10k-box manifests. The layouts come from the
+extreme-point engine, as the region engine takes minutes on them; the encoding does not depend
+on how the layout was found. Writes docs/evaluation/binary-benchmark.md.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/run_binary_benchmarks.py [--repeat 5]
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+from statistics import median
+from time import perf_counter
+
+from python.api.encoding import encode_json, encode_layout
+from python.api.schemas import PackingRequest
+from python.dev_renderer.utils.layout_decoder import decode_layout
+from python.services.packing_services import pack_request
+from scripts.scenarios import ROOT, large_scenarios, sku_mix_payload
+
+OUT = ROOT / 'docs' / 'evaluation' / 'binary-benchmark.md'
+
+
+def timed(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = perf_counter()
+        func()
+        times.append((perf_counter() - t0) * 1000)
+    return median(times)
+
+
+def run(payload: dict, repeat: int) -> tuple:
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = pack_request(PackingRequest(**payload, engine='extreme_points'))
+    text = encode_json(result)
+    data = encode_layout(result)
+    return (
+        len(result['placed']), len(result['unplaced']),
+        len(text), len(data), len(gzip.compress(text)), len(gzip.compress(data)),
+        timed(lambda: encode_json(result), repeat), timed(lambda: encode_layout(result), repeat),
+        timed(lambda: json.loads(text), repeat), timed(lambda: decode_layout(data), repeat),
+        timed(lambda: decode_layout(data, columns=True), repeat),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = {'sku-mix-1000': sku_mix_payload(1000, 12)}
+    payloads.update({name: payload for name, payload, _ in large_scenarios()})
+
+    report = (
+        '# Binary Layout Benchmark\n\n'
+        'Generated by `scripts/run_binary_benchmarks.py`. Each manifest is packed once by `pack_request` '
+        '(`engine: "extreme_points"`); the response is then encoded as JSON (`encode_json`, what `/pack` '
+        'sends by default) and as the binary layout (`python/api/encoding.py`, sent for '
+        '`Accept: application/vnd.vtl.layout`). Sizes are bytes, raw and gzipped (the API does not compress; '
+        'a proxy may). Times are the median ms of '
+        f'{args.repeat} runs: server-side encoding, and client-side decoding with `json.loads` against the '
+        "dev renderer's `decode_layout`, into the same dicts or into numpy columns (`columns=True`).\n\n"
+        '| Scenario | Placed | Unplaced | JSON bytes | Binary bytes | Ratio | JSON gzip | Binary gzip | '
+        'JSON encode ms | Binary encode ms | json.loads ms | decode_layout ms | columns ms |\n'
+        '|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|\n'
+    )
+    for name, payload in payloads.items():
+        n, m, js, bn, jz, bz, je, be, jd, bd, bc = run(payload, args.repeat)
+        report += (
+            f'| {name} | {n} | {m} | {js} | {bn} | {bn / js:.2f} | {jz} | {bz} | '
+            f'{je:.1f} | {be:.1f} | {jd:.1f} | {bd:.1f} | {bc:.2f} |\n'
+        )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
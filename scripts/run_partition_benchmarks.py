@@ -0,0 +1,90 @@
+"""
+Speedup and quality change of partitioned sibling packing (`mode: "partitioned"`) against the
+serial regional layer packer, for a range of worker counts. Writes
+docs/evaluation/partition-benchmark.md.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/run_partition_benchmarks.py [--workers 1 2 4 8]
+"""
+import argparse
+import contextlib
+import io
+from statistics import mean
+from time import perf_counter
+
+from python.api.schemas import PackingRequest
+from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.scoring import ScoringEngine
+from python.vtl_core.packing.search import default_workers
+from scripts.scenarios import ROOT, benchmark_payloads, sku_mix_payload
+
+OUT = ROOT / 'docs' / 'evaluation' / 'partition-benchmark.md'
+
+
+def run(payload: dict, mode: str, workers: int = 1) -> tuple:
+    truck, boxes = Proc.create_instances(PackingRequest(**payload))
+    boxes.sort(key=lambda box: box.height, reverse=True)
+    original = list(boxes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = perf_counter()
+        result = Proc.begin_pack(truck, boxes, mode=mode, workers=workers)
+        elapsed = (perf_counter() - t0) * 1000
+    return elapsed, ScoringEngine(truck).get_all_scores(result['placed'], original)['total_score']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    payloads = dict(benchmark_payloads())
+    payloads['sku-mix-600'] = sku_mix_payload(600, 12)
+
+    rows = []
+    for name, payload in payloads.items():
+        results = {'regional': run(payload, 'regional')}
+        for workers in args.workers:
+            results[workers] = run(payload, 'partitioned', workers)
+        rows.append((name, len(payload['boxes']), results))
+
+    columns = ['regional', *args.workers]
+    header = ' | '.join(['regional', *(f'partitioned {w}' for w in args.workers)])
+    report = (
+        '# Partitioned Sibling Packing Benchmark\n\n'
+        'Generated by `scripts/run_partition_benchmarks.py` on a machine with '
+        f'{default_workers()} usable CPU core(s). `regional` is the serial `layer_pack`; `partitioned W` '
+        'packs regions serially until a layer leaves sibling regions open, splits the remaining SKU counts '
+        'between them by volume, packs the siblings in up to W worker processes (in-process below 200 '
+        'boxes) and '
+        'merges the leftovers into the regions left open. Cells are `total_score / runtime ms` from '
+        '`begin_pack`. Speedup needs as many cores as workers; with fewer cores the extra workers only '
+        'add process overhead.\n\n'
+        f'| Scenario | Boxes | {header} |\n'
+        f"|---|---:|{'---:|' * len(columns)}\n"
+    )
+    for name, n, results in rows:
+        cells = ' | '.join(f'{results[c][1]:.4f} / {results[c][0]:.1f}' for c in columns)
+        report += f'| {name} | {n} | {cells} |\n'
+
+    serial_ms = sum(r['regional'][0] for _, _, r in rows)
+    report += (
+        '\n## Summary\n\n'
+        '| Setting | Total runtime ms | Speedup vs regional | Mean score | Scenarios worse than regional |\n'
+        '|---|---:|---:|---:|---:|\n'
+    )
+    for c in columns:
+        label = 'regional' if c == 'regional' else f'partitioned {c}'
+        total_ms = sum(r[c][0] for _, _, r in rows)
+        worse = sum(r[c][1] < r['regional'][1] - 1e-9 for _, _, r in rows)
+        report += (
+            f'| {label} | {total_ms:.1f} | {serial_ms / total_ms:.2f}x | '
+            f"{mean(r[c][1] for _, _, r in rows):.4f} | {worse} |\n"
+        )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures restart-search throughput (packings per second) and score gain per worker count on
+the benchmark scenarios and writes docs/evaluation/search-benchmark.md.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/run_search_benchmarks.py [--budget-ms 1000] [--workers 1 2 4]
+"""
+import argparse
+
+from python.api.schemas import PackingRequest
+from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.search import default_workers, group_by_sku, restart_search
+from scripts.scenarios import ROOT, benchmark_payloads
+
+OUT = ROOT / 'docs' / 'evaluation' / 'search-benchmark.md'
+
+
+def instances(payload: dict):
+    truck, boxes = Proc.create_instances(PackingRequest(**payload))
+    boxes.sort(key=lambda box: box.height, reverse=True)
+    return truck, boxes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget-ms', type=float, default=1000.0)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, default_workers()}))
+    args = parser.parse_args()
+
+    rows = []
+    for name, payload in benchmark_payloads().items():
+        truck, boxes = instances(payload)
+        groups = len(group_by_sku(boxes))
+        # Small SKU sequences are enumerated, not annealed; they say nothing about throughput
+        if groups <= 4:
+            continue
+        results = {}
+        for workers in args.workers:
+            truck, boxes = instances(payload)
+            _, _, stats = restart_search(truck, boxes, time_budget_ms=args.budget_ms, workers=workers)
+            results[workers] = stats
+        rows.append((name, len(payload['boxes']), groups, results))
+
+    report = (
+        '# Restart Search Benchmark\n\n'
+        'Generated by `scripts/run_search_benchmarks.py`. Each scenario runs `mode: "restart"` '
+        f'(race selector) with a {args.budget_ms:.0f} ms budget per worker count. Scores are the '
+        '`ScoringEngine` total of the initial height-sorted order and of the best order found.\n\n'
+        f'Machine: {default_workers()} usable CPU core(s). Throughput only scales with workers up to the '
+        'number of cores; past that the chains share the same cores.\n\n'
+        '| Scenario | Boxes | SKU groups | Workers | Packings | Packings/s | Initial score | Best score |\n'
+        '|---|---:|---:|---:|---:|---:|---:|---:|\n'
+    )
+    for name, n, groups, results in rows:
+        for workers, stats in results.items():
+            report += (
+                f"| {name} | {n} | {groups} | {workers} | {stats['packings']} | {stats['packings_per_second']:.1f} | "
+                f"{stats['initial_score']:.4f} | {stats['best_score']:.4f} |\n"
+            )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the per-region heuristic selectors (trials / predict / race) on the benchmark
+scenarios and writes docs/evaluation/selector-benchmark.md.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/run_selector_benchmarks.py
+"""
+from statistics import mean
+from time import perf_counter
+
+from python.api.schemas import PackingRequest
+from python.vtl_core.packing import processing as Proc
+from python.vtl_core.packing.scoring import ScoringEngine
+from scripts.scenarios import ROOT, benchmark_payloads
+
+OUT = ROOT / 'docs' / 'evaluation' / 'selector-benchmark.md'
+SELECTORS = ('trials', 'predict', 'race')
+RUNS = 3
+
+
+def run(payload: dict, selector: str) -> dict:
+    truck, boxes = Proc.create_instances(PackingRequest(**payload))
+    boxes.sort(key=lambda box: box.height, reverse=True)
+    original = list(boxes)
+    trial_log: list = []
+
+    t0 = perf_counter()
+    placed, _ = Proc.layer_pack(truck=truck, boxes=boxes, selector=selector, trial_log=trial_log)
+    total_ms = (perf_counter() - t0) * 1000
+
+    return {
+        'regions': len(trial_log),
+        'selection_ms': sum(e['selection_ms'] for e in trial_log),
+        'total_ms': total_ms,
+        'eliminated': sum(len(e.get('eliminated', [])) for e in trial_log),
+        'score': ScoringEngine(truck).get_all_scores(placed, original)['total_score'],
+    }
+
+
+def best_of(payload: dict, selector: str) -> dict:
+    runs = [run(payload, selector) for _ in range(RUNS)]
+    best = min(runs, key=lambda r: r['total_ms'])
+    best['selection_ms'] = min(r['selection_ms'] for r in runs)
+    return best
+
+
+def per_region(result: dict) -> float:
+    return result['selection_ms'] / result['regions'] if result['regions'] else 0.0
+
+
+def main():
+    rows = []
+    for name, payload in benchmark_payloads().items():
+        results = {selector: best_of(payload, selector) for selector in SELECTORS}
+        rows.append((name, len(payload['boxes']), results))
+
+    report = (
+        '# Heuristic Selector Benchmark\n\n'
+        'Generated by `scripts/run_selector_benchmarks.py`. Every scenario is packed with `layer_pack` once per '
+        f'selector (best of {RUNS} runs). Selection time is the time spent choosing each region\'s heuristic; '
+        'the chosen heuristic is then run the same way for every selector.\n\n'
+        '- `trials`: all four heuristics run to completion and are scored\n'
+        '- `predict`: decision-table prediction, trials when not confident\n'
+        '- `race`: heuristics advance in lockstep; settled candidates that trail the leader are eliminated\n\n'
+        '| Scenario | Boxes | Regions | Trials ms/region | Predict ms/region | Race ms/region | Race saved ms/region | '
+        'Race eliminations | Trials score | Predict score | Race score |\n'
+        '|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|\n'
+    )
+    for name, n, r in rows:
+        t, p, rc = r['trials'], r['predict'], r['race']
+        report += (
+            f"| {name} | {n} | {t['regions']} | {per_region(t):.3f} | {per_region(p):.3f} | {per_region(rc):.3f} | "
+            f"{per_region(t) - per_region(rc):.3f} | {rc['eliminated']} | "
+            f"{t['score']:.4f} | {p['score']:.4f} | {rc['score']:.4f} |\n"
+        )
+
+    report += '\n## Totals\n\n| Selector | Total layer_pack ms | Total selection ms | Mean score change vs trials |\n|---|---:|---:|---:|\n'
+    for selector in SELECTORS:
+        report += (
+            f"| {selector} | {sum(r[selector]['total_ms'] for _, _, r in rows):.2f} | "
+            f"{sum(r[selector]['selection_ms'] for _, _, r in rows):.2f} | "
+            f"{mean(r[selector]['score'] - r['trials']['score'] for _, _, r in rows):+.4f} |\n"
+        )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
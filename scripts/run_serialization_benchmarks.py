@@ -0,0 +1,115 @@
+"""
+Serialization time of a /pack response along the previous path (API models built per box, a
+PackingResponse, then FastAPI's response_model validation and json.dumps) against the fast path
+(`encode_json` straight from the packer's records), for 1k/10k/100k-box responses. The layouts
+are synthetic, half placed and half unplaced: serialization cost depends on the record count,
+not on how the layout was found, and the packers take minutes on 100k boxes. Writes
+docs/evaluation/serialization-benchmark.md.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/run_serialization_benchmarks.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import json
+import random
+from statistics import median
+from time import perf_counter
+
+from python.api import encoding
+from python.api.encoding import encode_json
+from python.api.schemas import Box, PackingResponse, PlacedBox
+from python.vtl_core.domain.models import Box_t, PlacedBox_t
+from scripts.scenarios import ROOT
+
+OUT = ROOT / 'docs' / 'evaluation' / 'serialization-benchmark.md'
+
+
+def synthetic_payload(count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    placed = [
+        PlacedBox_t(
+            id=f'K{i:06d}', x=rng.uniform(0, 2.2), y=rng.uniform(0, 2.4), z=rng.uniform(0, 13.4), rotation=rng.randrange(6)
+        )
+        for i in range(count // 2)
+    ]
+    unplaced = [
+        Box_t(id=f'K{i:06d}', width=rng.uniform(0.1, 0.35), height=rng.uniform(0.1, 0.35), depth=rng.uniform(0.1, 0.35),
+              weight=2.0, priority=0.0)
+        for i in range(count // 2, count)
+    ]
+    return {
+        'placed': placed, 'unplaced': unplaced, 'utilization': 0.71, 'runtime_ms': 0.0,
+        'notes': [f'\n> Region {i}: Selected [First-Fit Row]' for i in range(40)],
+        'truncated': False, 'search': None, 'gap': 0.12, 'pallets': None,
+    }
+
+
+def previous_path(payload: dict) -> bytes:
+    # begin_pack's per-box models, run_packing's PackingResponse, then what FastAPI does with a
+    # returned model under response_model: dump, validate again, dump to JSON types, json.dumps
+    resp = PackingResponse(**{
+        **payload,
+        'placed': [PlacedBox(id=pb.id, x=pb.x, y=pb.y, z=pb.z, rotation=pb.rotation) for pb in payload['placed']],
+        'unplaced': [
+            Box(id=b.id, width=b.width, height=b.height, depth=b.depth, weight=b.weight, rotatable=b.rotatable, priority=b.priority)
+            for b in payload['unplaced']
+        ],
+    })
+    content = PackingResponse.model_validate(resp.model_dump()).model_dump(mode='json')
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+def stdlib_path(payload: dict) -> bytes:
+    orjson, encoding.orjson = encoding.orjson, None
+    try:
+        return encode_json(payload)
+    finally:
+        encoding.orjson = orjson
+
+
+def timed(func, payload: dict, repeat: int) -> tuple:
+    times = []
+    for _ in range(repeat):
+        t0 = perf_counter()
+        data = func(payload)
+        times.append((perf_counter() - t0) * 1000)
+    return median(times), len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fast_label = 'orjson' if encoding.orjson is not None else 'json (orjson not installed)'
+    report = (
+        '# Response Serialization Benchmark\n\n'
+        'Generated by `scripts/run_serialization_benchmarks.py`. Synthetic `/pack` responses, half placed and '
+        'half unplaced. `previous` builds a `PlacedBox` / `Box` per record and a `PackingResponse`, as '
+        '`begin_pack` and `run_packing` did, then validates and dumps it again and calls `json.dumps`, as '
+        'FastAPI does for a returned model under `response_model`. `encode_json` serializes the packer\'s '
+        f'`PlacedBox_t` / `Box_t` records straight to bytes, with {fast_label} and with the standard library '
+        f'fallback. Times are the median ms of {args.repeat} runs.\n\n'
+        '| Boxes | previous ms | encode_json ms | speedup | stdlib fallback ms | speedup | bytes |\n'
+        '|---:|---:|---:|---:|---:|---:|---:|\n'
+    )
+    for count in args.sizes:
+        payload = synthetic_payload(count)
+        previous, _ = timed(previous_path, payload, args.repeat)
+        fast, fast_size = timed(encode_json, payload, args.repeat)
+        fallback, _ = timed(stdlib_path, payload, args.repeat)
+        # Same document either way
+        assert json.loads(encode_json(payload)) == json.loads(previous_path(payload))
+        report += (
+            f'| {count} | {previous:.1f} | {fast:.1f} | {previous / fast:.1f}x | {fallback:.1f} | '
+            f'{previous / fallback:.1f}x | {fast_size} |\n'
+        )
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(report, encoding='utf-8')
+    print(f'Wrote {OUT}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,3 @@
-import copy
-import json
-from pathlib import Path
 from statistics import mean
 from time import perf_counter
 
@@ -8,8 +5,10 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from python.api.routes import router
+from python.vtl_core.orientations import oriented_dims
+from python.vtl_core.packing.processing import QUALITY_LATENCY_TARGET_MS
+from scripts.scenarios import ROOT, load_payload, sample_files, stress_scenarios
 
-ROOT = Path(__file__).resolve().parents[1]
 OUT = ROOT / 'docs' / 'evaluation' / 'stress-test-results.md'
 
 app = FastAPI()
@@ -17,57 +16,6 @@ app.include_router(router)
 client = TestClient(app)
 
 
-def load_payload(name: str) -> dict:
-    return json.loads((ROOT / 'tests' / name).read_text())
-
-
-def with_suffix(payload: dict, repeat: int) -> dict:
-    out = copy.deepcopy(payload)
-    boxes = []
-    for i in range(repeat):
-        for box in payload['boxes']:
-            clone = copy.deepcopy(box)
-            clone['id'] = f"{box['id']}_R{i+1}"
-            boxes.append(clone)
-    out['boxes'] = boxes
-    return out
-
-
-def small_box_payload(count: int = 180) -> dict:
-    return {
-        'truck': {'id': 'SmallDense', 'width': 2.4, 'height': 2.6, 'depth': 12.0, 'max_weight': 8000.0},
-        'boxes': [
-            {'id': f'S{i+1:03d}', 'width': 0.4, 'height': 0.4, 'depth': 0.4, 'weight': 4.0, 'priority': 0.0}
-            for i in range(count)
-        ],
-    }
-
-
-def mixed_with_oversized_payload(valid_count: int = 80, oversized_count: int = 20) -> dict:
-    boxes = [
-        {'id': f'V{i+1:03d}', 'width': 0.6, 'height': 0.5, 'depth': 0.5, 'weight': 8.0, 'priority': 0.0}
-        for i in range(valid_count)
-    ]
-    boxes.extend([
-        {'id': f'O{i+1:03d}', 'width': 3.0, 'height': 3.0, 'depth': 3.0, 'weight': 20.0, 'priority': 0.0}
-        for i in range(oversized_count)
-    ])
-    return {
-        'truck': {'id': 'MixedOversized', 'width': 2.4, 'height': 2.6, 'depth': 10.0, 'max_weight': 8000.0},
-        'boxes': boxes,
-    }
-
-
-def multilayer_payload(count: int = 72) -> dict:
-    return {
-        'truck': {'id': 'MultiLayer', 'width': 2.4, 'height': 2.4, 'depth': 6.0, 'max_weight': 5000.0},
-        'boxes': [
-            {'id': f'M{i+1:03d}', 'width': 0.6, 'height': 0.4, 'depth': 0.6, 'weight': 5.0, 'priority': 0.0}
-            for i in range(count)
-        ],
-    }
-
-
 def validate(payload, data):
     total = len(payload['boxes'])
     placed = data.get('placed') or []
@@ -85,11 +33,11 @@ def validate(payload, data):
     bounds_ok = True
     for pb in placed:
         box = box_map[pb['id']]
-        w, d = (box['depth'], box['width']) if pb.get('rotation', 0) == 1 else (box['width'], box['depth'])
+        w, h, d = oriented_dims(box['width'], box['height'], box['depth'], pb.get('rotation', 0))
         if not (
             pb['x'] >= -1e-9 and pb['y'] >= -1e-9 and pb['z'] >= -1e-9 and
             pb['x'] + w <= truck['width'] + 1e-6 and
-            pb['y'] + box['height'] <= truck['height'] + 1e-6 and
+            pb['y'] + h <= truck['height'] + 1e-6 and
             pb['z'] + d <= truck['depth'] + 1e-6
         ):
             bounds_ok = False
@@ -100,13 +48,7 @@ def validate(payload, data):
     return ok, checks
 
 
-scenarios = [
-    ('dense-small-1000', small_box_payload(1000), 'High item count using identical small cubes to stress region growth and repeated layer creation.'),
-    ('warehouse-x50', with_suffix(load_payload('3_warehouse.json'), 50), 'Realistic mixed warehouse load repeated five times to stress dynamic heuristic selection.'),
-    ('fragmentation-x50', with_suffix(load_payload('11_fragmentation.json'), 50), 'Amplified fragmentation scenario to stress support rectangle and sub-region reuse.'),
-    ('mixed-oversized', mixed_with_oversized_payload(800, 200), 'Large mixed load with intentionally impossible boxes to stress negative-path handling.'),
-    ('multilayer-100', multilayer_payload(100), 'Uniform stackable boxes sized to force multiple Y-levels in the same truck.'),
-]
+scenarios = stress_scenarios()
 
 rows = []
 sections = []
@@ -168,6 +110,25 @@ table = (
 for r in rows:
     table += f"| {r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]:.2f} | {r[5]:.2f} | {r[6]:.4f} | {r[7]} |\n"
 
+tier_names = sorted(QUALITY_LATENCY_TARGET_MS, key=QUALITY_LATENCY_TARGET_MS.get)
+tier_table = (
+    '## Quality tiers\n\n'
+    'Mean reported runtime (ms) / utilization over 3 runs of every `tests/*.json` scenario per `quality` tier. '
+    'Targets: ' + ', '.join(f"`{q}` <= {QUALITY_LATENCY_TARGET_MS[q]:.0f} ms" for q in tier_names) + '.\n\n'
+    '| Scenario | ' + ' | '.join(tier_names) + ' |\n'
+    '|---|' + '---:|' * len(tier_names) + '\n'
+)
+tier_ok = True
+for sample in sample_files():
+    cells = []
+    for quality in tier_names:
+        runs = [client.post('/pack', json={**load_payload(sample), 'quality': quality}).json() for _ in range(3)]
+        runtime = mean(r['runtime_ms'] for r in runs)
+        tier_ok = tier_ok and runtime <= QUALITY_LATENCY_TARGET_MS[quality]
+        cells.append(f"{runtime:.2f} / {mean(r['utilization'] for r in runs):.4f}")
+    tier_table += f"| {sample} | " + ' | '.join(cells) + ' |\n'
+tier_table += f"\nAll tiers within target: {'PASS' if tier_ok else 'FAIL'}\n"
+
 OUT.parent.mkdir(parents=True, exist_ok=True)
-OUT.write_text(header + table + '\n' + '\n'.join(sections), encoding='utf-8')
+OUT.write_text(header + table + '\n' + tier_table + '\n' + '\n'.join(sections), encoding='utf-8')
 print(f'Wrote {OUT}')
@@ -0,0 +1,140 @@
+import copy
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_payload(name: str) -> dict:
+    return json.loads((ROOT / 'tests' / name).read_text())
+
+
+def sample_files() -> List[str]:
+    return sorted(p.name for p in (ROOT / 'tests').glob('*.json'))
+
+
+def with_suffix(payload: dict, repeat: int) -> dict:
+    out = copy.deepcopy(payload)
+    boxes = []
+    for i in range(repeat):
+        for box in payload['boxes']:
+            clone = copy.deepcopy(box)
+            clone['id'] = f"{box['id']}_R{i+1}"
+            boxes.append(clone)
+    out['boxes'] = boxes
+    return out
+
+
+def small_box_payload(count: int = 180) -> dict:
+    return {
+        'truck': {'id': 'SmallDense', 'width': 2.4, 'height': 2.6, 'depth': 12.0, 'max_weight': 8000.0},
+        'boxes': [
+            {'id': f'S{i+1:03d}', 'width': 0.4, 'height': 0.4, 'depth': 0.4, 'weight': 4.0, 'priority': 0.0}
+            for i in range(count)
+        ],
+    }
+
+
+def mixed_with_oversized_payload(valid_count: int = 80, oversized_count: int = 20) -> dict:
+    boxes = [
+        {'id': f'V{i+1:03d}', 'width': 0.6, 'height': 0.5, 'depth': 0.5, 'weight': 8.0, 'priority': 0.0}
+        for i in range(valid_count)
+    ]
+    boxes.extend([
+        {'id': f'O{i+1:03d}', 'width': 3.0, 'height': 3.0, 'depth': 3.0, 'weight': 20.0, 'priority': 0.0}
+        for i in range(oversized_count)
+    ])
+    return {
+        'truck': {'id': 'MixedOversized', 'width': 2.4, 'height': 2.6, 'depth': 10.0, 'max_weight': 8000.0},
+        'boxes': boxes,
+    }
+
+
+def multilayer_payload(count: int = 72) -> dict:
+    return {
+        'truck': {'id': 'MultiLayer', 'width': 2.4, 'height': 2.4, 'depth': 6.0, 'max_weight': 5000.0},
+        'boxes': [
+            {'id': f'M{i+1:03d}', 'width': 0.6, 'height': 0.4, 'depth': 0.6, 'weight': 5.0, 'priority': 0.0}
+            for i in range(count)
+        ],
+    }
+
+
+def random_payload(seed: int, max_types: int = 6, max_count: int = 60) -> dict:
+    """
+    Random mixed manifest: a few SKUs with dimensions on a 0.1 m grid and random counts.
+    """
+    rng = random.Random(seed)
+    truck = {
+        'id': f'Random{seed}',
+        'width': 2.4,
+        'height': 2.6,
+        'depth': round(rng.uniform(4.0, 13.0), 1),
+        'max_weight': 10000.0,
+    }
+    boxes = []
+    for t in range(rng.randint(1, max_types)):
+        w, h, d = (round(rng.uniform(0.2, 1.2), 1) for _ in range(3))
+        for i in range(rng.randint(1, max_count)):
+            boxes.append({
+                'id': f'R{seed}_{t}_{i:03d}',
+                'width': w,
+                'height': h,
+                'depth': d,
+                'weight': round(rng.uniform(1.0, 40.0), 1),
+                'priority': 0.0,
+            })
+    return {'truck': truck, 'boxes': boxes}
+
+
+def sku_mix_payload(count: int, sku_count: int, seed: int = 0, unique: bool = False) -> dict:
+    """
+    `count` small boxes cycling through `sku_count` random SKUs (every box its own SKU when
+    `unique`) in a 13.6 m trailer, sized so that more than half of a 10k manifest fits.
+    """
+    rng = random.Random(seed)
+
+    def dims() -> tuple:
+        return tuple(round(rng.uniform(0.1, 0.35), 2) for _ in range(3))
+
+    skus = [dims() for _ in range(sku_count)]
+    boxes = []
+    for i in range(count):
+        w, h, d = dims() if unique else skus[i % sku_count]
+        boxes.append({'id': f'K{i+1:05d}', 'width': w, 'height': h, 'depth': d, 'weight': 2.0, 'priority': 0.0})
+    return {
+        'truck': {'id': 'Trailer', 'width': 2.45, 'height': 2.7, 'depth': 13.6, 'max_weight': 24000.0},
+        'boxes': boxes,
+    }
+
+
+def large_scenarios() -> List[Tuple[str, dict, str]]:
+    return [
+        ('dense-small-10000', {**small_box_payload(10000), 'truck': {'id': 'Trailer', 'width': 2.4, 'height': 2.6, 'depth': 13.6, 'max_weight': 24000.0}},
+         'Ten thousand identical 0.4 m cubes, more than the trailer holds.'),
+        ('sku-mix-10000', sku_mix_payload(10000, 40), 'Ten thousand small boxes over 40 random SKUs.'),
+        ('unique-10000', sku_mix_payload(10000, 0, seed=1, unique=True), 'Ten thousand small boxes, every one its own SKU.'),
+    ]
+
+
+def stress_scenarios() -> List[Tuple[str, dict, str]]:
+    return [
+        ('dense-small-1000', small_box_payload(1000), 'High item count using identical small cubes to stress region growth and repeated layer creation.'),
+        ('warehouse-x50', with_suffix(load_payload('3_warehouse.json'), 50), 'Realistic mixed warehouse load repeated five times to stress dynamic heuristic selection.'),
+        ('fragmentation-x50', with_suffix(load_payload('11_fragmentation.json'), 50), 'Amplified fragmentation scenario to stress support rectangle and sub-region reuse.'),
+        ('mixed-oversized', mixed_with_oversized_payload(800, 200), 'Large mixed load with intentionally impossible boxes to stress negative-path handling.'),
+        ('multilayer-100', multilayer_payload(100), 'Uniform stackable boxes sized to force multiple Y-levels in the same truck.'),
+    ]
+
+
+def benchmark_payloads(random_count: int = 0) -> Dict[str, dict]:
+    """
+    Every tests/*.json sample, the stress scenarios, and optionally `random_count` random manifests.
+    """
+    payloads = {name: load_payload(name) for name in sample_files()}
+    payloads.update({name: payload for name, payload, _ in stress_scenarios()})
+    for seed in range(random_count):
+        payloads[f'random-{seed}'] = random_payload(seed)
+    return payloads
@@ -1,5 +1,15 @@
+import json
+
 from fastapi.testclient import TestClient
+from python.api.config import settings
+from python.api import encoding
+from python.api.encoding import LAYOUT_MEDIA_TYPE, encode_json, encode_layout, wants_layout_binary
 from python.api.main import app
+from python.api.metrics import metrics
+from python.api.schemas import Box, PackingRequest, PackingResponse, SessionOpen
+from python.dev_renderer.utils.layout_decoder import decode_layout
+from python.services.packing_services import pack_request
+from python.services.sessions import PackingSession, SessionStore
 
 client = TestClient(app)
 
@@ -32,3 +42,561 @@ def test_bad_pack():
     response = client.post('/pack', json={'truck': {'id': 't'}, 'boxes': []})
 
     assert response.status_code == 422
+
+
+def test_pack_stream_emits_region_chunks_then_summary(simple_test):
+    response = client.post('/pack/stream', json=simple_test)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    regions = [r for r in records if r['type'] == 'region']
+    summary = records[-1]
+
+    assert regions
+    assert summary['type'] == 'summary'
+    assert summary['placed_count'] == sum(len(r['placed']) for r in regions)
+    assert summary['placed_count'] + len(summary['unplaced']) == len(simple_test['boxes'])
+
+
+def test_pack_stream_follows_the_request_options_or_rejects_them(simple_test):
+    def streamed_placements(payload):
+        records = [json.loads(line) for line in client.post('/pack/stream', json=payload).text.splitlines() if line]
+        return [p for r in records if r['type'] == 'region' for p in r['placed']], records
+
+    draft = {**simple_test, 'quality': 'draft'}
+    race = {**simple_test, 'selector': 'race', 'target_gap': 0.5}
+    draft_placed, draft_records = streamed_placements(draft)
+    race_placed, _ = streamed_placements(race)
+
+    assert draft_placed == client.post('/pack', json=draft).json()['placed']
+    assert {r['heuristic'] for r in draft_records[:-1]} == {'FFG'}
+    assert race_placed == client.post('/pack', json=race).json()['placed']
+    assert client.post('/pack/stream', json={**simple_test, 'mode': 'beam'}).status_code == 422
+    assert client.post('/pack/stream', json={**simple_test, 'quality': 'thorough'}).status_code == 422
+
+
+def test_pack_time_budget_reports_truncation(simple_test):
+    unbounded = client.post('/pack', json={**simple_test, 'time_budget_ms': 60_000})
+    rejected = client.post('/pack', json={**simple_test, 'time_budget_ms': 0})
+
+    assert unbounded.status_code == 200
+    assert unbounded.json()['truncated'] is False
+    assert rejected.status_code == 422
+
+
+def test_pack_deadline_cancels_work_and_records_metrics(monkeypatch):
+    payload = {
+        'truck': {'id': 'T', 'width': 2.4, 'height': 2.6, 'depth': 12.0},
+        'boxes': [
+            {'id': f'S{i:03d}', 'width': 0.4, 'height': 0.4, 'depth': 0.4, 'weight': 4.0}
+            for i in range(400)
+        ],
+    }
+    monkeypatch.setattr(settings, 'pack_deadline_ms', 1.0)
+    metrics.reset()
+
+    response = client.post('/pack', json=payload)
+    snapshot = client.get('/metrics').json()
+
+    assert response.status_code == 504
+    assert snapshot['pack_cancelled_total'] == 1
+    assert snapshot['pack_cancelled_deadline_exceeded_total'] == 1
+    assert snapshot['pack_cancel_latency_ms_max'] >= 0.0
+
+
+def test_pack_stream_deadline_cancels_work_and_ends_with_an_error_record(monkeypatch):
+    payload = {
+        'truck': {'id': 'T', 'width': 2.4, 'height': 2.6, 'depth': 12.0},
+        'boxes': [
+            {'id': f'S{i:03d}', 'width': 0.4, 'height': 0.4, 'depth': 0.4, 'weight': 4.0}
+            for i in range(400)
+        ],
+    }
+    monkeypatch.setattr(settings, 'pack_deadline_ms', 1.0)
+    metrics.reset()
+
+    response = client.post('/pack/stream', json=payload)
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    snapshot = client.get('/metrics').json()
+
+    assert response.status_code == 200
+    assert records[-1]['type'] == 'error' and 'deadline exceeded' in records[-1]['detail']
+    assert all(r['type'] == 'region' for r in records[:-1])
+    assert snapshot['pack_stream_requests_total'] == 1
+    assert snapshot['pack_cancelled_deadline_exceeded_total'] == 1
+    assert 'pack_completed_total' not in snapshot
+
+
+def test_pack_with_predict_selector(simple_test):
+    response = client.post('/pack', json={**simple_test, 'selector': 'predict'})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data['placed']) + len(data['unplaced']) == len(simple_test['boxes'])
+
+
+def test_pack_restart_mode_reports_search_stats(simple_test):
+    response = client.post('/pack', json={**simple_test, 'mode': 'restart', 'workers': 1, 'time_budget_ms': 200})
+    rejected = client.post('/pack', json={**simple_test, 'mode': 'restart', 'workers': 0})
+
+    assert response.status_code == 200
+    search = response.json()['search']
+    assert search['workers'] == 1
+    assert search['best_score'] >= search['initial_score']
+    assert rejected.status_code == 422
+
+
+def test_pack_beam_mode_reports_beam_stats(simple_test):
+    response = client.post('/pack', json={**simple_test, 'mode': 'beam', 'beam_width': 2})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['search']['mode'] == 'beam'
+    assert data['search']['beam_width'] == 2
+    assert len(data['placed']) + len(data['unplaced']) == len(simple_test['boxes'])
+
+
+def test_pack_reports_gap_to_utilization_bound(simple_test):
+    response = client.post('/pack', json=simple_test)
+    rejected = client.post('/pack', json={**simple_test, 'target_gap': 1.0})
+
+    assert response.status_code == 200
+    assert 0.0 <= response.json()['gap'] <= 1.0
+    assert rejected.status_code == 422
+
+
+def test_pack_with_max_weight_places_the_same_boxes_and_reports_no_false_optimum(simple_test):
+    capped = client.post('/pack', json={**simple_test, 'truck': {**simple_test['truck'], 'max_weight': 10.0}})
+    free = client.post('/pack', json=simple_test)
+
+    # max_weight is not enforced by the packers, so it neither stops them early nor caps the bound
+    assert capped.status_code == 200
+    assert sorted(p['id'] for p in capped.json()['placed']) == sorted(p['id'] for p in free.json()['placed'])
+
+    cubes = {
+        'truck': {'id': 't', 'width': 2.0, 'height': 1.0, 'depth': 2.0, 'max_weight': 10.0},
+        'boxes': [{'id': f'c{i}', 'width': 1.0, 'height': 1.0, 'depth': 1.0, 'weight': 5.0} for i in range(4)],
+    }
+    data = client.post('/pack', json=cubes).json()
+    bound = next(note for note in data['notes'] if 'BOUNDS' in note)
+    assert data['utilization'] == 1.0 and data['gap'] == 0.0
+    assert 'utilization <= 100.00 % | boxes <= 4' in bound
+
+
+def test_pack_integer_geometry_matches_float_layout(simple_test):
+    floats = client.post('/pack', json=simple_test)
+    integers = client.post('/pack', json={**simple_test, 'geometry': 'integer'})
+    rejected = client.post('/pack', json={**simple_test, 'geometry': 'integer', 'unit_scale': 0})
+
+    assert integers.status_code == 200
+    assert integers.json()['placed'] == floats.json()['placed']
+    assert integers.json()['utilization'] == floats.json()['utilization']
+    assert rejected.status_code == 422
+
+
+def test_pack_integer_geometry_echoes_unplaced_boxes_as_sent():
+    # Two 0.6234 m cubes (0.63 in units of 1/100 m) where only one fits; the other comes back as sent
+    truck = {'id': 't', 'width': 1.0, 'height': 1.0, 'depth': 1.0}
+    cubes = [{'id': f'c{i}', 'width': 0.6234, 'height': 0.6234, 'depth': 0.6234, 'weight': 1.0} for i in range(2)]
+    oversized = {'id': 'big', 'width': 1.2345, 'height': 0.6234, 'depth': 0.6234, 'weight': 1.0, 'rotatable': False}
+    options = {'boxes': cubes, 'geometry': 'integer', 'unit_scale': 100}
+    pallet = {'width': 0.9, 'depth': 0.9, 'max_height': 0.9}
+
+    packed = client.post('/pack', json={'truck': truck, **options}).json()
+    streamed = client.post('/pack/stream', json={'truck': truck, **options}).text.splitlines()
+    fleet = client.post('/pack/fleet', json={'trucks': [truck], **options}).json()
+    selected = client.post('/pack/select', json={'trucks': [{**truck, 'cost': 1.0}], **options}).json()
+    palletized = client.post('/pack', json={'truck': truck, **options, 'pallet': pallet}).json()
+    header = {'truck': truck, 'geometry': 'integer', 'unit_scale': 100}
+    online = client.post('/pack/online', content=json.dumps(header) + '\n' + json.dumps(oversized) + '\n')
+
+    def sent(box):
+        return {**box, 'rotatable': box.get('rotatable', True), 'priority': 0.0}
+
+    assert [sent(b) for b in packed['unplaced']] == packed['unplaced'] and len(packed['unplaced']) == 1
+    assert packed['unplaced'][0] in [sent(c) for c in cubes]
+    assert json.loads(streamed[-1])['unplaced'] == packed['unplaced']
+    assert fleet['unplaced'] == packed['unplaced'] and selected['unplaced'] == packed['unplaced']
+    assert len(palletized['pallets']) == 1 and palletized['unplaced'][0] in [sent(c) for c in cubes]
+    assert json.loads(online.text.splitlines()[0])['rejected'] == [sent(oversized)]
+
+
+def test_pack_integer_geometry_keeps_off_grid_pallets_apart():
+    # Two 1.2345 m pallets only fit across a 2.469 m truck in exact geometry; in 1/100 m units they take 1.24 each
+    truck = {'id': 't', 'width': 2.469, 'height': 1.0, 'depth': 3.0}
+    boxes = [{'id': f'b{i}', 'width': 0.6, 'height': 0.4, 'depth': 0.6, 'weight': 1.0} for i in range(20)]
+    pallet = {'width': 1.2345, 'depth': 1.2345, 'max_height': 0.6}
+    payload = {'truck': truck, 'boxes': boxes, 'pallet': pallet, 'geometry': 'integer', 'unit_scale': 100}
+
+    data = client.post('/pack', json=payload).json()
+    pallets = {p['id']: p for p in data['pallets']}
+    floor = [pb for pb in data['placed'] if pb['id'] in pallets]
+
+    assert len(floor) >= 2
+    assert all((p['width'], p['depth']) == (1.2345, 1.2345) for p in pallets.values())
+    for i, a in enumerate(floor):
+        for b in floor[i + 1:]:
+            assert abs(a['x'] - b['x']) >= 1.2345 - 1e-9 or abs(a['z'] - b['z']) >= 1.2345 - 1e-9
+
+
+def test_pack_lays_rotatable_boxes_down_and_keeps_others_upright():
+    payload = {
+        'truck': {'id': 't', 'width': 2.0, 'height': 1.0, 'depth': 4.0},
+        'boxes': [{'id': 'pipe', 'width': 0.5, 'height': 3.0, 'depth': 0.5, 'weight': 5.0}],
+    }
+    upright = {**payload, 'boxes': [{**payload['boxes'][0], 'rotatable': False}]}
+
+    laid = client.post('/pack', json=payload).json()
+    kept = client.post('/pack', json=upright).json()
+
+    assert [p['rotation'] for p in laid['placed']] in ([3], [5])
+    assert kept['placed'] == []
+    assert kept['unplaced'][0]['rotatable'] is False
+
+
+def test_pack_extreme_point_engine_packs_and_streams(simple_test):
+    response = client.post('/pack', json={**simple_test, 'engine': 'extreme_points'})
+    streamed = client.post('/pack/stream', json={**simple_test, 'engine': 'extreme_points'})
+    rejected = client.post('/pack', json={**simple_test, 'engine': 'extreme_points', 'mode': 'beam'})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data['placed']) + len(data['unplaced']) == len(simple_test['boxes'])
+
+    records = [json.loads(line) for line in streamed.text.splitlines() if line]
+    assert records[-1]['type'] == 'summary'
+    assert records[-1]['placed_count'] == len(data['placed'])
+    assert rejected.status_code == 422
+
+
+def test_pack_heightmap_engine_packs_and_streams(simple_test):
+    payload = {**simple_test, 'engine': 'heightmap', 'heightmap_resolution': 0.1}
+    response = client.post('/pack', json=payload)
+    streamed = client.post('/pack/stream', json=payload)
+    rejected = client.post('/pack', json={**payload, 'heightmap_resolution': 0})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data['placed']) + len(data['unplaced']) == len(simple_test['boxes'])
+
+    records = [json.loads(line) for line in streamed.text.splitlines() if line]
+    assert records[-1]['type'] == 'summary'
+    assert records[-1]['placed_count'] == len(data['placed'])
+    assert rejected.status_code == 422
+
+
+def test_pack_wall_engine_streams_one_chunk_per_wall(simple_test):
+    payload = {**simple_test, 'engine': 'walls', 'workers': 1}
+    response = client.post('/pack', json=payload)
+    streamed = client.post('/pack/stream', json=payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data['placed']) + len(data['unplaced']) == len(simple_test['boxes'])
+
+    records = [json.loads(line) for line in streamed.text.splitlines() if line]
+    assert {r['heuristic'] for r in records[:-1]} == {'WALL'}
+    assert records[-1]['placed_count'] == len(data['placed'])
+
+
+def test_pack_partitioned_mode_reports_siblings(simple_test):
+    response = client.post('/pack', json={**simple_test, 'mode': 'partitioned', 'workers': 1})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['search']['mode'] == 'partitioned'
+    assert data['search']['siblings'] >= 0
+    assert len(data['placed']) + len(data['unplaced']) == len(simple_test['boxes'])
+
+
+def test_pack_fleet_returns_a_layout_per_truck_and_one_unplaced_list(simple_test):
+    truck = simple_test['truck']
+    trucks = [{**truck, 'id': 'front', 'depth': truck['depth'] / 4}, {**truck, 'id': 'back'}]
+    response = client.post('/pack/fleet', json={'trucks': trucks, 'boxes': simple_test['boxes'], 'workers': 1})
+    duplicate = client.post('/pack/fleet', json={'trucks': [truck, truck], 'boxes': simple_test['boxes']})
+    empty = client.post('/pack/fleet', json={'trucks': [], 'boxes': simple_test['boxes']})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [layout['truck_id'] for layout in data['trucks']] == ['front', 'back']
+    placed = sum(len(layout['placed']) for layout in data['trucks'])
+    assert placed + len(data['unplaced']) == len(simple_test['boxes'])
+    assert 0.0 < data['utilization'] <= 1.0
+    assert duplicate.status_code == 422
+    assert empty.status_code == 422
+
+
+def test_pack_select_returns_the_cheapest_truck_that_takes_the_load(simple_test):
+    truck = simple_test['truck']
+    catalogue = [
+        {**truck, 'id': 'large', 'cost': 900.0},
+        {**truck, 'id': 'cheap', 'cost': 100.0},
+        {**truck, 'id': 'toy', 'width': 0.1, 'height': 0.1, 'depth': 0.1, 'cost': 1.0},
+    ]
+    response = client.post('/pack/select', json={'trucks': catalogue, 'boxes': simple_test['boxes'], 'workers': 1})
+    missing_cost = client.post('/pack/select', json={'trucks': [truck], 'boxes': simple_test['boxes']})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data['truck_id'], data['cost'], data['fits']) == ('cheap', 100.0, True)
+    assert len(data['placed']) == len(simple_test['boxes'])
+    assert [c['status'] for c in data['candidates']] == ['fits', 'fits', 'pruned']
+    assert missing_cost.status_code == 422
+
+
+def test_pack_with_pallet_reports_nested_placements(simple_test):
+    boxes = [
+        {'id': f'p{i}', 'width': 0.4, 'height': 0.3, 'depth': 0.4, 'weight': 5.0} for i in range(40)
+    ] + [{'id': 'loose', 'width': 2.0, 'height': 0.5, 'depth': 0.5, 'weight': 20.0}]
+    payload = {**simple_test, 'boxes': boxes, 'pallet': {'max_height': 1.2}, 'workers': 1}
+    response = client.post('/pack', json=payload)
+    streamed = client.post('/pack/stream', json=payload)
+    bad_pallet = client.post('/pack', json={**payload, 'pallet': {'max_height': 0.1}})
+
+    assert response.status_code == 200
+    data = response.json()
+    pallets = {p['id']: p for p in data['pallets']}
+    truck_ids = {p['id'] for p in data['placed']}
+    assert set(pallets) <= truck_ids and 'loose' in truck_ids | {b['id'] for b in data['unplaced']}
+    nested = [b['id'] for p in data['pallets'] for b in p['placed']]
+    assert len(nested) + len(truck_ids - set(pallets)) + len(data['unplaced']) == len(boxes)
+    for p in data['pallets']:
+        assert all(b['y'] >= 0.144 - 1e-9 and b['x'] + 0.4 <= p['width'] + 1e-9 for b in p['placed'])
+        assert p['weight'] == 25.0 + 5.0 * len(p['placed'])
+    assert streamed.status_code == 422
+    assert bad_pallet.status_code == 422
+
+
+def test_pack_json_fast_path_matches_the_response_model(simple_test, monkeypatch):
+    payload = pack_request(PackingRequest(**simple_test, mode='restart', time_budget_ms=50, workers=1))
+    expected = PackingResponse.model_validate(payload, from_attributes=True).model_dump(mode='json')
+    response = client.post('/pack', json=simple_test)
+
+    assert json.loads(encode_json(payload)) == expected
+    monkeypatch.setattr(encoding, 'orjson', None)
+    assert json.loads(encode_json(payload)) == expected
+    assert response.json().keys() == expected.keys()
+
+
+def test_pack_binary_layout_decodes_to_the_json_response(simple_test):
+    huge = {'id': 'huge', 'width': 9.0, 'height': 9.0, 'depth': 9.0, 'weight': 1.0}
+    payload = {**simple_test, 'boxes': simple_test['boxes'] + [huge]}
+    as_json = client.post('/pack', json=payload)
+    binary = client.post('/pack', json=payload, headers={'Accept': f'{LAYOUT_MEDIA_TYPE}, application/json;q=0.5'})
+
+    assert as_json.headers['content-type'] == 'application/json'
+    assert binary.headers['content-type'] == LAYOUT_MEDIA_TYPE
+    assert 'Accept' in binary.headers['vary'] and 'Accept' in as_json.headers['vary']
+
+    expected, decoded = as_json.json(), decode_layout(binary.content)
+    assert decoded.keys() == expected.keys()
+    assert [p['id'] for p in decoded['placed']] == [p['id'] for p in expected['placed']]
+    for got, want in zip(decoded['placed'] + decoded['unplaced'], expected['placed'] + expected['unplaced']):
+        for key, value in want.items():
+            assert got[key] == value if not isinstance(value, float) else abs(got[key] - value) < 1e-5
+    assert 'huge' in {b['id'] for b in decoded['unplaced']}
+    assert decoded['notes'] == expected['notes'] and decoded['utilization'] == expected['utilization']
+
+    columns = decode_layout(binary.content, columns=True)
+    assert columns['placed']['id'] == [p['id'] for p in expected['placed']]
+    assert len(columns['placed']['x']) == len(expected['placed'])
+    no_priority = PackingResponse(
+        placed=None, unplaced=[Box(id='b', width=1, height=1, depth=1, weight=1, priority=None)],
+        utilization=0, runtime_ms=0, notes=[],
+    )
+    assert decode_layout(encode_layout(dict(no_priority))) == no_priority.model_dump()
+
+    assert not wants_layout_binary(None) and not wants_layout_binary('*/*')
+    assert not wants_layout_binary(f'application/json, {LAYOUT_MEDIA_TYPE};q=0.5')
+    assert wants_layout_binary(f'{LAYOUT_MEDIA_TYPE}, */*;q=0.1')
+
+
+def test_pack_takes_sku_quantities_inline_or_from_the_catalogue(simple_test):
+    registered = client.put('/catalogue/skus', json=[
+        {'sku': 'CUBE', 'width': 0.5, 'height': 0.5, 'depth': 0.5, 'weight': 4.0},
+        {'sku': 'FLAT', 'width': 1.0, 'height': 0.2, 'depth': 1.0, 'weight': 6.0, 'rotatable': False},
+    ])
+    skus = [
+        {'sku': 'CUBE', 'quantity': 12},
+        {'sku': 'FLAT', 'quantity': 3, 'id_prefix': 'F-', 'priority': 2.0},
+        {'sku': 'ROLL', 'quantity': 2, 'width': 0.3, 'height': 1.0, 'depth': 0.3, 'weight': 8.0},
+    ]
+    response = client.post('/pack', json={'truck': simple_test['truck'], 'skus': skus})
+    fleet = client.post('/pack/fleet', json={'trucks': [simple_test['truck']], 'skus': skus[:1]})
+    unknown = client.post('/pack', json={'truck': simple_test['truck'], 'skus': [{'sku': 'NOPE', 'quantity': 1}]})
+    no_load = client.post('/pack', json={'truck': simple_test['truck']})
+    listed = client.get('/catalogue/skus')
+    removed, removed_again = client.delete('/catalogue/skus/FLAT'), client.delete('/catalogue/skus/FLAT')
+    client.delete('/catalogue/skus/CUBE')
+
+    assert registered.status_code == 200 and registered.json()['registered'] == 2
+    assert response.status_code == 200
+    data = response.json()
+    ids = {b['id'] for b in data['placed'] + data['unplaced']}
+    assert ids == {f'CUBE{n:02d}' for n in range(1, 13)} | {'F-1', 'F-2', 'F-3', 'ROLL1', 'ROLL2'}
+    assert fleet.status_code == 200
+    assert unknown.status_code == 422 and 'NOPE' in unknown.json()['detail']
+    assert no_load.status_code == 422
+    assert {s['sku'] for s in listed.json()} >= {'CUBE', 'FLAT'}
+    assert removed.status_code == 204 and removed_again.status_code == 404
+
+
+def test_pack_rejects_box_ids_that_skus_also_generate(simple_test):
+    box = {'width': 0.5, 'height': 0.5, 'depth': 0.5, 'weight': 1.0}
+    sku = {'sku': 'A', 'quantity': 3, **box}
+    clash = client.post('/pack', json={'truck': simple_test['truck'], 'boxes': [{'id': 'A1', **box}], 'skus': [sku]})
+    past_quantity = client.post('/pack', json={'truck': simple_test['truck'], 'boxes': [{'id': 'A4', **box}], 'skus': [sku]})
+
+    assert clash.status_code == 422 and 'A1' in json.dumps(clash.json()['detail'])
+    assert past_quantity.status_code == 200
+
+
+def test_pack_online_answers_each_arrival_line_and_closes_full_trucks():
+    truck = {'id': 't', 'width': 1.0, 'height': 1.0, 'depth': 1.0}
+
+    def cube(i, side=0.5):
+        return {'id': f'b{i}', 'width': side, 'height': side, 'depth': side, 'weight': 1.0}
+
+    lines = [{'truck': truck}, *(cube(i) for i in range(6)), [cube(6), cube(7), cube(8)], {'id': 1}, cube(9, 2.0)]
+    body = (json.dumps(line).encode() + b'\n' for line in lines)
+    response = client.post('/pack/online', content=body)
+    no_header = client.post('/pack/online', content=b'{"boxes": []}\n')
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    steps = [r for r in records if r['type'] == 'step']
+    assert [r['line'] for r in steps[:7]] == list(range(1, 8))
+    assert [p['truck'] for p in steps[6]['placed']] == [0, 0, 1]
+    assert steps[6]['closed'] == [{'truck': 0, 'box_count': 8, 'utilization': 1.0, 'weight': 8.0}]
+    assert records[7]['type'] == 'error' and records[7]['line'] == 8
+    assert [b['id'] for b in steps[7]['rejected']] == ['b9']
+    assert steps[8]['closed'][0]['truck'] == 1
+    assert records[-1] == {**records[-1], 'type': 'summary', 'trucks': 2, 'placed_count': 9, 'rejected_count': 1}
+    assert no_header.status_code == 422
+
+
+def test_pack_online_answers_a_line_that_is_not_utf8_and_goes_on():
+    truck = {'id': 't', 'width': 1.0, 'height': 1.0, 'depth': 1.0}
+    box = {'id': 'b0', 'width': 0.5, 'height': 0.5, 'depth': 0.5, 'weight': 1.0}
+    body = [json.dumps({'truck': truck}).encode() + b'\n', b'{"id": "\xff\xfe"}\n', json.dumps(box).encode() + b'\n']
+
+    response = client.post('/pack/online', content=iter(body))
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    assert records[0]['type'] == 'error' and records[0]['line'] == 1 and 'UTF-8' in records[0]['detail']
+    assert records[1]['type'] == 'step' and [p['id'] for p in records[1]['placed']] == ['b0']
+    assert records[-1]['type'] == 'summary' and records[-1]['placed_count'] == 1
+
+
+def test_pack_repack_returns_only_the_changed_placements(simple_test):
+    packed = client.post('/pack', json={**simple_test, 'engine': 'extreme_points'}).json()
+    layout = {'truck': simple_test['truck'], 'boxes': simple_test['boxes'], 'placed': packed['placed']}
+    new_box = {'id': 'extra', 'width': 0.2, 'height': 0.2, 'depth': 0.2, 'weight': 1.0}
+    removed = packed['placed'][-1]['id']
+
+    response = client.post('/pack/repack', json={**layout, 'add': [new_box], 'remove': [removed]})
+    unknown = client.post('/pack/repack', json={**layout, 'remove': ['nope']})
+    outside = client.post('/pack/repack', json={
+        **layout, 'add': [new_box], 'pinned': [{'id': 'extra', 'x': -1.0, 'y': 0.0, 'z': 0.0, 'rotation': 0}],
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [p['id'] for p in data['changed']] == ['extra']
+    assert data['removed'] == [removed]
+    assert data['unchanged_count'] == len(packed['placed']) - 1
+    assert data['notes'][0].startswith('\n[REPACK]')
+    assert unknown.status_code == 422
+    assert outside.status_code == 422
+
+
+def test_pack_session_keeps_the_layout_between_messages_and_sockets(simple_test):
+    extra = {'id': 'extra', 'width': 0.2, 'height': 0.2, 'depth': 0.2, 'weight': 1.0}
+    with client.websocket_connect('/pack/session') as ws:
+        ws.send_json({'type': 'edit', 'remove': ['bx1']})
+        unbound = ws.receive_json()
+        ws.send_json({'type': 'open', **simple_test, 'engine': 'extreme_points'})
+        layout = ws.receive_json()
+        ws.send_json({'type': 'edit', 'add': [extra]})
+        diff = ws.receive_json()
+        ws.send_json({'type': 'edit', 'add': [extra]})
+        clash = ws.receive_json()
+        ws.send_json({'type': 'configure', 'options': {'mode': 'beam'}})
+        bad_options = ws.receive_json()
+        ws.send_json({'type': 'configure', 'options': {'engine': 'regions', 'quality': 'draft'}})
+        configured = ws.receive_json()
+        ws.send_json({'type': 'repack'})
+        repacked = ws.receive_json()
+
+    with client.websocket_connect('/pack/session') as ws:
+        ws.send_json({'type': 'resume', 'session': layout['session']})
+        resumed = ws.receive_json()
+        ws.send_json({'type': 'close'})
+        closed = ws.receive_json()
+    with client.websocket_connect('/pack/session') as ws:
+        ws.send_json({'type': 'resume', 'session': layout['session']})
+        expired = ws.receive_json()
+
+    assert unbound == {'type': 'error', 'detail': 'no open session'}
+    assert layout['type'] == 'layout' and len(layout['placed']) == len(simple_test['boxes'])
+    assert diff['type'] == 'diff' and [p['id'] for p in diff['changed']] == ['extra']
+    assert diff['unchanged_count'] == len(layout['placed'])
+    assert clash['type'] == 'error' and bad_options['type'] == 'error'
+    assert configured['options']['quality'] == 'draft'
+    assert repacked['type'] == 'layout' and len(repacked['placed']) + len(repacked['unplaced']) == len(simple_test['boxes']) + 1
+    assert resumed['placed'] == repacked['placed']
+    assert closed == {'type': 'closed', 'session': layout['session']}
+    assert expired == {'type': 'error', 'detail': 'unknown or expired session'}
+
+
+def test_pack_session_answers_cancelled_and_failed_packing_with_errors(monkeypatch):
+    truck = {'id': 'T', 'width': 2.4, 'height': 2.6, 'depth': 12.0}
+    boxes = [{'id': f'S{i:03d}', 'width': 0.4, 'height': 0.4, 'depth': 0.4, 'weight': 4.0} for i in range(400)]
+    metrics.reset()
+
+    def broken(self, cancel=None):
+        raise RuntimeError('packer failed')
+
+    with client.websocket_connect('/pack/session') as ws:
+        ws.send_json({'type': 'open', 'truck': truck, 'boxes': boxes, 'placed': []})
+        opened = ws.receive_json()
+        monkeypatch.setattr(settings, 'pack_deadline_ms', 1.0)
+        ws.send_json({'type': 'repack'})
+        cancelled = ws.receive_json()
+        monkeypatch.setattr(settings, 'pack_deadline_ms', None)
+        with monkeypatch.context() as m:
+            m.setattr(PackingSession, 'pack', broken)
+            ws.send_json({'type': 'repack'})
+            failed = ws.receive_json()
+        ws.send_json({'type': 'resume', 'session': opened['session']})
+        resumed = ws.receive_json()
+
+    assert cancelled['type'] == 'error' and 'deadline exceeded' in cancelled['detail']
+    assert failed == {'type': 'error', 'detail': 'packer failed'}
+    assert resumed['placed'] == [] and len(resumed['unplaced']) == len(boxes)
+    assert client.get('/metrics').json()['pack_cancelled_deadline_exceeded_total'] == 1
+
+
+def test_session_store_drops_idle_least_recently_used_and_oversized_sessions(simple_test):
+    def session():
+        return PackingSession(SessionOpen(type='open', placed=[], **simple_test))
+
+    a, b, c = session(), session(), session()
+    by_count = SessionStore(max_count=2, idle_timeout_s=60.0, max_bytes=float('inf'))
+    for s in (a, b, a, c):
+        by_count.touch(s)
+    by_size = SessionStore(max_count=10, idle_timeout_s=60.0, max_bytes=a.nbytes + 1)
+    by_size.touch(a)
+    by_size.touch(b)
+
+    assert (by_count.get(a.id), by_count.get(b.id), by_count.get(c.id)) == (a, None, c)
+    assert len(by_size) == 1 and by_size.get(b.id) is b
+
+    by_idle = SessionStore(max_count=10, idle_timeout_s=60.0, max_bytes=float('inf'))
+    by_idle.touch(a)
+    by_idle.touch(b)
+    a.last_used -= 61.0
+    assert by_idle.get(a.id) is None and by_idle.get(b.id) is b
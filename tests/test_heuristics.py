@@ -4,14 +4,20 @@ from python.vtl_core.packing.heurisitics import (
     ff_row_pack,
     maxrects_pack,
     skyline_pack,
+    ff_guillotine_stepper,
+    ff_row_stepper,
+    maxrects_stepper,
+    skyline_stepper,
 )
 
 
 HEURISTICS = [ff_row_pack, ff_guillotine_pack, maxrects_pack, skyline_pack]
+STEPPERS = [ff_row_stepper, ff_guillotine_stepper, maxrects_stepper, skyline_stepper]
 
 
-def make_box(id_: str, w: float, h: float, d: float, weight: float = 1.0, priority: float = 0.0) -> Box_t:
-    return Box_t(id=id_, width=w, height=h, depth=d, weight=weight, priority=priority)
+def make_box(id_: str, w: float, h: float, d: float, weight: float = 1.0, priority: float = 0.0,
+             rotatable: bool = True) -> Box_t:
+    return Box_t(id=id_, width=w, height=h, depth=d, weight=weight, priority=priority, rotatable=rotatable)
 
 
 def test_all_heuristics_only_process_one_box_type_prefix():
@@ -36,7 +42,7 @@ def test_all_heuristics_reject_boxes_over_height_cap_and_keep_failures():
     truck = Truck_t(id='t', width=4.0, height=5.0, depth=4.0)
 
     for heuristic in HEURISTICS:
-        boxes = [make_box('too_tall', 1.0, 3.0, 1.0)]
+        boxes = [make_box('too_tall', 1.0, 3.0, 1.0, rotatable=False)]
         placed, notes, used_h, _, _ = heuristic(truck=truck, boxes=boxes, layer_height=2.0)
 
         assert len(placed) == 0
@@ -45,6 +51,20 @@ def test_all_heuristics_reject_boxes_over_height_cap_and_keep_failures():
         assert any('exceeds height cap' in note for note in notes)
 
 
+def test_all_heuristics_lay_rotatable_boxes_down_under_height_cap():
+    truck = Truck_t(id='t', width=4.0, height=5.0, depth=4.0)
+
+    for heuristic in HEURISTICS:
+        boxes = [make_box(f'tall{i}', 1.0, 3.0, 1.0) for i in range(4)]
+        placed, _, used_h, _, _ = heuristic(truck=truck, boxes=boxes, layer_height=2.0)
+
+        # On its side the box is 1.0 high with a 3.0 x 1.0 footprint: four fit the 4 x 4 floor
+        assert len(placed) == 4
+        assert boxes == []
+        assert used_h == 1.0
+        assert all(p.rotation in (2, 3, 4, 5) for p in placed)
+
+
 def test_ff_row_pack_starts_new_row_when_needed():
     truck = Truck_t(id='t', width=2.0, height=3.0, depth=2.0)
     boxes = [
@@ -83,3 +103,26 @@ def test_maxrects_and_skyline_can_place_multiple_same_type_boxes_without_losing_
 
         assert len(placed) == 4
         assert boxes == []
+
+
+def test_steppers_resume_to_the_same_result_as_the_pack_functions():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=2.0)
+
+    for heuristic, stepper_factory in zip(HEURISTICS, STEPPERS):
+        expected_boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(6)] + [make_box('b', 2.0, 1.0, 1.0)]
+        stepped_boxes = list(expected_boxes)
+        expected = heuristic(truck=truck, boxes=expected_boxes)
+
+        stepper = stepper_factory(truck=truck, boxes=stepped_boxes)
+        assert stepper.step(2) is False
+        assert stepper.processed == 2 and len(stepper.placed) == 2
+        assert not stepper.settled
+
+        stepper.step(3)
+        assert stepper.settled
+        assert len(stepper.placed) == 4
+
+        stepped = stepper.finish()
+        assert [(p.id, p.x, p.z, p.rotation) for p in stepped[0]] == [(p.id, p.x, p.z, p.rotation) for p in expected[0]]
+        assert stepped[2:] == expected[2:]
+        assert [b.id for b in stepped_boxes] == [b.id for b in expected_boxes]
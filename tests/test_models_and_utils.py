@@ -1,4 +1,7 @@
+from python.vtl_core.bounds import compute_bounds
 from python.vtl_core.domain.models import Box_t, PlacedBox_t, Truck_t
+from python.vtl_core.geometry import quantize_instances, restore_placement
+from python.vtl_core.orientations import orientations_of, placed_dims
 from python.vtl_core.utils import (
     _compute_local_extents,
     _height_cap,
@@ -21,6 +24,31 @@ def test_box_equality_uses_dimensions_only():
     assert a != c
 
 
+def test_box_rotate_swaps_the_two_dimensions_perpendicular_to_the_axis():
+    box = make_box('a', 1.0, 2.0, 3.0)
+
+    box.rotate('y')
+    assert (box.width, box.height, box.depth) == (3.0, 2.0, 1.0)
+    box.rotate('z')
+    assert (box.width, box.height, box.depth) == (2.0, 3.0, 1.0)
+    box.rotate('x')
+    assert (box.width, box.height, box.depth) == (2.0, 1.0, 3.0)
+
+
+def test_orientation_tables_dedupe_cubes_and_square_faces_and_respect_rotatable():
+    assert len(orientations_of(make_box('c', 1.0, 1.0, 1.0))) == 1
+    assert len(orientations_of(make_box('s', 1.0, 2.0, 1.0))) == 3
+    assert len(orientations_of(make_box('b', 1.0, 2.0, 3.0))) == 6
+
+    upright = Box_t(id='u', width=1.0, height=2.0, depth=3.0, weight=1.0, rotatable=False)
+    assert [o[3] for o in orientations_of(upright)] == [0, 1]
+    assert upright != make_box('b', 1.0, 2.0, 3.0)
+
+    for w, h, d, rotation in orientations_of(make_box('b', 1.0, 2.0, 3.0)):
+        assert placed_dims(make_box('b', 1.0, 2.0, 3.0), rotation) == (w, h, d)
+        assert sorted((w, h, d)) == [1.0, 2.0, 3.0]
+
+
 def test_box_volume_and_footprint_properties():
     box = make_box('x', 2.0, 3.0, 4.0)
     truck = Truck_t(id='t', width=2.0, height=3.0, depth=5.0)
@@ -84,3 +112,43 @@ def test_largest_complete_top_left_rectangle_detects_gaps():
 
     assert complete_rect == (2.0, 1.0)
     assert gap_rect == (1.0, 1.0)
+
+
+def test_bounds_drop_oversized_boxes_and_cap_by_dimensions():
+    truck = Truck_t(id='t', width=2.0, height=1.5, depth=2.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(6)] + [make_box('big', 3.0, 1.0, 3.0)]
+
+    bounds = compute_bounds(truck, boxes)
+
+    # Only one 1 m layer fits under 1.5 m, so at most 4 cubes despite 6 m3 of truck volume
+    assert bounds.fitting_count == 6
+    assert bounds.max_count == 4
+    assert bounds.max_volume == 4.0
+    assert bounds.gap(4.0 / 6.0) == 0.0
+    assert round(bounds.gap(2.0 / 6.0), 6) == 0.5
+
+
+def test_bounds_leave_out_the_unenforced_weight_limit():
+    truck = Truck_t(id='t', width=2.0, height=1.0, depth=2.0, max_weight=25.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0, weight=10.0) for i in range(4)]
+
+    bounds = compute_bounds(truck, boxes)
+
+    assert bounds.max_count == 4
+    assert bounds.max_volume == 4.0
+    assert bounds.max_weight == 40.0
+
+
+def test_quantize_instances_rounds_boxes_up_and_truck_down():
+    truck = Truck_t(id='t', width=2.4, height=2.6, depth=12.0)
+    boxes = [make_box('a', 1.2, 0.3, 0.1), make_box('b', 0.8004, 0.3, 0.1)]
+
+    int_truck, int_boxes = quantize_instances(truck, boxes, 1000)
+
+    assert (int_truck.width, int_truck.height, int_truck.depth) == (2400, 2600, 12000)
+    assert [(b.width, b.height, b.depth) for b in int_boxes] == [(1200, 300, 100), (801, 300, 100)]
+    assert all(isinstance(v, int) for b in int_boxes for v in (b.width, b.height, b.depth))
+    # Decimal inputs compare exactly after quantization, unlike 3 * 0.1 != 0.3 in floats
+    assert int_boxes[0].depth * 3 == int_boxes[0].height
+    assert restore_placement(PlacedBox_t(id='a', x=1200, y=0, z=300, rotation=1), 1000) == \
+        PlacedBox_t(id='a', x=1.2, y=0.0, z=0.3, rotation=1)
@@ -5,9 +5,23 @@ from python.vtl_core.packing.processing import (
     begin_pack,
     create_instances,
     get_best_heuristic_for_region,
+    iter_layer_pack,
     layer_pack,
+    race_heuristics_for_region,
+    score_heuristics_for_region,
+    select_heuristic,
 )
-from python.vtl_core.packing.scoring import ScoringEngine
+from python.vtl_core.packing.scoring import ScoreTally, ScoringEngine
+from python.vtl_core.packing.control import CancelToken, PackCancelled, TimeBudget
+from python.vtl_core.packing.predictor import (
+    HeuristicPredictor,
+    default_predictor,
+    feature_key,
+    fit_decision_table,
+    region_features,
+)
+
+import pytest
 
 
 def make_box(id_: str, w: float, h: float, d: float, weight: float = 1.0, priority: float = 0.0) -> Box_t:
@@ -33,6 +47,24 @@ def test_scoring_engine_returns_expected_component_scores():
     assert scores['total_score'] == 0.495
 
 
+def test_incremental_tally_matches_full_scoring():
+    truck = Truck_t(id='t', width=4.0, height=2.0, depth=4.0)
+    original = [make_box('a', 2.0, 1.0, 2.0, weight=10.0), make_box('b', 2.0, 1.0, 2.0, weight=10.0)]
+    placed = [
+        PlacedBox_t(id='a', x=0.0, y=0.0, z=0.0, rotation=0),
+        PlacedBox_t(id='b', x=2.0, y=1.0, z=2.0, rotation=0),
+    ]
+    engine = ScoringEngine(truck)
+    box_map = {b.id: b for b in original}
+
+    first = engine.tally(placed[:1], box_map)
+    both = engine.tally(placed[1:], box_map, first)
+
+    assert first.count == 1 and both.count == 2
+    assert round(engine.total_from_tally(both), 4) == engine.get_all_scores(placed, original)['total_score']
+    assert engine.total_from_tally(ScoreTally()) == 0.0
+
+
 def test_create_instances_maps_pydantic_request_to_internal_models():
     req = PackingRequest(
         truck=Truck(id='t', width=2.0, height=3.0, depth=4.0, max_weight=100.0),
@@ -48,6 +80,30 @@ def test_create_instances_maps_pydantic_request_to_internal_models():
     assert boxes[0].priority == 2.0
 
 
+def test_create_instances_expands_sku_entries_without_box_models():
+    req = PackingRequest(
+        truck=Truck(id='t', width=2.0, height=3.0, depth=4.0),
+        boxes=[Box(id='b', width=1.0, height=1.0, depth=1.0, weight=5.0)],
+        skus=[
+            {'sku': 'S', 'quantity': 180, 'width': 0.2, 'height': 0.2, 'depth': 0.2, 'weight': 1.0},
+            {'sku': 'T', 'quantity': 2, 'id_prefix': 'crate-', 'width': 0.5, 'height': 0.4, 'depth': 0.5, 'weight': 3.0,
+             'rotatable': False, 'priority': 1.0},
+        ],
+    )
+
+    truck, boxes = create_instances(req)
+
+    assert len(req.skus) == 2
+    assert [b.id for b in boxes[:3]] == ['b', 'S001', 'S002'] and boxes[180].id == 'S180'
+    assert [b.id for b in boxes[-2:]] == ['crate-1', 'crate-2']
+    assert boxes[-1].rotatable is False and boxes[-1].priority == 1.0 and boxes[1].priority == 0.0
+    assert all(isinstance(b, Box_t) for b in boxes)
+    with pytest.raises(ValueError, match='overlap'):
+        PackingRequest(truck=req.truck, skus=[{'sku': 'S', 'quantity': 1}, {'sku': 'S1', 'quantity': 1}])
+    with pytest.raises(ValueError, match='has no size'):
+        create_instances(PackingRequest(truck=req.truck, skus=[{'sku': 'S', 'quantity': 1}]))
+
+
 def test_get_best_heuristic_returns_valid_enum_for_simple_region():
     truck = Truck_t(id='t', width=4.0, height=2.0, depth=4.0)
     boxes = [make_box('a1', 1.0, 1.0, 1.0), make_box('a2', 1.0, 1.0, 1.0)]
@@ -87,3 +143,121 @@ def test_begin_pack_returns_payload_with_expected_shape():
     assert payload['utilization'] > 0
     assert payload['runtime_ms'] >= 0
     assert any('FINAL SCORE' in note for note in payload['notes'])
+
+
+def test_iter_layer_pack_yields_absolute_placements_per_region():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=4.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(6)]
+
+    results = list(iter_layer_pack(truck=truck, boxes=boxes))
+    placed = [pb for r in results for pb in r.placed]
+
+    assert len(placed) == 6
+    assert boxes == []
+    assert all(r.heuristic in Hstix.__members__ for r in results)
+    assert [r.index for r in results] == sorted(r.index for r in results)
+
+
+def test_begin_pack_with_exhausted_time_budget_returns_truncated_partial_layout():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=2.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(4)]
+
+    payload = begin_pack(truck, boxes, time_budget_ms=1e-9)
+
+    assert payload['truncated'] is True
+    assert len(payload['placed']) + len(payload['unplaced']) == 4
+    assert any('TRUNCATED' in note for note in payload['notes'])
+
+
+def test_layer_pack_degraded_budget_uses_fast_heuristic_without_truncating():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=2.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(4)]
+    budget = TimeBudget(budget_ms=60_000, degrade_ratio=0.0)
+
+    placed, notes = layer_pack(truck=truck, boxes=boxes, budget=budget)
+
+    assert len(placed) == 4
+    assert budget.truncated is False
+    assert any('fast mode' in note for note in notes)
+
+
+def test_tripped_cancel_token_stops_packing_and_trials():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=2.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(4)]
+    region = PackRegion(x=0.0, y=0.0, z=0.0, width=2.0, depth=2.0, height=2.0)
+    cancel = CancelToken()
+    cancel.cancel("client disconnected")
+
+    with pytest.raises(PackCancelled) as exc:
+        begin_pack(truck, boxes, cancel=cancel)
+    with pytest.raises(PackCancelled):
+        get_best_heuristic_for_region(truck, boxes, region, cancel=cancel)
+
+    assert exc.value.reason == "client disconnected"
+    assert len(boxes) == 4
+
+
+def test_score_heuristics_for_region_scores_every_heuristic_that_places_boxes():
+    truck = Truck_t(id='t', width=4.0, height=2.0, depth=4.0)
+    boxes = [make_box('a1', 1.0, 1.0, 1.0), make_box('a2', 1.0, 1.0, 1.0)]
+    region = PackRegion(x=0.0, y=0.0, z=0.0, width=4.0, depth=4.0, height=2.0)
+
+    scores = score_heuristics_for_region(truck, boxes, region)
+
+    assert set(scores) == {Hstix.FFR, Hstix.FFG, Hstix.MAX, Hstix.SKY}
+    assert all(score > 0 for score in scores.values())
+    assert len(boxes) == 2
+
+
+def test_predictor_falls_back_below_confidence_and_fits_from_trial_log():
+    truck = Truck_t(id='t', width=4.0, height=2.0, depth=4.0)
+    boxes = [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(4)]
+    key = feature_key(region_features(truck, boxes))
+
+    table = fit_decision_table([{'key': key, 'best': ['MAX', 'SKY']}] * 3 + [{'key': key, 'best': ['SKY']}])
+    assert table[key] == {'heuristic': 'SKY', 'confidence': 1.0, 'samples': 4}
+    assert HeuristicPredictor(table).predict(truck, boxes) == ('SKY', 1.0)
+    assert HeuristicPredictor(table, min_confidence=1.01).predict(truck, boxes) is None
+    assert HeuristicPredictor({}).predict(truck, boxes) is None
+
+    trial_log = []
+    region = PackRegion(x=0.0, y=0.0, z=0.0, width=4.0, depth=4.0, height=2.0)
+    heuristic, chosen_by = select_heuristic(truck, boxes, region, selector='trials', trial_log=trial_log)
+    assert chosen_by == 'trials'
+    assert trial_log[0]['scores'][heuristic.name] == max(trial_log[0]['scores'].values())
+
+
+def test_region_features_follow_the_layer_orientations():
+    region = Truck_t(id='t', width=3.0, height=1.0, depth=1.0)
+    tall = make_box('a', 1.0, 3.0, 1.0)
+    upright = Box_t(id='b', width=1.0, height=3.0, depth=1.0, weight=1.0, rotatable=False)
+
+    laid_down = region_features(region, [tall])
+    assert laid_down['height_fits'] and laid_down['capacity'] == 1
+    assert region_features(region, [upright])['height_fits'] is False
+
+
+def test_shipped_heuristic_model_only_predicts_known_heuristics():
+    predictor = default_predictor()
+
+    assert predictor.table
+    assert {cell['heuristic'] for cell in predictor.table.values()} <= set(Hstix.__members__)
+
+
+def test_race_eliminates_settled_losers_and_agrees_with_trials():
+    truck = Truck_t(id='t', width=3.0, height=2.0, depth=2.0)
+    boxes = [make_box(f'a{i}', 2.0, 1.0, 1.0) for i in range(6)]
+    region = PackRegion(x=0.0, y=0.0, z=0.0, width=3.0, depth=2.0, height=2.0)
+
+    scores, eliminated = race_heuristics_for_region(truck, boxes, region, step=1)
+    trial_scores = score_heuristics_for_region(truck, boxes, region)
+
+    assert set(scores) | set(eliminated) == set(Hstix)
+    assert max(scores.values()) == max(trial_scores.values())
+    assert get_best_heuristic_for_region(truck, boxes, region) in scores
+    assert len(boxes) == 6
+
+    trial_log = []
+    heuristic, chosen_by = select_heuristic(truck, boxes, region, selector='race', trial_log=trial_log)
+    assert chosen_by.startswith('race')
+    assert trial_log[0]['chosen'] == heuristic.name
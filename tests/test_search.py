@@ -0,0 +1,504 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from python.vtl_core.bounds import compute_bounds
+from python.vtl_core.domain.models import Box_t, PackRegion, PlacedBox_t, Truck_t
+from python.vtl_core.orientations import placed_dims
+from python.vtl_core.packing.beam import BeamSearch, beam_pack
+from python.vtl_core.packing.exact import exact_pack
+from python.vtl_core.packing.extreme_points import extreme_point_pack
+from python.vtl_core.packing.fleet import fleet_pack, select_truck
+from python.vtl_core.packing.heightmap import HM_MAX_CELLS, HeightmapPacker, heightmap_pack
+from python.vtl_core.packing.incremental import displaced_boxes, repack
+from python.vtl_core.packing.online import online_pack
+from python.vtl_core.packing import pallets
+from python.vtl_core.packing.partition import allocate_boxes, partitioned_pack
+from python.vtl_core.packing.walls import iter_wall_pack, wall_pack
+from python.vtl_core.packing.control import CancelToken, PackCancelled, TimeBudget
+from python.vtl_core.packing.processing import Hstix, begin_pack
+from python.vtl_core.packing.scoring import ScoringEngine
+from python.vtl_core.packing.search import group_by_sku, restart_search, worker_pool
+
+import pytest
+
+
+def make_box(id_: str, w: float, h: float, d: float, weight: float = 1.0) -> Box_t:
+    return Box_t(id=id_, width=w, height=h, depth=d, weight=weight, priority=0.0)
+
+
+def mixed_load() -> list:
+    sizes = [(0.6, 0.5, 0.4), (0.9, 0.4, 0.7), (0.5, 0.3, 0.5), (1.1, 0.6, 0.8), (0.4, 0.4, 0.4), (0.7, 0.5, 1.0)]
+    return [make_box(f's{t}_{i}', *size) for t, size in enumerate(sizes) for i in range(6)]
+
+
+def test_group_by_sku_keeps_consecutive_runs():
+    boxes = [make_box('a1', 1, 1, 1), make_box('a2', 1, 1, 1), make_box('b1', 2, 1, 1), make_box('a3', 1, 1, 1)]
+
+    groups = group_by_sku(boxes)
+
+    assert [[b.id for b in g] for g in groups] == [['a1', 'a2'], ['b1'], ['a3']]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_restart_search_never_scores_below_initial_order(workers):
+    truck = Truck_t(id='t', width=2.4, height=1.2, depth=3.0)
+    boxes = mixed_load()
+    original = list(boxes)
+    if workers > 1:
+        # The pool outlives the call; its first start-up would otherwise take the whole budget
+        list(worker_pool(workers).map(abs, range(4 * workers)))
+
+    placed, notes, stats = restart_search(truck, boxes, time_budget_ms=300, workers=workers, seed=1)
+
+    assert stats['workers'] == workers
+    assert stats['packings'] > 2
+    assert stats['packings_per_second'] > 0
+    assert stats['best_score'] >= stats['initial_score']
+    assert ScoringEngine(truck).get_all_scores(placed, original)['total_score'] == stats['best_score']
+    assert len(placed) + len(boxes) == len(original)
+    assert notes[0].startswith('\n[RESTART SEARCH]')
+
+
+def test_restart_search_enumerates_small_sku_sequences():
+    truck = Truck_t(id='t', width=2.0, height=1.0, depth=2.0)
+    boxes = [make_box('a', 1.0, 1.0, 1.0), make_box('b', 2.0, 1.0, 1.0), make_box('c', 1.0, 0.5, 1.0)]
+
+    _, _, stats = restart_search(truck, boxes, time_budget_ms=60_000, workers=4)
+
+    # 3 groups: the 6 permutations, the best layout kept rather than packed again
+    assert stats['packings'] == 6
+
+
+def test_restart_search_keeps_to_its_budget_and_truncates_an_unfinished_layout():
+    truck = Truck_t(id='t', width=2.4, height=2.6, depth=13.6)
+    boxes = [make_box(f'{b.id}_{i}', b.width, b.height, b.depth) for i in range(6) for b in mixed_load()]
+    budget = TimeBudget(1)
+
+    placed, notes, stats = restart_search(truck, boxes, time_budget_ms=1, workers=1, budget=budget)
+
+    assert budget.truncated
+    assert stats['packings'] == 1
+    assert placed and boxes and len(placed) + len(boxes) == 216
+
+
+def test_concurrent_restart_searches_keep_their_own_loads():
+    truck = Truck_t(id='t', width=2.4, height=1.2, depth=3.0)
+    loads = [
+        [make_box(f'{tag}{b.id}', b.width, b.height, b.depth) for b in mixed_load()] for tag in ('a', 'b', 'c', 'd')
+    ]
+
+    def search(load):
+        placed, _, _ = restart_search(truck, list(load), time_budget_ms=200, workers=1, seed=1)
+        return {p.id for p in placed}
+
+    with ThreadPoolExecutor(max_workers=4) as threads:
+        results = list(threads.map(search, loads))
+
+    for load, ids in zip(loads, results):
+        assert ids and ids <= {b.id for b in load}
+
+
+def test_restart_search_stops_on_cancel():
+    cancel = CancelToken()
+    cancel.cancel('client disconnected')
+    boxes = mixed_load()
+
+    with pytest.raises(PackCancelled):
+        restart_search(Truck_t(id='t', width=2.4, height=1.2, depth=3.0), boxes, time_budget_ms=60_000, cancel=cancel)
+
+
+def test_beam_width_one_matches_its_own_score_and_wider_beams_never_lose():
+    truck = Truck_t(id='t', width=2.4, height=1.2, depth=3.0)
+    scores = []
+    for width in (1, 2, 4):
+        boxes = mixed_load()
+        original = list(boxes)
+
+        placed, notes, stats = beam_pack(truck, boxes, beam_width=width)
+
+        assert stats['beam_width'] == width
+        assert len(placed) + len(boxes) == len(original)
+        assert ScoringEngine(truck).get_all_scores(placed, original)['total_score'] == stats['best_score']
+        assert notes[0].startswith('\n[BEAM SEARCH]')
+        scores.append(stats['best_score'])
+
+    assert scores == sorted(scores)
+
+
+def test_beam_branches_share_state_instead_of_copying():
+    truck = Truck_t(id='t', width=2.0, height=1.0, depth=2.0)
+    search = BeamSearch(truck, [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(3)] + [make_box('b', 2.0, 1.0, 1.0)])
+    root = search.initial_state()
+
+    children = search.expand(root, tuple(Hstix))
+
+    assert len(children) == len(Hstix)
+    assert all(child.trace[1] is root.trace and child.offset == 3 for child in children)
+    assert all(child.head == () and child.tally.count == 3 for child in children)
+    assert search.remaining(children[0])[0].id == 'b'
+
+
+def test_search_modes_stop_once_layout_is_provably_optimal():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=3.0)
+
+    def load():
+        return [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(4)] + [make_box('big', 3.0, 3.0, 3.0)]
+
+    stop_volume = compute_bounds(truck, load()).target_volume(0.0)
+
+    _, _, exhaustive = beam_pack(truck, load(), beam_width=4)
+    placed, _, stopped = beam_pack(truck, load(), beam_width=4, stop_volume=stop_volume)
+    assert len(placed) == 4
+    assert stopped['best_score'] == exhaustive['best_score']
+    assert stopped['expansions'] < exhaustive['expansions']
+
+    _, _, stats = restart_search(truck, mixed_load(), time_budget_ms=60_000, workers=1, stop_volume=0.0)
+    assert stats['packings'] == 1
+
+
+def assert_valid_layout(truck, placed, boxes):
+    specs = {b.id: b for b in boxes}
+    cuboids = []
+    for p in placed:
+        b = specs[p.id]
+        w, h, d = placed_dims(b, p.rotation)
+        cuboids.append((p.x, p.y, p.z, p.x + w, p.y + h, p.z + d))
+    eps = 1e-9
+    for x0, y0, z0, x1, y1, z1 in cuboids:
+        assert x0 >= -eps and y0 >= -eps and z0 >= -eps
+        assert x1 <= truck.width + eps and y1 <= truck.height + eps and z1 <= truck.depth + eps
+    for i, a in enumerate(cuboids):
+        for b in cuboids[i + 1:]:
+            assert any(a[k + 3] <= b[k] + eps or b[k + 3] <= a[k] + eps for k in range(3))
+        if a[1] > eps:
+            support = sum(
+                max(0.0, min(a[3], b[3]) - max(a[0], b[0])) * max(0.0, min(a[5], b[5]) - max(a[2], b[2]))
+                for b in cuboids if abs(b[4] - a[1]) <= eps
+            )
+            assert support >= (a[3] - a[0]) * (a[5] - a[2]) - eps
+
+
+def test_exact_mode_beats_heuristic_on_oversized_first_load_and_proves_optimality():
+    truck = Truck_t(id='t', width=2.0, height=1.0, depth=2.0)
+    boxes = [make_box('big', 3.0, 1.0, 1.0)] + [make_box(f'a{i}', 1.0, 1.0, 1.0) for i in range(3)]
+    original = list(boxes)
+
+    placed, notes, stats = exact_pack(truck, boxes, hint=[], time_limit_ms=5_000, workers=1)
+
+    assert stats['proven_optimal'] is True
+    assert sorted(p.id for p in placed) == ['a0', 'a1', 'a2']
+    assert [b.id for b in boxes] == ['big']
+    assert_valid_layout(truck, placed, original)
+    assert notes[0].startswith('\n[EXACT CP-SAT] status=OPTIMAL')
+
+
+def test_exact_mode_is_skipped_when_hint_meets_the_bound_and_honours_cancel():
+    truck = Truck_t(id='t', width=2.0, height=1.0, depth=1.0)
+    boxes = [make_box('a', 1.0, 1.0, 1.0), make_box('b', 1.0, 1.0, 1.0)]
+    hint = [PlacedBox_t(id='a', x=0.0, y=0.0, z=0.0), PlacedBox_t(id='b', x=1.0, y=0.0, z=0.0)]
+
+    placed, _, stats = exact_pack(truck, boxes, hint=hint, stop_volume=compute_bounds(truck, boxes).target_volume(0.0))
+    assert stats['status'] == 'SKIPPED'
+    assert placed == hint and boxes == []
+
+    cancel = CancelToken()
+    cancel.cancel('client disconnected')
+    with pytest.raises(PackCancelled):
+        exact_pack(truck, [make_box('a', 1.0, 1.0, 1.0)], cancel=cancel)
+
+
+def test_auto_mode_solves_small_thorough_loads_exactly():
+    truck = Truck_t(id='t', width=2.4, height=1.2, depth=3.0)
+
+    thorough = begin_pack(truck, mixed_load()[:12], quality='thorough')
+    balanced = begin_pack(truck, mixed_load()[:12], quality='balanced')
+
+    assert thorough['search']['mode'] == 'exact'
+    assert balanced['search'] is None
+    assert_valid_layout(truck, thorough['placed'], mixed_load())
+
+
+def test_extreme_point_engine_keeps_layouts_valid_and_returns_unplaced_boxes():
+    truck = Truck_t(id='t', width=2.4, height=1.2, depth=3.0)
+    sizes = [(0.3 + (i * 7 % 11) / 20, 0.2 + (i * 5 % 9) / 20, 0.3 + (i * 3 % 13) / 20) for i in range(120)]
+    loads = [mixed_load(), [make_box(f'u{i}', *size) for i, size in enumerate(sizes)]]
+
+    for boxes in loads:
+        original = list(boxes)
+
+        placed, notes = extreme_point_pack(truck, boxes)
+
+        assert_valid_layout(truck, placed, original)
+        assert {p.id for p in placed}.isdisjoint(b.id for b in boxes)
+        assert len(placed) + len(boxes) == len(original)
+        assert notes[-1].startswith('\n> Extreme points: placed=')
+
+    assert boxes, 'the unique-shape load overfills the truck'
+
+
+def test_heightmap_engine_stacks_off_grid_boxes_and_returns_unplaced_boxes():
+    truck = Truck_t(id='t', width=2.4, height=1.2, depth=3.0)
+    sizes = [(0.3 + (i * 7 % 11) / 20, 0.2 + (i * 5 % 9) / 20, 0.3 + (i * 3 % 13) / 20) for i in range(120)]
+    loads = [mixed_load(), [make_box(f'u{i}', *size) for i, size in enumerate(sizes)]]
+
+    for boxes in loads:
+        original = list(boxes)
+
+        placed, notes = heightmap_pack(truck, boxes, resolution=0.1)
+
+        assert_valid_layout(truck, placed, original)
+        assert len(placed) + len(boxes) == len(original)
+        assert any(p.y > 0 for p in placed), 'boxes narrower than a cell multiple still carry others'
+        assert notes[-1].startswith('\n> Heightmap: placed=')
+
+    assert boxes, 'the unique-shape load overfills the truck'
+
+
+def test_heightmap_coarsens_a_resolution_too_fine_for_its_cell_cap():
+    truck = Truck_t(id='t', width=2.4, height=2.6, depth=13.6)
+
+    packer = HeightmapPacker(truck, 0.0001)
+    boxes = [make_box('a', 1.0, 1.0, 1.0)]
+    placed, notes = heightmap_pack(truck, boxes, resolution=0.0001)
+
+    assert 0 < packer.nx * packer.nz <= HM_MAX_CELLS
+    assert packer.resolution > 0.0001
+    assert len(placed) == 1
+    assert f'resolution={packer.resolution:g}' in notes[-1]
+    assert HeightmapPacker(truck, 0.05).resolution == 0.05
+
+
+def test_wall_engine_keeps_walls_apart_and_packs_them_the_same_in_parallel():
+    truck = Truck_t(id='t', width=2.4, height=2.6, depth=6.0)
+    sizes = [(0.4, 0.3, 0.5), (0.6, 0.4, 0.6), (0.3, 0.3, 0.3), (0.5, 0.5, 0.8), (1.3, 0.6, 0.7)]
+    boxes = [make_box(f'w{t}_{i}', *size) for t, size in enumerate(sizes) for i in range(50)]
+    original = list(boxes)
+
+    walls = [r for r in iter_wall_pack(truck, boxes, workers=1) if r.placed]
+    placed = [p for wall in walls for p in wall.placed]
+    parallel, notes = wall_pack(truck, list(original), workers=2)
+
+    assert_valid_layout(truck, placed, original)
+    assert len(placed) + len(boxes) == len(original)
+    for wall in walls:
+        for p in wall.placed:
+            d = placed_dims(next(b for b in original if b.id == p.id), p.rotation)[2]
+            assert wall.region.z - 1e-9 <= p.z and p.z + d <= wall.region.z + wall.region.depth + 1e-9
+    assert [(p.id, p.x, p.y, p.z) for p in parallel] == [(p.id, p.x, p.y, p.z) for p in placed]
+    assert notes[0].startswith('\n> Wall 0: depth=')
+    assert 'workers=2' in notes[-1]
+
+
+def test_allocate_boxes_splits_each_sku_by_volume_of_the_regions_it_fits():
+    regions = [PackRegion(0, 0, 0, 1.0, 1.0, 1.0), PackRegion(1, 0, 0, 3.0, 1.0, 1.0), PackRegion(0, 1, 0, 0.2, 0.2, 0.2)]
+    boxes = [make_box(f's{i}', 0.5, 0.5, 0.5) for i in range(10)] + [make_box('wide', 2.0, 0.5, 0.5), make_box('huge', 5, 5, 5)]
+
+    shares, unfit = allocate_boxes(boxes, regions)
+
+    assert [[b.id for b in share] for share in shares] == [
+        ['s0', 's1', 's2'],
+        ['s3', 's4', 's5', 's6', 's7', 's8', 's9', 'wide'],
+        [],
+    ]
+    assert [b.id for b in unfit] == ['huge']
+
+
+def test_partitioned_pack_packs_siblings_the_same_in_parallel_and_keeps_layouts_valid():
+    truck = Truck_t(id='t', width=2.4, height=2.6, depth=6.0)
+    load = (
+        [make_box(f'a{i}', 1.0, 1.2, 1.0) for i in range(4)]
+        + [make_box(f'b{i}', 0.3, 0.3, 0.4) for i in range(150)]
+        + [make_box(f'c{i}', 0.4, 0.2, 0.5) for i in range(100)]
+    )
+
+    boxes = list(load)
+    placed, notes, stats = partitioned_pack(truck, boxes, workers=1)
+    parallel, _, parallel_stats = partitioned_pack(truck, list(load), workers=2)
+
+    assert_valid_layout(truck, placed, load)
+    assert len(placed) + len(boxes) == len(load)
+    assert stats['siblings'] == parallel_stats['siblings'] == 3
+    assert parallel_stats['workers'] == 2
+    assert [(p.id, p.x, p.y, p.z) for p in parallel] == [(p.id, p.x, p.y, p.z) for p in placed]
+    assert notes[0].startswith('\n[PARTITIONED] workers=1 | siblings=3')
+
+
+def test_fleet_pack_spreads_the_load_over_trucks_the_same_in_parallel_within_weight_limits():
+    trucks = [
+        Truck_t(id='small', width=2.4, height=2.6, depth=3.0, max_weight=150.0),
+        Truck_t(id='big', width=2.4, height=2.6, depth=6.0),
+    ]
+    load = (
+        [make_box(f'a{i}', 1.0, 1.2, 1.0, weight=20.0) for i in range(12)]
+        + [make_box(f'b{i}', 0.3, 0.3, 0.4) for i in range(150)]
+        + [make_box(f'c{i}', 0.4, 0.2, 0.5) for i in range(100)]
+        + [make_box('huge', 3.0, 3.0, 3.0)]
+    )
+
+    result = fleet_pack(trucks, list(load), workers=1)
+    parallel = fleet_pack(trucks, list(load), workers=2)
+
+    specs = {b.id: b for b in load}
+    placed_ids = [p.id for layout in result['trucks'] for p in layout['placed']]
+    for truck, layout in zip(trucks, result['trucks']):
+        assert layout['truck_id'] == truck.id
+        assert_valid_layout(truck, layout['placed'], load)
+    assert sum(specs[p.id].weight for p in result['trucks'][0]['placed']) <= 150.0
+    assert sorted(placed_ids + [b.id for b in result['unplaced']]) == sorted(specs)
+    assert 'huge' in [b.id for b in result['unplaced']]
+    assert all(layout['placed'] for layout in result['trucks'])
+    assert [[(p.id, p.x, p.y, p.z) for p in layout['placed']] for layout in parallel['trucks']] == [
+        [(p.id, p.x, p.y, p.z) for p in layout['placed']] for layout in result['trucks']
+    ]
+    assert 'parallel rounds=0' not in parallel['notes'][0]
+
+
+def test_select_truck_prunes_skips_and_returns_the_cheapest_fit():
+    load = [make_box(f'c{i}', 0.6, 0.6, 0.6) for i in range(12)]
+    trucks = [
+        Truck_t(id='bargain', width=2.0, height=1.0, depth=7.0),
+        Truck_t(id='wide', width=2.0, height=1.0, depth=6.0),
+        Truck_t(id='narrow', width=1.0, height=1.0, depth=6.0),
+        Truck_t(id='short', width=1.0, height=1.0, depth=5.5),
+        Truck_t(id='tiny', width=0.5, height=1.0, depth=6.0),
+    ]
+
+    result = select_truck(trucks, [3.0, 10.0, 2.0, 1.0, 0.5], list(load), workers=1)
+    fallback = select_truck(trucks[2:3], [2.0], list(load), workers=1)
+
+    # wide costs more than the confirmed fit, short fits inside narrow, which failed
+    assert [c['status'] for c in result['candidates']] == ['fits', 'skipped', 'does_not_fit', 'skipped', 'pruned']
+    assert (result['truck_id'], result['cost'], result['fits']) == ('bargain', 3.0, True)
+    assert len(result['placed']) == len(load) and not result['unplaced']
+    assert (fallback['truck_id'], fallback['fits']) == ('narrow', False)
+    assert len(fallback['placed']) + len(fallback['unplaced']) == len(load)
+
+
+def test_build_pallets_reuses_full_pallet_layouts_and_builds_the_same_in_parallel():
+    pallet = Truck_t(id='pallet', width=1.2, height=1.0, depth=0.8)
+    load = (
+        [make_box(f'a{i}', 0.4, 0.4, 0.4) for i in range(130)]
+        + [make_box(f'b{i}', 0.3, 0.2, 0.25) for i in range(60)]
+        + [make_box(f'c{i}', 0.5, 0.3, 0.35) for i in range(20)]
+        + [make_box('long', 2.0, 0.2, 0.2, weight=5.0)]
+    )
+
+    pallets._PALLET_CACHE.clear()
+    built, loose, stats = pallets.build_pallets(pallet, list(load), workers=1)
+    pallets._PALLET_CACHE.clear()
+    parallel, _, _ = pallets.build_pallets(pallet, list(load), workers=2)
+    _, _, cached = pallets.build_pallets(pallet, list(load), workers=1)
+
+    # 12 cubes fill a pallet: 10 full pallets share the probe's layout, plus one of the b SKU
+    assert stats['full'] == 11 and stats['reused'] >= 9
+    assert cached['packed'] == 0
+    for load_ in built:
+        assert_valid_layout(pallet, load_.placed, load)
+        assert load_.load_height <= pallet.height
+    ids = [p.id for load_ in built for p in load_.placed] + [b.id for b in loose]
+    assert sorted(ids) == sorted(b.id for b in load)
+    assert 'long' in [b.id for b in loose]
+    assert [[(p.id, p.x, p.y, p.z) for p in load_.placed] for load_ in parallel] == [
+        [(p.id, p.x, p.y, p.z) for p in load_.placed] for load_ in built
+    ]
+
+
+def test_concurrent_pallet_builds_share_the_cache_while_it_evicts(monkeypatch):
+    pallet = Truck_t(id='pallet', width=1.2, height=1.0, depth=0.8)
+    monkeypatch.setattr(pallets, 'PALLET_CACHE_SIZE', 2)
+    pallets._PALLET_CACHE.clear()
+    loads = [[make_box(f'{t}_{i}', 0.2 + t / 50, 0.2, 0.25) for i in range(40)] for t in range(8)]
+
+    def build(load):
+        built, loose, _ = pallets.build_pallets(pallet, list(load), workers=1)
+        return sum(len(load_.placed) for load_ in built) + len(loose)
+
+    with ThreadPoolExecutor(max_workers=8) as threads:
+        counts = list(threads.map(build, loads * 4))
+
+    assert counts == [40] * 32
+    assert len(pallets._PALLET_CACHE) <= 2
+
+
+def test_online_pack_places_arrivals_as_they_come_and_keeps_at_most_two_trucks_open():
+    truck = Truck_t(id='t', width=2.0, height=1.5, depth=2.0, max_weight=40.0)
+    load = [make_box(f'{b.id}_{i}', b.width, b.height, b.depth, weight=1.5) for i, b in enumerate(mixed_load() * 4)]
+    huge = [make_box(f'huge_{i}', 3.0, 0.1, 0.1) for i in range(3)]
+    pulled = []
+
+    def arrivals():
+        for i, box in enumerate(load):
+            pulled.append(box.id)
+            yield [box, huge[i // 50]] if i % 50 == 0 else box
+
+    layouts, rejected, closed, open_trucks = {}, [], [], set()
+    for count, step in enumerate(online_pack(truck, arrivals(), open_trucks=2), 1):
+        assert len(pulled) == min(count, len(load))
+        for index, pb in step.placed:
+            layouts.setdefault(index, []).append(pb)
+            open_trucks.add(index)
+        rejected.extend(box.id for box in step.rejected)
+        closed.extend(step.closed)
+        open_trucks.difference_update(c.index for c in step.closed)
+        assert len(open_trucks) <= 2
+
+    assert not open_trucks and len(layouts) >= 3
+    assert rejected == [b.id for b in huge]
+    assert sorted(c.index for c in closed) == sorted(layouts)
+    for c in closed:
+        assert_valid_layout(truck, layouts[c.index], load)
+        assert c.box_count == len(layouts[c.index]) and c.weight <= 40.0
+    assert sorted(p.id for layout in layouts.values() for p in layout) == sorted(b.id for b in load)
+
+
+def test_repack_keeps_untouched_placements_and_moves_only_what_the_edits_displace():
+    truck = Truck_t(id='t', width=2.0, height=1.5, depth=3.0)
+    load = mixed_load()
+    placed, _ = extreme_point_pack(truck, list(load))
+    specs = {b.id: b for b in load}
+    pin = make_box('pin', 0.3, 0.3, 0.3)
+    specs['pin'] = pin
+
+    def top(p):
+        return p.y + placed_dims(specs[p.id], p.rotation)[1]
+
+    # A floor box with another box on it, and the box in the front-left corner, which the pin evicts
+    base = next(p for p in placed if p.y == 0 and p.x > 0 and any(abs(q.y - top(p)) < 1e-9 for q in placed))
+    corner = next(p for p in placed if (p.x, p.y, p.z) == (0.0, 0.0, 0.0))
+    pinned = [PlacedBox_t(id='pin', x=0.0, y=0.0, z=0.0, rotation=0)]
+    extra = [make_box(f'n{i}', 0.4, 0.3, 0.4) for i in range(4)]
+
+    result = repack(truck, load, placed, add=[pin] + extra, remove=[base.id], pinned=pinned)
+
+    changed = {p.id: p for p in result['changed']}
+    assert (changed['pin'].x, changed['pin'].y, changed['pin'].z) == (0.0, 0.0, 0.0)
+    assert base.id in result['removed'] and base.id not in changed
+    assert corner.id in changed or corner.id in result['removed']
+    displaced = displaced_boxes(truck, specs, placed, {base.id}, {})
+    assert displaced and displaced <= set(changed) | set(result['removed'])
+    kept = [p for p in placed if p.id not in changed and p.id not in result['removed']]
+    assert result['unchanged_count'] == len(kept)
+    final = kept + [PlacedBox_t(id=p.id, x=p.x, y=p.y, z=p.z, rotation=p.rotation) for p in result['changed']]
+    assert_valid_layout(truck, final, list(specs.values()) + extra)
+    assert sorted([p.id for p in final] + [b.id for b in result['unplaced']]) == sorted(
+        (set(specs) | {b.id for b in extra}) - {base.id}
+    )
+
+    with pytest.raises(ValueError):
+        repack(truck, load, placed, add=[pin], pinned=[PlacedBox_t(id='pin', x=1.9, y=0.0, z=0.0, rotation=0)])
+
+
+def test_repack_keeps_boxes_pinned_where_they_already_are():
+    truck = Truck_t(id='t', width=2.0, height=2.0, depth=1.0)
+    a, b, c = make_box('a', 1.0, 1.0, 1.0), make_box('b', 1.0, 1.0, 1.0), make_box('c', 1.0, 1.0, 1.0)
+    placed = [
+        PlacedBox_t(id='a', x=0.0, y=0.0, z=0.0, rotation=0),
+        PlacedBox_t(id='b', x=0.0, y=1.0, z=0.0, rotation=0),
+        PlacedBox_t(id='c', x=1.0, y=0.0, z=0.0, rotation=0),
+    ]
+
+    in_place = repack(truck, [a, b, c], placed, pinned=[placed[0]])
+    # b stays where it is pinned although a, under it, is removed
+    on_removed = repack(truck, [a, b, c], placed, remove=['a'], pinned=[placed[1]])
+
+    assert in_place['changed'] == [] and in_place['removed'] == [] and in_place['unchanged_count'] == 3
+    assert on_removed['changed'] == [] and on_removed['removed'] == ['a'] and on_removed['unchanged_count'] == 2
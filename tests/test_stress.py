@@ -4,10 +4,13 @@ import json
 from pathlib import Path
 from time import perf_counter
 
+import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from python.api.routes import router
+from python.vtl_core.orientations import oriented_dims
+from python.vtl_core.packing.processing import QUALITY_LATENCY_TARGET_MS
 
 ROOT = Path(__file__).resolve().parents[1]
 
@@ -16,6 +19,9 @@ app.include_router(router)
 client = TestClient(app)
 
 
+SAMPLE_FILES = sorted(p.name for p in (ROOT / 'tests').glob('*.json'))
+
+
 def load_payload(name: str) -> dict:
     return json.loads((ROOT / 'tests' / name).read_text())
 
@@ -109,12 +115,12 @@ def assert_response_integrity(payload: dict, data: dict):
     truck = payload['truck']
     for pb in placed:
         box = box_map[pb['id']]
-        w, d = (box['depth'], box['width']) if pb.get('rotation', 0) == 1 else (box['width'], box['depth'])
+        w, h, d = oriented_dims(box['width'], box['height'], box['depth'], pb.get('rotation', 0))
         assert pb['x'] >= -1e-9
         assert pb['y'] >= -1e-9
         assert pb['z'] >= -1e-9
         assert pb['x'] + w <= truck['width'] + 1e-6
-        assert pb['y'] + box['height'] <= truck['height'] + 1e-6
+        assert pb['y'] + h <= truck['height'] + 1e-6
         assert pb['z'] + d <= truck['depth'] + 1e-6
 
 
@@ -163,3 +169,31 @@ def test_stress_multilayer_same_type_stack():
     assert len(data['placed']) > 0
     assert len(ys) >= 2
     assert wall_ms < 30000
+
+
+@pytest.mark.parametrize('quality', sorted(QUALITY_LATENCY_TARGET_MS))
+@pytest.mark.parametrize('sample_file', SAMPLE_FILES)
+def test_quality_tier_meets_latency_target(sample_file, quality):
+    payload = {**load_payload(sample_file), 'quality': quality}
+    data, _ = exercise_payload(payload)
+    assert data['runtime_ms'] <= QUALITY_LATENCY_TARGET_MS[quality]
+
+
+def sku_mix_payload(count: int, sku_count: int = 40) -> dict:
+    skus = [(0.1 + (i * 7 % 26) / 100, 0.1 + (i * 11 % 26) / 100, 0.1 + (i * 5 % 26) / 100) for i in range(sku_count)]
+    payload = {
+        'truck': {'id': 'Trailer', 'width': 2.45, 'height': 2.7, 'depth': 13.6, 'max_weight': 40000.0},
+        'boxes': [],
+        'engine': 'extreme_points',
+    }
+    for i in range(count):
+        w, h, d = skus[i % sku_count]
+        payload['boxes'].append({'id': f'K{i+1:05d}', 'width': w, 'height': h, 'depth': d, 'weight': 2.0})
+    return payload
+
+
+def test_stress_extreme_points_ten_thousand_box_manifest():
+    payload = sku_mix_payload(10000)
+    data, wall_ms = exercise_payload(payload)
+    assert len(data['placed']) > 4000
+    assert wall_ms < 30000
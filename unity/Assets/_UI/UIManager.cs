@@ -13,6 +13,21 @@ public class UIManager : MonoBehaviour
 
     public static UIManager Instance;
 
+    // Backend rotation codes 0-5 (python/vtl_core/orientations.py): indices into the box's
+    // (width, height, depth) giving the placed (width, height, depth)
+    private static readonly int[][] BackendRotations =
+    {
+        new[] { 0, 1, 2 }, new[] { 2, 1, 0 }, new[] { 1, 0, 2 },
+        new[] { 2, 0, 1 }, new[] { 0, 2, 1 }, new[] { 1, 2, 0 },
+    };
+
+    // Unity rotation turning the box prefab (x = length, y = height, z = width) into each code
+    private static readonly Vector3[] BackendRotationEulers =
+    {
+        new Vector3(0f, 0f, 0f), new Vector3(0f, 90f, 0f), new Vector3(90f, 0f, 0f),
+        new Vector3(90f, 90f, 0f), new Vector3(0f, 0f, 90f), new Vector3(0f, 90f, 90f),
+    };
+
     private void Awake()
     {
         Instance = this;
@@ -554,21 +569,23 @@ public class UIManager : MonoBehaviour
                     continue;
                 }
 
-                bool rotated = placed.rotation == 1;
-
-                float halfX = rotated ? item.Width / 2f : item.Length / 2f;
-                float halfZ = rotated ? item.Length / 2f : item.Width / 2f;
+                // Placed extents in the backend orientation (width, height, depth)
+                float[] dims = { item.Width, item.Height, item.Length };
+                int[] axes = BackendRotations[placed.rotation];
+                float placedW = dims[axes[0]];
+                float placedH = dims[axes[1]];
+                float placedD = dims[axes[2]];
 
                 // backend: x = width axis, z = depth axis
                 // unity:   z = width axis, x = length/depth axis
                 Vector3 newPos = new Vector3(
-                    placed.z + halfX,
-                    placed.y + item.Height / 2f,
-                    placed.x + halfZ
+                    placed.z + placedD / 2f,
+                    placed.y + placedH / 2f,
+                    placed.x + placedW / 2f
                 );
 
                 item.Position = newPos;
-                item.Rotation = rotated ? Quaternion.Euler(0f, 90f, 0f) : Quaternion.identity;
+                item.Rotation = Quaternion.Euler(BackendRotationEulers[placed.rotation]);
 
                 if (_itemObjects.TryGetValue(placed.id, out GameObject existingBox) && existingBox != null)
                 {